@@ -0,0 +1,15 @@
+"""Offline benchmarks of the meeting preparation pipeline,
+see `python -m benchmarks --help`"""
+
+import os
+import sys
+
+# The application imports `src.*` and `utils.*` (from `backend/src`),
+# see `.vscode/launch.json`
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+if os.path.join(backend_dir, "src") not in sys.path:
+    sys.path.append(os.path.join(backend_dir, "src"))
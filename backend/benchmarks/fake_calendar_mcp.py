@@ -0,0 +1,90 @@
+"""Stand-in for the Google Calendar MCP server, started over stdio by the MCP pool.
+
+The calendar has `n` meetings on the `n`th day from `CALENDAR_BASE_DATE`,
+so a benchmark scenario picks its number of meetings with the requested date.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from datetime import date, timedelta
+from typing import Optional
+from mcp.server.fastmcp import FastMCP
+
+CALENDAR_BASE_DATE = date(2030, 1, 1)
+# Email of the user, excluded from the research of every meeting
+BENCHMARK_USER_EMAIL = "me@bench.example"
+
+
+def date_with_meetings(meeting_count: int) -> str:
+    return (CALENDAR_BASE_DATE + timedelta(days=meeting_count - 1)).isoformat()
+
+
+def calendar_events(day: date, attendee_count: int) -> list:
+    meeting_count = max(0, (day - CALENDAR_BASE_DATE).days + 1)
+
+    return [
+        {
+            "summary": f"Meeting {index} with Company {index}",
+            "company": f"Company {index}",
+            "start": {
+                "dateTime": f"{day.isoformat()}T{8 + index % 10:02d}:"
+                f"{index % 2 * 30:02d}:00+00:00"
+            },
+            "attendees": [
+                {"email": BENCHMARK_USER_EMAIL, "displayName": "Benchmark User"},
+                *(
+                    {
+                        "email": f"attendee{attendee}@company{index}.example",
+                        "displayName": f"Attendee {attendee} of Company {index}",
+                    }
+                    for attendee in range(1, attendee_count + 1)
+                ),
+            ],
+        }
+        for index in range(1, meeting_count + 1)
+    ]
+
+
+def create_server(
+    latency_seconds: float,
+    jitter: float,
+    failure_rate: float,
+    attendee_count: int,
+    seed: int,
+) -> FastMCP:
+    server = FastMCP("fake-google-calendar")
+    rng = random.Random(seed)
+
+    @server.tool(name="list-events", description="List the events of a calendar")
+    async def list_events(
+        calendarId: str,
+        timeMin: str,
+        timeMax: str,
+        timeZone: Optional[str] = None,
+    ) -> str:
+        await asyncio.sleep(latency_seconds * (1 + rng.uniform(-jitter, jitter)))
+
+        if rng.random() < failure_rate:
+            raise RuntimeError("Injected calendar failure")
+
+        day = date.fromisoformat(timeMin[:10])
+
+        return json.dumps({"events": calendar_events(day, attendee_count)})
+
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--attendees", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    create_server(
+        args.latency, args.jitter, args.failure_rate, args.attendees, args.seed
+    ).run("stdio")
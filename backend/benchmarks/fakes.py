@@ -0,0 +1,327 @@
+"""Deterministic stand-ins for Azure OpenAI and Tavily
+with configurable latency and failure injection"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import Any, AsyncGenerator, Dict, Generator, List, Sequence
+import httpx
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    CompletionResponse,
+    LLMMetadata,
+    MessageRole,
+)
+from llama_index.core.llms import LLM
+from llama_index.core.schema import Document
+from llama_index.core.tools import FunctionTool
+from pydantic import Field, PrivateAttr
+from src.llm import LimitedLLM
+from src.run_metrics import record_search_call
+from src.search_cache import search_cache
+from src.tools import search_results_observation
+
+FILLER_WORDS = (
+    "company product platform customers revenue growth partnership launch team "
+    "market strategy research model data enterprise cloud security investment "
+    "leadership experience engineering operations roadmap"
+).split()
+
+
+def filler_text(seed_text: str, word_count: int) -> str:
+    """Deterministic text of `word_count` words, different for every seed text"""
+
+    offset = int(hashlib.sha1(seed_text.encode("utf-8")).hexdigest()[:8], 16)
+
+    return " ".join(
+        FILLER_WORDS[(offset + index * 7) % len(FILLER_WORDS)]
+        for index in range(word_count)
+    )
+
+
+def jittered(seconds: float, jitter: float, rng: random.Random) -> float:
+    return max(0.0, seconds * (1 + rng.uniform(-jitter, jitter)))
+
+
+class ScriptedLLM(LLM):
+    """Answers the workflow prompts without a model.
+
+    The research agents get one `search_web` action, then an answer from the observation,
+    the planned research gets a query per entity and an answer built from its results,
+    the formatting prompts get a markdown document sized after the research.
+    """
+
+    latency_seconds: float = Field(default=0.05, description="Time to the first token")
+    seconds_per_token: float = Field(default=0.0005)
+    jitter: float = Field(default=0.2)
+    failure_rate: float = Field(
+        default=0.0, description="Share of the calls failing with a retryable error"
+    )
+    answer_words: int = Field(default=150)
+    max_document_words: int = Field(default=800)
+    seed: int = Field(default=0)
+
+    _rng: random.Random = PrivateAttr()
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self._rng = random.Random(self.seed)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ScriptedLLM"
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(
+            context_window=128000,
+            num_output=4096,
+            is_chat_model=False,
+            model_name="scripted-llm",
+        )
+
+    def _chat_text(self, messages: Sequence[ChatMessage]) -> str:
+        last_content = str(messages[-1].content or "") if messages else ""
+
+        if last_content.startswith("Observation:"):
+            return (
+                "Thought: I can answer without using any more tools.\n"
+                f"Answer: {filler_text(last_content, self.answer_words)}"
+            )
+
+        prompt = "\n".join(str(message.content or "") for message in messages)
+        entity = re.search(r'"(?:company|email)":\s*"([^"]+)"', prompt)
+        query = entity.group(1) if entity else "meeting preparation"
+
+        return (
+            "Thought: I need to use a tool to help me answer the question.\n"
+            "Action: search_web\n"
+            f"Action Input: {json.dumps({'query': query})}"
+        )
+
+    def _completion_text(self, prompt: str) -> str:
+        if "parse meetings data" in prompt:
+            # Only the `agent` calendar fetch mode parses with the LLM
+            return json.dumps({"meetings": []})
+
+        if "planning the web searches" in prompt:
+            entity = re.search(r'"(?:company|email)":\s*"([^"]+)"', prompt)
+            query = entity.group(1) if entity else "meeting preparation"
+
+            return json.dumps({"queries": [query, f"{query} news"]})
+
+        if "Web Search Results" in prompt:
+            return filler_text(prompt, self.answer_words)
+
+        word_count = min(self.max_document_words, max(50, len(prompt.split()) // 3))
+
+        return f"## Meeting preparation\n\n{filler_text(prompt, word_count)}"
+
+    def _usage(self, prompt: str, text: str) -> Dict[str, int]:
+        # Roughly 3/4 of a word per token, so the metrics need no tokenizer
+        return {
+            "prompt_tokens": len(prompt.split()) * 4 // 3,
+            "completion_tokens": len(text.split()) * 4 // 3,
+        }
+
+    def _latency(self, token_count: int = 0) -> float:
+        return jittered(
+            self.latency_seconds + self.seconds_per_token * token_count,
+            self.jitter,
+            self._rng,
+        )
+
+    def _maybe_fail(self) -> None:
+        if self._rng.random() < self.failure_rate:
+            raise httpx.ConnectError("Injected LLM failure")
+
+    async def _wait(self, token_count: int = 0) -> None:
+        await asyncio.sleep(self._latency(token_count))
+        self._maybe_fail()
+
+    def _wait_sync(self, token_count: int = 0) -> None:
+        # A sync call blocks the event loop, the benchmark latencies show it
+        time.sleep(self._latency(token_count))
+        self._maybe_fail()
+
+    def _chunks(self, text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text)
+
+    def _chat_response(
+        self, messages: Sequence[ChatMessage], text: str, content: str = "", delta=None
+    ) -> ChatResponse:
+        return ChatResponse(
+            message=ChatMessage(role=MessageRole.ASSISTANT, content=content or text),
+            delta=delta,
+            additional_kwargs=self._usage(self._messages_text(messages), text),
+        )
+
+    def _completion_response(
+        self, prompt: str, text: str, content: str = "", delta=None
+    ) -> CompletionResponse:
+        return CompletionResponse(
+            text=content or text, delta=delta, additional_kwargs=self._usage(prompt, text)
+        )
+
+    def _response_contents(self, text: str):
+        """Content so far and delta of every streamed chunk"""
+
+        content = ""
+
+        for delta in self._chunks(text):
+            content += delta
+            yield content, delta
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        text = self._chat_text(messages)
+        await self._wait(len(self._chunks(text)))
+
+        return self._chat_response(messages, text)
+
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        text = self._completion_text(prompt)
+        await self._wait(len(self._chunks(text)))
+
+        return self._completion_response(prompt, text)
+
+    async def astream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> AsyncGenerator[ChatResponse, None]:
+        text = self._chat_text(messages)
+        await self._wait()
+
+        async def response_stream():
+            for content, delta in self._response_contents(text):
+                await asyncio.sleep(self.seconds_per_token)
+                yield self._chat_response(messages, text, content, delta)
+
+        return response_stream()
+
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> AsyncGenerator[CompletionResponse, None]:
+        text = self._completion_text(prompt)
+        await self._wait()
+
+        async def response_stream():
+            for content, delta in self._response_contents(text):
+                await asyncio.sleep(self.seconds_per_token)
+                yield self._completion_response(prompt, text, content, delta)
+
+        return response_stream()
+
+    @staticmethod
+    def _messages_text(messages: Sequence[ChatMessage]) -> str:
+        return "\n".join(str(message.content or "") for message in messages)
+
+    # The workflow makes async calls, a sync call gets the same scripted answer
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        text = self._chat_text(messages)
+        self._wait_sync(len(self._chunks(text)))
+
+        return self._chat_response(messages, text)
+
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        text = self._completion_text(prompt)
+        self._wait_sync(len(self._chunks(text)))
+
+        return self._completion_response(prompt, text)
+
+    def stream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> Generator[ChatResponse, None, None]:
+        text = self._chat_text(messages)
+        self._wait_sync()
+
+        def response_stream():
+            for content, delta in self._response_contents(text):
+                time.sleep(self.seconds_per_token)
+                yield self._chat_response(messages, text, content, delta)
+
+        return response_stream()
+
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> Generator[CompletionResponse, None, None]:
+        text = self._completion_text(prompt)
+        self._wait_sync()
+
+        def response_stream():
+            for content, delta in self._response_contents(text):
+                time.sleep(self.seconds_per_token)
+                yield self._completion_response(prompt, text, content, delta)
+
+        return response_stream()
+
+
+class FakeLLM(LimitedLLM, ScriptedLLM):
+    """`ScriptedLLM` behind the LLM limiter and token recording of the app model"""
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "FakeLLM"
+
+
+class FakeSearch:
+    """Tavily stand-in returning `max_results` deterministic results per query"""
+
+    def __init__(
+        self,
+        latency_seconds: float = 0.02,
+        jitter: float = 0.2,
+        failure_rate: float = 0.0,
+        result_words: int = 120,
+        seed: int = 0,
+    ):
+        self.latency_seconds = latency_seconds
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.result_words = result_words
+        self._rng = random.Random(seed)
+
+    async def search(self, query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+        record_search_call()
+
+        await asyncio.sleep(jittered(self.latency_seconds, self.jitter, self._rng))
+
+        if self._rng.random() < self.failure_rate:
+            raise httpx.ConnectError("Injected search failure")
+
+        slug = re.sub(r"\W+", "-", query.lower()).strip("-")
+
+        return [
+            {
+                "url": f"https://{slug}.example/{index}",
+                "content": filler_text(f"{query}:{index}", self.result_words),
+            }
+            for index in range(max_results)
+        ]
+
+
+def create_search_web_tool(fake_search: FakeSearch) -> FunctionTool:
+    """`search_web` tool of the application, backed by the fake search"""
+
+    async def search_web(query: str) -> List[Document] | str:
+        """Search the Internet for the query and return the result.
+        Args:
+            query (str): The query to search for.
+        """
+        response_results = await search_cache.get_or_fetch(
+            query, lambda: fake_search.search(query=query, max_results=5)
+        )
+
+        return search_results_observation(query, response_results)
+
+    return FunctionTool.from_defaults(
+        fn=search_web,
+        name="search_web",
+        description="Searches the web for the given query and returns the result.",
+    )
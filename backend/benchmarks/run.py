@@ -0,0 +1,411 @@
+"""End to end benchmark of `ProgressWorkflow` with the stand-ins of `benchmarks.fakes`.
+
+Every scenario sends `users` concurrent requests for a day with `meetings` meetings,
+either straight to the workflow (`workflow` driver) or to `/api/run-workflow`
+of an in-process uvicorn server (`api` driver), and reports the throughput,
+the p50/p99 latency and the time to the first streamed event.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from benchmarks.fake_calendar_mcp import BENCHMARK_USER_EMAIL, date_with_meetings
+
+FAKE_CALENDAR_MCP_PATH = os.path.join(os.path.dirname(__file__), "fake_calendar_mcp.py")
+
+# Stream payloads carrying the document (or a part of it)
+CONTENT_EVENT_TYPES = {"delta", "section", "final"}
+
+
+@dataclass
+class RequestTiming:
+    latency: float
+    first_event: Optional[float]
+    first_content: Optional[float]
+    error: Optional[str] = None
+
+
+@dataclass
+class ScenarioReport:
+    driver: str
+    meetings: int
+    users: int
+    requests: int
+    failures: int
+    wall_seconds: float
+    throughput: float
+    latency_p50: Optional[float]
+    latency_p99: Optional[float]
+    first_event_p50: Optional[float]
+    first_event_p99: Optional[float]
+    first_content_p50: Optional[float]
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+
+    values = sorted(values)
+
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def parse_counts(value: str) -> List[int]:
+    return [int(count) for count in value.split(",") if count.strip()]
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """Point the application at the fakes, before any `src` module reads its settings"""
+
+    os.environ["GOOGLE_CALENDAR_MCP_COMMAND"] = sys.executable
+    os.environ["GOOGLE_CALENDAR_MCP_ARGS"] = shlex.join(
+        [
+            FAKE_CALENDAR_MCP_PATH,
+            f"--latency={args.mcp_latency}",
+            f"--jitter={args.jitter}",
+            f"--failure-rate={args.mcp_failure_rate}",
+            f"--attendees={args.attendees}",
+            f"--seed={args.seed}",
+        ]
+    )
+    # The fake calendar returns structured events, the LLM parsing is not measured
+    os.environ["CALENDAR_FETCH_MODE"] = "direct"
+    os.environ["BRIEFING_MODE"] = args.briefing_mode
+    os.environ["RESEARCH_ENGINE"] = args.research_engine
+    os.environ["TRACING_ENABLED"] = "false"
+    # The lifespan of the `api` driver builds the
+    # Azure model before it is swapped for the fake
+    os.environ.setdefault("AZURE_ENDPOINT", "https://benchmark.invalid")
+    os.environ.setdefault("AZURE_OPEN_AI_API_VERSION", "2024-06-01")
+    os.environ.setdefault("OPEN_AI_MODEL", "benchmark")
+    os.environ["PREFETCH_ENABLED"] = "false"
+
+    # Never read nor pollute the caches of the application
+    cache_dir = tempfile.mkdtemp(prefix="meeting-preparation-benchmark-")
+    os.environ["RESEARCH_CACHE_PATH"] = os.path.join(cache_dir, "research_cache.db")
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(cache_dir, "result_cache.db")
+
+    for cache_setting in (
+        "RESEARCH_CACHE_ENABLED",
+        "RESULT_CACHE_ENABLED",
+        "SEARCH_CACHE_ENABLED",
+    ):
+        os.environ[cache_setting] = "true" if args.caches else "false"
+
+
+def meeting_info(meetings: int) -> Dict[str, Any]:
+    return {
+        "date": date_with_meetings(meetings),
+        "company": None,
+        "attendees": None,
+        "exclude_emails": [BENCHMARK_USER_EMAIL],
+    }
+
+
+async def timed_request(
+    send: Callable[[Callable[[Dict[str, Any]], None]], Awaitable[None]],
+) -> RequestTiming:
+    """Time a request, `send` streams it and reports every payload it receives"""
+
+    started_at = time.perf_counter()
+    first_event: Optional[float] = None
+    first_content: Optional[float] = None
+
+    def on_payload(payload: Dict[str, Any]) -> None:
+        nonlocal first_event, first_content
+
+        elapsed = time.perf_counter() - started_at
+
+        if first_event is None:
+            first_event = elapsed
+
+        if first_content is None and payload.get("type") in CONTENT_EVENT_TYPES:
+            first_content = elapsed
+
+    try:
+        await send(on_payload)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+
+    return RequestTiming(
+        latency=time.perf_counter() - started_at,
+        first_event=first_event,
+        first_content=first_content,
+        error=error,
+    )
+
+
+def workflow_driver(resources, bypass_cache: bool):
+    from src.runner import start_workflow_run
+    from src.streaming import final_payload, serialize_event
+
+    def request(meetings: int):
+        async def send(on_payload):
+            workflow_handler, _ = await start_workflow_run(
+                resources, meeting_info(meetings), bypass_cache=bypass_cache
+            )
+
+            async for event in workflow_handler.stream_events():
+                payload = serialize_event(event)
+
+                if payload is not None:
+                    on_payload(payload)
+
+            on_payload(final_payload(await workflow_handler))
+
+        return send
+
+    return request
+
+
+def api_driver(client, bypass_cache: bool):
+    def request(meetings: int):
+        info = meeting_info(meetings)
+
+        async def send(on_payload):
+            async with client.stream(
+                "POST",
+                "/api/run-workflow",
+                json={
+                    "date": info["date"],
+                    "excludeEmails": info["exclude_emails"],
+                    "bypassCache": bypass_cache,
+                },
+            ) as response:
+                response.raise_for_status()
+
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        payload = json.loads(line)
+
+                        if payload.get("type") == "error":
+                            raise RuntimeError(payload.get("data"))
+
+                        on_payload(payload)
+
+        return send
+
+    return request
+
+
+async def run_scenario(
+    driver_name: str, request, meetings: int, users: int, requests_per_user: int
+) -> ScenarioReport:
+    async def user() -> List[RequestTiming]:
+        return [
+            await timed_request(request(meetings)) for _ in range(requests_per_user)
+        ]
+
+    started_at = time.perf_counter()
+    timings = [
+        timing
+        for user_timings in await asyncio.gather(*(user() for _ in range(users)))
+        for timing in user_timings
+    ]
+    wall_seconds = time.perf_counter() - started_at
+
+    succeeded = [timing for timing in timings if timing.error is None]
+
+    for timing in timings:
+        if timing.error is not None:
+            print(f"  request failed: {timing.error}", file=sys.stderr)
+
+    return ScenarioReport(
+        driver=driver_name,
+        meetings=meetings,
+        users=users,
+        requests=len(timings),
+        failures=len(timings) - len(succeeded),
+        wall_seconds=wall_seconds,
+        throughput=len(succeeded) / wall_seconds if wall_seconds else 0.0,
+        latency_p50=percentile([timing.latency for timing in succeeded], 0.5),
+        latency_p99=percentile([timing.latency for timing in succeeded], 0.99),
+        first_event_p50=percentile(
+            [timing.first_event for timing in succeeded if timing.first_event], 0.5
+        ),
+        first_event_p99=percentile(
+            [timing.first_event for timing in succeeded if timing.first_event], 0.99
+        ),
+        first_content_p50=percentile(
+            [timing.first_content for timing in succeeded if timing.first_content],
+            0.5,
+        ),
+    )
+
+
+def print_report(report: ScenarioReport) -> None:
+    def seconds(value: Optional[float]) -> str:
+        return f"{value:8.3f}" if value is not None else "       -"
+
+    print(
+        f"{report.driver:<9}{report.meetings:>9}{report.users:>7}{report.requests:>9}"
+        f"{report.failures:>9}{report.throughput:>10.2f}"
+        f"{seconds(report.latency_p50)}{seconds(report.latency_p99)}"
+        f"{seconds(report.first_event_p50)}{seconds(report.first_event_p99)}"
+        f"{seconds(report.first_content_p50)}",
+        flush=True,
+    )
+
+
+async def run_benchmarks(args: argparse.Namespace) -> List[ScenarioReport]:
+    # Imported once the environment points at the fakes
+    from benchmarks.fakes import FakeLLM, FakeSearch, create_search_web_tool
+    from src.mcp_pool import McpSessionPool
+    from src.resources import WorkflowResources
+    from src.tavily_client import tavily_client
+
+    def create_resources(mcp_pool) -> WorkflowResources:
+        fake_llm = FakeLLM(
+            latency_seconds=args.llm_latency,
+            seconds_per_token=args.llm_token_latency,
+            jitter=args.jitter,
+            failure_rate=args.llm_failure_rate,
+            seed=args.seed,
+        )
+        fake_search = FakeSearch(
+            latency_seconds=args.search_latency,
+            jitter=args.jitter,
+            failure_rate=args.search_failure_rate,
+            seed=args.seed,
+        )
+
+        return WorkflowResources(
+            model=fake_llm,
+            tools=[create_search_web_tool(fake_search)],
+            mcp_pool=mcp_pool,
+        )
+
+    bypass_cache = not args.caches
+    reports: List[ScenarioReport] = []
+
+    print(
+        f"{'driver':<9}{'meetings':>9}{'users':>7}{'requests':>9}{'failures':>9}"
+        f"{'req/s':>10}{'p50':>8}{'p99':>8}{'ttfe p50':>9}{'ttfe p99':>9}{'ttfc p50':>9}"
+    )
+
+    for driver_name in args.drivers:
+        if driver_name == "workflow":
+            mcp_pool = McpSessionPool()
+            await mcp_pool.start()
+            request = workflow_driver(create_resources(mcp_pool), bypass_cache)
+
+            async def stop():
+                await mcp_pool.close()
+
+        else:
+            import httpx
+            import uvicorn
+            from src.main import app
+
+            server = uvicorn.Server(
+                uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning")
+            )
+            server_task = asyncio.create_task(server.serve())
+
+            while not server.started:
+                if server_task.done():
+                    server_task.result()
+
+                await asyncio.sleep(0.05)
+
+            # Swap the resources built by the lifespan for the fakes
+            app.state.workflow_resources = create_resources(app.state.calendar_mcp_pool)
+            app.state.job_manager.resources = app.state.workflow_resources
+
+            port = server.servers[0].sockets[0].getsockname()[1]
+            client = httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}",
+                timeout=None,
+                limits=httpx.Limits(max_connections=None),
+            )
+            request = api_driver(client, bypass_cache)
+
+            async def stop():
+                await client.aclose()
+                server.should_exit = True
+                await server_task
+
+        try:
+            for meetings in args.meetings:
+                for users in args.users:
+                    report = await run_scenario(
+                        driver_name, request, meetings, users, args.requests_per_user
+                    )
+                    print_report(report)
+                    reports.append(report)
+        finally:
+            await stop()
+
+    await tavily_client.aclose()
+
+    return reports
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description=__doc__.splitlines()[0]
+    )
+    parser.add_argument("--drivers", default="workflow,api", help="workflow and/or api")
+    parser.add_argument(
+        "--meetings", default="1,5,20,50", help="meetings per day of every scenario"
+    )
+    parser.add_argument(
+        "--users", default="1,10,50,200", help="concurrent users of every scenario"
+    )
+    parser.add_argument("--requests-per-user", type=int, default=1)
+    parser.add_argument(
+        "--attendees", type=int, default=2, help="external attendees per meeting"
+    )
+    parser.add_argument(
+        "--briefing-mode", default="monolithic", choices=["monolithic", "pipelined"]
+    )
+    parser.add_argument(
+        "--research-engine", default="react", choices=["react", "planned"]
+    )
+    parser.add_argument(
+        "--caches",
+        action="store_true",
+        help="enable the research, search and result caches",
+    )
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.05, help="seconds to the first token"
+    )
+    parser.add_argument(
+        "--llm-token-latency",
+        type=float,
+        default=0.0005,
+        help="seconds per generated token",
+    )
+    parser.add_argument("--llm-failure-rate", type=float, default=0.0)
+    parser.add_argument("--search-latency", type=float, default=0.02)
+    parser.add_argument("--search-failure-rate", type=float, default=0.0)
+    parser.add_argument("--mcp-latency", type=float, default=0.005)
+    parser.add_argument("--mcp-failure-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--jitter", type=float, default=0.2, help="relative latency jitter of the fakes"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the reports to this JSON file")
+    args = parser.parse_args()
+
+    args.drivers = [
+        driver.strip() for driver in args.drivers.split(",") if driver.strip()
+    ]
+    args.meetings = parse_counts(args.meetings)
+    args.users = parse_counts(args.users)
+
+    configure_environment(args)
+
+    reports = asyncio.run(run_benchmarks(args))
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump([asdict(report) for report in reports], output_file, indent=2)
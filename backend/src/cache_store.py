@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from typing import Optional
+import aiosqlite
+
+# `cache` folder inside `backend` folder for the on-disk caches
+cache_dir = os.path.join(os.path.dirname(__file__), "..", "cache")
+
+
+class SqliteCacheStore:
+    """Key/value store on SQLite with per-entry TTL and size-bounded LRU eviction"""
+
+    def __init__(self, path: str, table: str, max_entries: int = 1000):
+        self.path = path
+        self.table = table
+        self.max_entries = max_entries
+        self._connection: Optional[aiosqlite.Connection] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def _get_connection(self) -> aiosqlite.Connection:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self._connection is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+                connection = await aiosqlite.connect(self.path)
+                await connection.execute("PRAGMA journal_mode=WAL")
+                await connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                    "key TEXT PRIMARY KEY, "
+                    "value TEXT NOT NULL, "
+                    "expires_at REAL NOT NULL, "
+                    "accessed_at REAL NOT NULL)"
+                )
+                await connection.commit()
+                self._connection = connection
+
+        return self._connection
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the value of a live entry and mark it as recently used"""
+
+        connection = await self._get_connection()
+        now = time.time()
+
+        async with connection.execute(
+            f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+
+        if expires_at <= now:
+            await connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            await connection.commit()
+            return None
+
+        await connection.execute(
+            f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+        )
+        await connection.commit()
+
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        """Store the value and evict expired and least recently used entries"""
+
+        connection = await self._get_connection()
+        now = time.time()
+
+        await connection.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+            "VALUES (?, ?, ?, ?)",
+            (key, value, now + ttl_seconds, now),
+        )
+        await connection.execute(
+            f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,)
+        )
+        await connection.execute(
+            f"DELETE FROM {self.table} WHERE key IN ("
+            f"SELECT key FROM {self.table} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        await connection.commit()
+
+    async def delete(self, key: str) -> None:
+        connection = await self._get_connection()
+        await connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        await connection.commit()
+
+    async def delete_prefix(self, prefix: str) -> None:
+        connection = await self._get_connection()
+        await connection.execute(
+            f"DELETE FROM {self.table} WHERE substr(key, 1, ?) = ?",
+            (len(prefix), prefix),
+        )
+        await connection.commit()
+
+    async def clear(self) -> None:
+        connection = await self._get_connection()
+        await connection.execute(f"DELETE FROM {self.table}")
+        await connection.commit()
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
@@ -0,0 +1,146 @@
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from llama_index.tools.mcp import BasicMCPClient
+from src.limits import mcp_limiter
+from src.mcp_pool import (
+    GOOGLE_CALENDAR_MCP_ARGS,
+    GOOGLE_CALENDAR_MCP_COMMAND,
+    McpSessionPool,
+)
+from src.models.attendee import Attendee
+from src.models.meeting import Meeting
+
+CALENDAR_LIST_EVENTS_TOOL = os.environ.get("CALENDAR_LIST_EVENTS_TOOL", "list-events")
+CALENDAR_ID = os.environ.get("CALENDAR_ID", "primary")
+# IANA time zone of the day boundaries (e.g. "Asia/Jerusalem"),
+# calendar's time zone if not set
+CALENDAR_TIME_ZONE = os.environ.get("CALENDAR_TIME_ZONE", "")
+
+
+def format_meeting_time(meeting_time: str) -> str:
+    """Convert datetime ISO 8601 to "Hour:Minute AM/PM" format"""
+
+    # Parse the ISO formatted string into a datetime object
+    dt_object = datetime.fromisoformat(meeting_time)
+
+    # Format the datetime object to "Hour:Minute AM/PM"
+    # %I for hour on a 12-hour clock, %M for minute,
+    # %p for locale's equivalent of either AM or PM.
+    return dt_object.strftime("%I:%M %p")
+
+
+def list_events_arguments(meeting_date: str) -> Dict[str, Any]:
+    """Arguments of the calendar list events tool for the whole day of the meeting date"""
+
+    day = date.fromisoformat(meeting_date[:10])
+
+    arguments = {
+        "calendarId": CALENDAR_ID,
+        "timeMin": f"{day.isoformat()}T00:00:00",
+        "timeMax": f"{day.isoformat()}T23:59:59",
+    }
+
+    if CALENDAR_TIME_ZONE:
+        arguments["timeZone"] = CALENDAR_TIME_ZONE
+
+    return arguments
+
+
+def tool_result_text(tool_result: Any) -> str:
+    """Join the text contents of an MCP `CallToolResult`"""
+
+    if getattr(tool_result, "isError", False):
+        raise ValueError(f"Calendar tool returned an error: {tool_result.content}")
+
+    return "\n".join(
+        content.text
+        for content in getattr(tool_result, "content", [])
+        if getattr(content, "text", None)
+    )
+
+
+async def list_calendar_events(
+    meeting_date: str, mcp_pool: Optional[McpSessionPool] = None
+) -> str:
+    """Call the calendar list events tool directly for the whole meeting date"""
+
+    arguments = list_events_arguments(meeting_date)
+
+    if mcp_pool is not None and mcp_pool.is_started:
+        tool_result = await mcp_pool.call_tool(CALENDAR_LIST_EVENTS_TOOL, arguments)
+    else:
+        local_client = BasicMCPClient(
+            GOOGLE_CALENDAR_MCP_COMMAND, args=GOOGLE_CALENDAR_MCP_ARGS
+        )  # stdio
+
+        async with mcp_limiter:
+            tool_result = await local_client.call_tool(
+                CALENDAR_LIST_EVENTS_TOOL, arguments
+            )
+
+    return tool_result_text(tool_result)
+
+
+def parse_calendar_events(tool_result_text: str) -> Optional[List[Dict[str, Any]]]:
+    """Parse the structured (JSON) events of the calendar tool result.
+
+    Returns `None` when the result is not structured, e.g. human readable text.
+    """
+
+    try:
+        data = json.loads(tool_result_text)
+    except (TypeError, ValueError):
+        return None
+
+    if isinstance(data, dict):
+        data = data.get("events", data.get("items"))
+
+    if not isinstance(data, list):
+        return None
+
+    return [event for event in data if isinstance(event, dict)]
+
+
+def meetings_from_events(
+    events: List[Dict[str, Any]], exclude_emails: List[str]
+) -> List[Meeting]:
+    """Map Google Calendar events to meetings with the external attendees only"""
+
+    excluded = {email.strip().casefold() for email in exclude_emails if email}
+
+    meetings: List[Meeting] = []
+
+    for event in events:
+        attendees = [
+            Attendee(
+                email=attendee["email"],
+                name=attendee.get("displayName"),
+                info=attendee.get("comment"),
+            )
+            for attendee in event.get("attendees") or []
+            if attendee.get("email")
+            and attendee["email"].strip().casefold() not in excluded
+        ]
+
+        # Only events with at least one external attendee need a preparation
+        if not attendees:
+            continue
+
+        start = event.get("start") or {}
+        meeting_time = start.get("dateTime") if isinstance(start, dict) else start
+
+        meetings.append(
+            Meeting(
+                title=event.get("summary") or event.get("subject") or "",
+                # Infer the company from the domain of the first external attendee
+                company=event.get("company") or attendees[0].email.split("@")[-1],
+                attendees=attendees,
+                meeting_time=(
+                    format_meeting_time(meeting_time) if meeting_time else "UNKNOWN"
+                ),
+            )
+        )
+
+    return meetings
@@ -0,0 +1,90 @@
+import re
+from typing import List, Optional
+from src.models.calendar_data import CalendarData
+from src.models.meeting import Meeting
+
+MEETINGS_ARRAY_PATTERN = re.compile(r'"meetings"\s*:\s*\[')
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+class MeetingsStreamParser:
+    """Extract the meetings of a streamed `{"meetings": [...]}` completion,
+    every meeting as soon as its JSON object is complete"""
+
+    def __init__(self):
+        self.text = ""
+        self.meeting_count = 0
+        self._position: Optional[int] = None
+        self._depth = 0
+        self._object_start = 0
+        self._in_string = False
+        self._escaped = False
+        self._is_array_closed = False
+
+    def feed(self, delta: str) -> List[Meeting]:
+        self.text += delta
+
+        if self._position is None:
+            array_start = MEETINGS_ARRAY_PATTERN.search(self.text)
+
+            if array_start is None:
+                return []
+
+            self._position = array_start.end()
+
+        meetings: List[Meeting] = []
+
+        while self._position < len(self.text) and not self._is_array_closed:
+            char = self.text[self._position]
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+
+            elif char == '"':
+                self._in_string = True
+
+            elif char == "{":
+                if self._depth == 0:
+                    self._object_start = self._position
+
+                self._depth += 1
+
+            elif char == "}":
+                self._depth -= 1
+
+                if self._depth == 0:
+                    meetings.append(
+                        Meeting.model_validate_json(
+                            self.text[self._object_start : self._position + 1]
+                        )
+                    )
+
+            elif char == "]" and self._depth == 0:
+                self._is_array_closed = True
+
+            self._position += 1
+
+        self.meeting_count += len(meetings)
+
+        return meetings
+
+    def finish(self) -> List[Meeting]:
+        """Meetings of a completion without a recognizable meetings array,
+        parsed as a whole"""
+
+        if self._position is not None:
+            if not self._is_array_closed:
+                raise ValueError(
+                    "Calendar data completion ended in the middle of the meetings"
+                )
+
+            return []
+
+        return CalendarData.model_validate_json(
+            CODE_FENCE_PATTERN.sub("", self.text)
+        ).meetings
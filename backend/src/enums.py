@@ -2,6 +2,7 @@ from enum import Enum
 
 
 class ProgressEventType(str, Enum):
+    QUEUED = "queued"
     INIT = "init"
     CALENDAR_DATA_RETRIEVAL = "calendar_data_retrieval"
     CALENDAR_DATA_PARSER = "calendar_data_parser"
@@ -15,3 +16,61 @@ class ProgressEventType(str, Enum):
 
 class CtxKeys(str, Enum):
     MEETING_INFO = "meeting_info"
+    BYPASS_RESULT_CACHE = "bypass_result_cache"
+    RESULT_CACHE_KEY = "result_cache_key"
+    RESULT_CACHE_HIT = "result_cache_hit"
+    CALENDAR_FINGERPRINT = "calendar_fingerprint"
+    RESEARCH_SESSION = "research_session"
+    RUN_METRICS = "run_metrics"
+    CALENDAR_MEETING_COUNT = "calendar_meeting_count"
+    COLLECTED_MEETINGS = "collected_meetings"
+
+
+class CalendarFetchMode(str, Enum):
+    # LLM agent chooses and calls the calendar tool, its answer is parsed by the LLM
+    AGENT = "agent"
+    # The calendar tool is called directly and its structured result is mapped in code
+    DIRECT = "direct"
+
+
+class StreamEventType(str, Enum):
+    """`type` of the NDJSON lines streamed to the client"""
+
+    PROGRESS = "progress"
+    DELTA = "delta"
+    SECTION = "section"
+    FINAL = "final"
+    SUMMARY = "summary"
+    ERROR = "error"
+
+
+class ResearchEngine(str, Enum):
+    # A ReAct agent loop, one LLM call per search
+    REACT = "react"
+    # One LLM call plans the searches, they run in parallel,
+    # one LLM call writes the research
+    PLANNED = "planned"
+
+
+class BriefingMode(str, Enum):
+    # All the research results are formatted by a single LLM call
+    MONOLITHIC = "monolithic"
+    # Every meeting is formatted and streamed as soon as its research is complete
+    PIPELINED = "pipelined"
+
+
+class JobStatus(str, Enum):
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    # The server shut down before the job finished
+    CANCELLED = "cancelled"
+
+
+class LlmStage(str, Enum):
+    CALENDAR_AGENT = "calendar_agent"
+    CALENDAR_PARSER = "calendar_parser"
+    RESEARCH_AGENT = "research_agent"
+    RESEARCH_PLAN = "research_plan"
+    RESEARCH_SYNTHESIS = "research_synthesis"
+    FORMAT = "format"
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from llama_index.core.workflow import Event, StartEvent
 from pydantic import Field
 from src.enums import ProgressEventType
@@ -35,6 +35,23 @@ class FinalEvent(Event):
     response: str
 
 
+class FormatDeltaEvent(Event):
+    delta: str = Field(description="Next piece of the formatted document")
+
+
+class MeetingSectionEvent(Event):
+    index: int = Field(description="Position of the meeting in the final document")
+    title: str = Field(description="Title of the meeting")
+    section: str = Field(description="Formatted markdown section of the meeting")
+
+
+class AssembleEvent(Event):
+    sections: List[str] = Field(
+        default_factory=list,
+        description="Formatted markdown sections of the meetings in their original order",
+    )
+
+
 class FormatEvent(Event):
     message: str
     response: str
@@ -57,3 +74,32 @@ class ResearchEvent(Event):
     company: Optional[str] = Field(
         default=None, description="Company name for the meeting"
     )
+
+
+class ReplayEvent(Event):
+    payload: Dict[str, Any] = Field(
+        description="Stream payload of a cached run, sent to the client as is"
+    )
+
+
+class RunSummaryEvent(Event):
+    summary: Dict[str, Any] = Field(
+        description="Step wall times, LLM calls and tokens, "
+        "searches and cache hit rates of the run"
+    )
+
+
+class MeetingExtractedEvent(Event):
+    index: int = Field(description="Position of the meeting in the calendar data")
+    meeting: Meeting
+
+
+class MeetingResearchStartedEvent(Event):
+    index: int = Field(description="Position of the meeting in the calendar data")
+    meeting: Meeting
+
+
+class CalendarParsedEvent(Event):
+    meeting_count: int = Field(
+        description="Number of meetings extracted from the calendar data"
+    )
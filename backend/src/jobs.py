@@ -0,0 +1,228 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+from src.enums import JobStatus, StreamEventType
+from src.resources import WorkflowResources
+from src.result_cache import request_key
+from src.limits import admission_controller
+from src.runner import (
+    active_runs,
+    cancel_workflow_run,
+    queued_payloads,
+    start_workflow_run,
+)
+from src.streaming import final_payload, serialize_event
+from utils.logger import consoleLogger, timeFileLogger
+
+# Number of stream events kept per job, older events can't be re-read
+JOB_EVENT_LOG_SIZE = int(os.environ.get("JOB_EVENT_LOG_SIZE", "5000"))
+# How long a finished job can still be attached to
+JOB_RETENTION_SECONDS = float(os.environ.get("JOB_RETENTION_SECONDS", "3600"))
+
+
+class Job:
+    """A workflow run detached from the HTTP connection,
+    with a bounded in-memory event log"""
+
+    def __init__(self, job_id: str, key: str, meeting_info: Dict[str, Any]):
+        self.id = job_id
+        self.key = key
+        self.meeting_info = meeting_info
+        self.status = JobStatus.RUNNING
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=JOB_EVENT_LOG_SIZE)
+        # Offset of the next appended event, offsets are never reused
+        self._next_offset = 0
+        self._changed = asyncio.Condition()
+
+    @property
+    def first_offset(self) -> int:
+        return self._next_offset - len(self._events)
+
+    @property
+    def next_offset(self) -> int:
+        return self._next_offset
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status != JobStatus.RUNNING
+
+    async def append(self, payload: Dict[str, Any]) -> None:
+        async with self._changed:
+            self._events.append(payload)
+            self._next_offset += 1
+            self._changed.notify_all()
+
+    async def finish(self, status: JobStatus) -> None:
+        async with self._changed:
+            self.status = status
+            self.finished_at = time.monotonic()
+            self._changed.notify_all()
+
+    async def events(self, offset: int = 0) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """Yield the events from the offset on,
+        waiting for new ones until the job is finished.
+
+        Events that fell out of the log are skipped,
+        the stream starts from the oldest kept event.
+        """
+
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._next_offset > offset or self.is_finished
+                )
+
+                offset = max(offset, self.first_offset)
+                pending = [
+                    (event_offset, self._events[event_offset - self.first_offset])
+                    for event_offset in range(offset, self._next_offset)
+                ]
+                is_finished = self.is_finished
+
+            for event_offset, payload in pending:
+                yield event_offset, payload
+
+            offset += len(pending)
+
+            if is_finished and offset >= self._next_offset:
+                return
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "jobId": self.id,
+            "status": self.status.value,
+            "firstOffset": self.first_offset,
+            "nextOffset": self.next_offset,
+        }
+
+
+class JobManager:
+    """Runs submitted workflows in the background,
+    identical in-flight submissions share one job"""
+
+    def __init__(self, resources: WorkflowResources):
+        self.resources = resources
+        self._jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+
+    def submit(
+        self, meeting_info: Dict[str, Any], bypass_cache: bool = False
+    ) -> Tuple[Job, bool]:
+        """Submit a run, returns its job and whether an identical job was reused"""
+
+        self._drop_expired_jobs()
+
+        key = f"{request_key(meeting_info)}:{bypass_cache}"
+
+        job = self._in_flight.get(key)
+
+        if job is not None:
+            return job, True
+
+        job = Job(job_id=uuid.uuid4().hex, key=key, meeting_info=meeting_info)
+
+        self._jobs[job.id] = job
+        self._in_flight[key] = job
+
+        job.task = asyncio.create_task(self._run(job, bypass_cache))
+
+        return job, False
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    async def close(self) -> None:
+        """Cancel the running jobs and wait for their runs to stop"""
+
+        tasks = [job.task for job in self._in_flight.values() if job.task is not None]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, job: Job, bypass_cache: bool) -> None:
+        try:
+            with active_runs:
+                briefing = (
+                    None
+                    if bypass_cache or not job.meeting_info["date"]
+                    else await self.resources.result_cache.get_briefing(
+                        job.meeting_info, self.resources.mcp_pool
+                    )
+                )
+
+                if briefing is not None:
+                    # Briefing prepared ahead of time by the prefetch scheduler
+                    for payload in briefing.events:
+                        await job.append(payload)
+
+                    await job.append(final_payload(briefing.final))
+
+                else:
+                    await self._run_workflow(job, bypass_cache)
+
+            await job.finish(JobStatus.COMPLETED)
+
+        except Exception as e:
+            exception_text = f"Error running job {job.id}\n: {e}"
+            consoleLogger.error(exception_text)
+            timeFileLogger.error(exception_text)
+
+            await job.append({"type": StreamEventType.ERROR.value, "data": str(e)})
+            await job.finish(JobStatus.FAILED)
+
+        except asyncio.CancelledError:
+            # The attached clients would wait for the end of the job forever
+            await job.finish(JobStatus.CANCELLED)
+            raise
+
+        finally:
+            self._in_flight.pop(job.key, None)
+
+    async def _run_workflow(self, job: Job, bypass_cache: bool) -> None:
+        async with admission_controller.slot() as slot:
+            async for queued_payload in queued_payloads(slot):
+                await job.append(queued_payload)
+
+            workflow_handler, ctx = await start_workflow_run(
+                self.resources, job.meeting_info, bypass_cache=bypass_cache
+            )
+
+            payloads = []
+
+            try:
+                async for event in workflow_handler.stream_events():
+                    event_payload = serialize_event(event)
+
+                    if event_payload is not None:
+                        payloads.append(event_payload)
+                        await job.append(event_payload)
+
+                final_result = await workflow_handler
+
+            finally:
+                # A cancelled job does not leave its run behind
+                cancellation = cancel_workflow_run(workflow_handler, ctx)
+
+                if cancellation is not None:
+                    await asyncio.wait([cancellation])
+
+        await job.append(final_payload(final_result))
+
+        await self.resources.result_cache.store_run(ctx, payloads, final_result)
+
+    def _drop_expired_jobs(self) -> None:
+        now = time.monotonic()
+
+        for job_id, job in list(self._jobs.items()):
+            if (
+                job.finished_at is not None
+                and now - job.finished_at > JOB_RETENTION_SECONDS
+            ):
+                del self._jobs[job_id]
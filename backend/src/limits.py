@@ -0,0 +1,167 @@
+import asyncio
+import os
+from typing import AsyncIterator, List, Optional
+
+# Runs executed at the same time, the next ones wait in a queue
+MAX_ACTIVE_RUNS = int(os.environ.get("MAX_ACTIVE_RUNS", "4"))
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_RATE_PER_SECOND = float(os.environ.get("LLM_RATE_PER_SECOND", "0"))
+SEARCH_MAX_CONCURRENCY = int(os.environ.get("TAVILY_MAX_CONCURRENCY", "8"))
+SEARCH_RATE_PER_SECOND = float(os.environ.get("SEARCH_RATE_PER_SECOND", "0"))
+MCP_MAX_CONCURRENCY = int(
+    os.environ.get("MCP_MAX_CONCURRENCY", os.environ.get("MCP_POOL_SIZE", "2"))
+)
+
+
+class TokenBucket:
+    """Allows `rate_per_second` calls on average with bursts of up to `burst` calls"""
+
+    def __init__(self, rate_per_second: float, burst: Optional[float] = None):
+        self.rate_per_second = rate_per_second
+        self.capacity = burst or max(1.0, rate_per_second)
+        self._tokens = self.capacity
+        self._updated_at: Optional[float] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def take(self) -> None:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        # Waiters take their turn one by one, in arrival order
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+
+            while True:
+                now = loop.time()
+
+                if self._updated_at is not None:
+                    self._tokens = min(
+                        self.capacity,
+                        self._tokens + (now - self._updated_at) * self.rate_per_second,
+                    )
+                self._updated_at = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate_per_second)
+
+
+class StageLimiter:
+    """Bounds the in-flight calls of a stage across all the workflows of the process,
+    and optionally their rate"""
+
+    def __init__(self, name: str, max_concurrency: int, rate_per_second: float = 0):
+        self.name = name
+        self.max_concurrency = max(1, max_concurrency)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._bucket = TokenBucket(rate_per_second) if rate_per_second > 0 else None
+
+    @property
+    def in_flight(self) -> int:
+        return self.max_concurrency - self._semaphore._value
+
+    async def acquire(self) -> None:
+        await self._semaphore.acquire()
+
+        if self._bucket is not None:
+            try:
+                await self._bucket.take()
+            except BaseException:
+                self._semaphore.release()
+                raise
+
+    def release(self) -> None:
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class AdmissionSlot:
+    """A place in the admission queue, see `AdmissionController.slot`"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self.controller = controller
+        self.is_admitted = False
+
+    async def queue_positions(self) -> AsyncIterator[int]:
+        """Yield the 1-based queue position when it changes, until the run is admitted"""
+
+        controller = self.controller
+        last_position = None
+
+        async with controller._changed:
+            while True:
+                position = controller._queue.index(self) + 1
+
+                if position == 1 and controller.active < controller.max_active_runs:
+                    controller._queue.remove(self)
+                    controller.active += 1
+                    self.is_admitted = True
+                    controller._changed.notify_all()
+                    return
+
+                if position != last_position:
+                    last_position = position
+                    # Yielding while holding the condition lock
+                    # would block the other waiters
+                    controller._changed.release()
+                    try:
+                        yield position
+                    finally:
+                        await controller._changed.acquire()
+                    continue
+
+                await controller._changed.wait()
+
+    async def __aenter__(self):
+        async with self.controller._changed:
+            self.controller._queue.append(self)
+        return self
+
+    async def __aexit__(self, *exc_info):
+        async with self.controller._changed:
+            if self.is_admitted:
+                self.controller.active -= 1
+            elif self in self.controller._queue:
+                self.controller._queue.remove(self)
+
+            self.controller._changed.notify_all()
+
+
+class AdmissionController:
+    """Admits at most `max_active_runs` workflow runs at a time,
+    the next ones wait in a FIFO queue"""
+
+    def __init__(self, max_active_runs: int = MAX_ACTIVE_RUNS):
+        self.max_active_runs = max(1, max_active_runs)
+        self.active = 0
+        self._queue: List[AdmissionSlot] = []
+        self._changed = asyncio.Condition()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def slot(self) -> AdmissionSlot:
+        """Usage:
+
+        async with admission_controller.slot() as slot:
+            async for position in slot.queue_positions():
+                ...  # report the position
+            ...  # run
+        """
+        return AdmissionSlot(self)
+
+
+# Shared by all the workflows of the process
+admission_controller = AdmissionController()
+llm_limiter = StageLimiter("llm", LLM_MAX_CONCURRENCY, LLM_RATE_PER_SECOND)
+search_limiter = StageLimiter("search", SEARCH_MAX_CONCURRENCY, SEARCH_RATE_PER_SECOND)
+mcp_limiter = StageLimiter("mcp", MCP_MAX_CONCURRENCY)
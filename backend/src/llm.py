@@ -0,0 +1,241 @@
+import asyncio
+from functools import partial
+from typing import (
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Callable,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+from llama_index.core.base.llms.types import ChatMessage
+from llama_index.llms.azure_openai import AzureOpenAI
+from src.limits import llm_limiter
+from src.llm_calls import (
+    LLM_MAX_RETRIES,
+    LLM_REQUEST_DEADLINE_SECONDS,
+    LlmDeadlineExceeded,
+    backoff_seconds,
+    is_retryable,
+    llm_call_stats,
+)
+from src.run_metrics import current_llm_stage, llm_call_recorder
+from src.token_budget import count_tokens
+from utils.logger import consoleLogger, timeFileLogger
+
+T = TypeVar("T")
+
+
+def _messages_text(messages: Sequence[ChatMessage]) -> str:
+    return "\n".join(str(message.content or "") for message in messages)
+
+
+def _response_text(response: Any) -> str:
+    message = getattr(response, "message", None)
+
+    if message is not None:
+        return str(message.content or "")
+
+    return str(getattr(response, "text", "") or "")
+
+
+def token_counts(response: Any, prompt_text: str) -> Tuple[int, int]:
+    """Prompt and completion tokens reported by the service,
+    counted locally when it reports none (streams)"""
+
+    usage = getattr(response, "additional_kwargs", None) or {}
+
+    if "prompt_tokens" in usage:
+        return int(usage["prompt_tokens"]), int(usage.get("completion_tokens", 0))
+
+    return count_tokens(prompt_text), count_tokens(_response_text(response))
+
+
+class RequestDeadline:
+    """Deadline of one LLM request, covering its attempts and backoff.
+
+    The time waiting for a slot of the LLM limiter isn't counted,
+    the stage of the request has its own deadline (see `call_llm`).
+    """
+
+    def __init__(self, seconds: float = LLM_REQUEST_DEADLINE_SECONDS):
+        self.stage = current_llm_stage.get()
+        self.seconds = seconds if seconds > 0 else None
+        self.spent = 0.0
+
+    def remaining(self) -> Optional[float]:
+        if self.seconds is None:
+            return None
+
+        return max(0.0, self.seconds - self.spent)
+
+    def exceeded(self) -> LlmDeadlineExceeded:
+        llm_call_stats["deadline_exceeded"] += 1
+        stage_name = self.stage.value if self.stage else "unstaged"
+
+        return LlmDeadlineExceeded(
+            f"{stage_name} LLM request exceeded its {self.seconds}s deadline"
+        )
+
+
+async def _request_with_retries(
+    make_request: Callable[[], Awaitable[T]],
+    deadline: RequestDeadline,
+    hold_slot: bool = False,
+) -> T:
+    """Send the request in an LLM slot, retrying throttled and transient failures.
+
+    The slot is released during the backoff, with `hold_slot` it is kept after a success.
+    """
+
+    loop = asyncio.get_running_loop()
+    retry = 0
+
+    while True:
+        await llm_limiter.acquire()
+        started_at = loop.time()
+
+        try:
+            result = await asyncio.wait_for(make_request(), timeout=deadline.remaining())
+        except asyncio.TimeoutError:
+            llm_limiter.release()
+            raise deadline.exceeded()
+        except Exception as e:
+            llm_limiter.release()
+            error = e
+        except BaseException:
+            llm_limiter.release()
+            raise
+        else:
+            if not hold_slot:
+                llm_limiter.release()
+            return result
+        finally:
+            deadline.spent += loop.time() - started_at
+
+        if retry >= LLM_MAX_RETRIES or not is_retryable(error):
+            raise error
+
+        backoff = backoff_seconds(retry, error)
+        remaining = deadline.remaining()
+
+        # Waiting past the deadline would only turn the error into a timeout
+        if remaining is not None and backoff >= remaining:
+            raise error
+
+        retry += 1
+        llm_call_stats["retries"] += 1
+
+        stage_name = deadline.stage.value if deadline.stage else "unstaged"
+        warning_text = (
+            f"Retrying {stage_name} LLM call ({retry}/{LLM_MAX_RETRIES}) "
+            f"in {backoff:.1f}s\n: {error}"
+        )
+        consoleLogger.warning(warning_text)
+        timeFileLogger.warning(warning_text)
+
+        await asyncio.sleep(backoff)
+        deadline.spent += backoff
+
+
+async def _limited_call(make_call: Callable[[], Awaitable[Any]], prompt_text: str) -> Any:
+    record = llm_call_recorder()
+
+    response = await _request_with_retries(make_call, RequestDeadline())
+
+    record(*token_counts(response, prompt_text))
+
+    return response
+
+
+async def _limited_stream(
+    make_stream: Callable[[], Awaitable[AsyncGenerator]], prompt_text: str
+) -> AsyncGenerator:
+    """Hold an LLM slot until the stream is consumed or closed.
+
+    The request is retried until its first chunk, once a chunk has been forwarded
+    the stream can't be replayed and later failures are raised.
+    """
+
+    record: Callable[[int, int], None] = llm_call_recorder()
+    deadline = RequestDeadline()
+
+    async def open_stream() -> Tuple[Any, AsyncGenerator]:
+        response_stream = await make_stream()
+
+        try:
+            return await response_stream.__anext__(), response_stream
+        except BaseException:
+            await response_stream.aclose()
+            raise
+
+    first_response, response_stream = await _request_with_retries(
+        open_stream, deadline, hold_slot=True
+    )
+
+    async def limited_response_stream():
+        loop = asyncio.get_running_loop()
+        # Every chunk carries the whole response so far
+        last_response = first_response
+
+        try:
+            yield first_response
+
+            while True:
+                started_at = loop.time()
+
+                try:
+                    response = await asyncio.wait_for(
+                        response_stream.__anext__(), timeout=deadline.remaining()
+                    )
+                except StopAsyncIteration:
+                    break
+                except asyncio.TimeoutError:
+                    raise deadline.exceeded()
+                finally:
+                    deadline.spent += loop.time() - started_at
+
+                last_response = response
+                yield response
+        finally:
+            try:
+                await response_stream.aclose()
+            finally:
+                llm_limiter.release()
+                record(*token_counts(last_response, prompt_text))
+
+    return limited_response_stream()
+
+
+class LimitedLLM:
+    """LLM mixin routing the async calls through the process-wide LLM limiter,
+    retrying every request and recording their tokens"""
+
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Any:
+        return await _limited_call(
+            partial(super().achat, messages, **kwargs), _messages_text(messages)
+        )
+
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> Any:
+        return await _limited_call(
+            partial(super().acomplete, prompt, formatted=formatted, **kwargs), prompt
+        )
+
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> Any:
+        return await _limited_stream(
+            partial(super().astream_chat, messages, **kwargs), _messages_text(messages)
+        )
+
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> Any:
+        return await _limited_stream(
+            partial(super().astream_complete, prompt, formatted=formatted, **kwargs),
+            prompt,
+        )
+
+
+class LimitedAzureOpenAI(LimitedLLM, AzureOpenAI):
+    pass
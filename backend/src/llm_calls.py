@@ -0,0 +1,347 @@
+import asyncio
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import AsyncGenerator, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+import httpx
+import openai
+from src.enums import LlmStage
+from src.metrics import latency_histograms
+from src.run_metrics import current_llm_stage
+
+T = TypeVar("T")
+
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "1"))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "30"))
+
+# Time a single LLM request may take, retries and backoff included,
+# the wait for a free LLM slot isn't counted
+LLM_REQUEST_DEADLINE_SECONDS = float(
+    os.environ.get("LLM_REQUEST_DEADLINE_SECONDS", "120")
+)
+
+# Whole time of a stage: an agent run with all its LLM requests and tool calls,
+# a calendar parsing, a research plan or synthesis, a formatting
+STAGE_DEADLINE_SECONDS: Dict[LlmStage, float] = {
+    LlmStage.CALENDAR_AGENT: float(
+        os.environ.get("CALENDAR_AGENT_DEADLINE_SECONDS", "180")
+    ),
+    LlmStage.CALENDAR_PARSER: float(
+        os.environ.get("CALENDAR_PARSER_DEADLINE_SECONDS", "90")
+    ),
+    LlmStage.RESEARCH_AGENT: float(
+        os.environ.get("RESEARCH_AGENT_DEADLINE_SECONDS", "300")
+    ),
+    LlmStage.RESEARCH_PLAN: float(
+        os.environ.get("RESEARCH_PLAN_DEADLINE_SECONDS", "60")
+    ),
+    LlmStage.RESEARCH_SYNTHESIS: float(
+        os.environ.get("RESEARCH_SYNTHESIS_DEADLINE_SECONDS", "120")
+    ),
+    LlmStage.FORMAT: float(os.environ.get("FORMAT_DEADLINE_SECONDS", "120")),
+}
+
+FORMAT_HEDGE_ENABLED = os.environ.get("FORMAT_HEDGE_ENABLED", "false").lower() == "true"
+# A duplicate request is sent when the first one is slower than this,
+# `0` uses the p95 latency observed so far
+FORMAT_HEDGE_DELAY_SECONDS = float(os.environ.get("FORMAT_HEDGE_DELAY_SECONDS", "0"))
+# Delay used until enough latencies are observed for the p95
+FORMAT_HEDGE_DEFAULT_DELAY_SECONDS = 15.0
+HEDGE_MIN_SAMPLES = 20
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+llm_call_stats = {"retries": 0, "deadline_exceeded": 0, "hedges": 0, "hedge_wins": 0}
+
+
+class LlmDeadlineExceeded(TimeoutError):
+    pass
+
+
+def _stage_deadline_exceeded(stage: LlmStage) -> LlmDeadlineExceeded:
+    llm_call_stats["deadline_exceeded"] += 1
+
+    return LlmDeadlineExceeded(
+        f"{stage.value} stage exceeded its {STAGE_DEADLINE_SECONDS[stage]}s deadline"
+    )
+
+
+async def _within_stage_deadline(
+    stage: LlmStage, call: Awaitable[T], deadline: float
+) -> T:
+    loop = asyncio.get_running_loop()
+
+    try:
+        return await asyncio.wait_for(call, timeout=max(0.0, deadline - loop.time()))
+    except LlmDeadlineExceeded:
+        # A single request of the stage ran out of time, already counted
+        raise
+    except asyncio.TimeoutError:
+        raise _stage_deadline_exceeded(stage)
+
+
+def _error_chain(error: BaseException):
+    """The error and the errors it was raised from,
+    agents wrap the errors of their LLM calls"""
+
+    seen = set()
+
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_retryable(error: BaseException) -> bool:
+    for cause in _error_chain(error):
+        if isinstance(cause, (openai.APIConnectionError, httpx.TransportError)):
+            return True
+
+        if isinstance(cause, openai.APIStatusError):
+            return cause.status_code in RETRYABLE_STATUS_CODES
+
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Wait requested by the `retry-after-ms` or
+    `retry-after` header of a throttled response"""
+
+    for cause in _error_chain(error):
+        response = getattr(cause, "response", None)
+
+        if not isinstance(response, httpx.Response):
+            continue
+
+        retry_after_ms = response.headers.get("retry-after-ms")
+
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+
+        retry_after = response.headers.get("retry-after")
+
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+
+            try:
+                retry_at = parsedate_to_datetime(retry_after).timestamp()
+
+                return max(0.0, retry_at - time.time())
+            except (TypeError, ValueError):
+                pass
+
+    return None
+
+
+def backoff_seconds(attempt: int, error: BaseException) -> float:
+    """Jittered exponential backoff, at least the wait requested by the service"""
+
+    backoff = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2**attempt)
+    backoff *= 0.5 + random.random()
+
+    retry_after = retry_after_seconds(error)
+
+    if retry_after is not None:
+        backoff = max(backoff, retry_after)
+
+    return backoff
+
+
+def hedge_delay_seconds(metric: str) -> float:
+    if FORMAT_HEDGE_DELAY_SECONDS > 0:
+        return FORMAT_HEDGE_DELAY_SECONDS
+
+    histogram = latency_histograms.get(metric)
+
+    if histogram.sample_count < HEDGE_MIN_SAMPLES:
+        return FORMAT_HEDGE_DEFAULT_DELAY_SECONDS
+
+    return histogram.quantile(0.95)
+
+
+async def _discard(results: list, discard: Optional[Callable[[T], Awaitable]]) -> None:
+    if discard is None:
+        return
+
+    for result in results:
+        try:
+            await discard(result)
+        except Exception:
+            pass
+
+
+async def _hedged(
+    attempt: Callable[[], Awaitable[T]],
+    delay: float,
+    discard: Optional[Callable[[T], Awaitable]] = None,
+) -> T:
+    """Send a duplicate request if the first one takes longer than the delay,
+    the first success wins"""
+
+    primary = asyncio.ensure_future(attempt())
+    tasks = {primary}
+
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=delay)
+
+        if not done:
+            llm_call_stats["hedges"] += 1
+            tasks.add(asyncio.ensure_future(attempt()))
+
+        error: Optional[BaseException] = None
+
+        while tasks:
+            done, tasks = await asyncio.wait(
+                tasks, return_when=asyncio.FIRST_COMPLETED
+            )
+
+            successes = [task for task in done if task.exception() is None]
+
+            if not successes:
+                error = next(iter(done)).exception()
+                continue
+
+            winner = primary if primary in successes else successes[0]
+
+            if winner is not primary:
+                llm_call_stats["hedge_wins"] += 1
+
+            # Both may have succeeded at once, the other result is released
+            await _discard(
+                [task.result() for task in successes if task is not winner], discard
+            )
+
+            return winner.result()
+
+        raise error
+
+    finally:
+        for task in tasks:
+            task.cancel()
+
+        if tasks:
+            late_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            await _discard(
+                [
+                    result
+                    for result in late_results
+                    if not isinstance(result, BaseException)
+                ],
+                discard,
+            )
+
+
+async def call_llm(
+    stage: LlmStage,
+    make_call: Callable[[], Awaitable[T]],
+    hedge: bool = False,
+) -> T:
+    """Run an LLM call, or an agent run making LLM calls, as a stage.
+
+    The whole run has the deadline of the stage and its tokens are recorded for the stage.
+    Every LLM request is retried on its own (see `src.llm.LimitedLLM`),
+    the run itself isn't repeated. `make_call` starts a new run every time it is called,
+    with `hedge` a slow run gets a duplicate (see `FORMAT_HEDGE_ENABLED`).
+    """
+
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    metric = f"llm.{stage.value}"
+
+    attempt = make_call
+
+    if hedge and FORMAT_HEDGE_ENABLED:
+        attempt = lambda: _hedged(make_call, hedge_delay_seconds(metric))  # noqa: E731
+
+    stage_token = current_llm_stage.set(stage)
+
+    try:
+        result = await _within_stage_deadline(
+            stage, attempt(), started_at + STAGE_DEADLINE_SECONDS[stage]
+        )
+    finally:
+        current_llm_stage.reset(stage_token)
+
+    latency_histograms.observe(metric, loop.time() - started_at)
+
+    return result
+
+
+async def stream_llm(
+    stage: LlmStage,
+    make_stream: Callable[[], Awaitable[AsyncGenerator[T, None]]],
+    hedge: bool = False,
+) -> AsyncGenerator[T, None]:
+    """Streaming `call_llm`, a slow request is hedged until its first chunk.
+
+    The deadline of the stage covers the whole stream.
+    """
+
+    loop = asyncio.get_running_loop()
+    started_at = loop.time()
+    deadline = started_at + STAGE_DEADLINE_SECONDS[stage]
+    metric = f"llm.{stage.value}"
+
+    async def open_stream() -> Tuple[T, AsyncGenerator[T, None]]:
+        response_stream = await make_stream()
+
+        try:
+            return await response_stream.__anext__(), response_stream
+        except BaseException:
+            await response_stream.aclose()
+            raise
+
+    async def close_stream(opened: Tuple[T, AsyncGenerator[T, None]]) -> None:
+        await opened[1].aclose()
+
+    attempt = open_stream
+
+    if hedge and FORMAT_HEDGE_ENABLED:
+        attempt = lambda: _hedged(  # noqa: E731
+            open_stream, hedge_delay_seconds(f"{metric}.first_chunk"), close_stream
+        )
+
+    stage_token = current_llm_stage.set(stage)
+
+    try:
+        first_chunk, response_stream = await _within_stage_deadline(
+            stage, attempt(), deadline
+        )
+    finally:
+        current_llm_stage.reset(stage_token)
+
+    latency_histograms.observe(f"{metric}.first_chunk", loop.time() - started_at)
+
+    async def stage_stream() -> AsyncGenerator[T, None]:
+        try:
+            yield first_chunk
+
+            while True:
+                try:
+                    chunk = await _within_stage_deadline(
+                        stage, response_stream.__anext__(), deadline
+                    )
+                except StopAsyncIteration:
+                    break
+
+                yield chunk
+
+            latency_histograms.observe(metric, loop.time() - started_at)
+
+        finally:
+            await response_stream.aclose()
+
+    return stage_stream()
+
+
+def llm_call_metrics() -> Dict:
+    return dict(llm_call_stats)
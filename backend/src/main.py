@@ -1,21 +1,108 @@
+import asyncio
+import json
 import os
-import re
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-import json
-from src.enums import CtxKeys, ProgressEventType
+from llama_index.core.workflow import Context
+from llama_index.core.workflow.errors import WorkflowCancelledByUser
+from llama_index.core.workflow.handler import WorkflowHandler
+from src.enums import ProgressEventType
 from utils.logger import consoleLogger, timeFileLogger
 from fastapi import Request
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
-from llama_index.core.workflow import Context
-from src.workflow import ProgressWorkflow
-from src.events import ProgressEvent, ProgressWorkflowStartEvent
+from src.events import ProgressEvent
+from src.jobs import JobManager
+from src.mcp_pool import McpSessionPool
+from src.prefetch import PREFETCH_ENABLED, PrefetchScheduler
+from src.resources import WorkflowResources
+from src.limits import admission_controller
+from src.llm_calls import llm_call_metrics
+from src.metrics import latency_histograms
+from src.run_metrics import run_metrics_registry
+from src.search_cache import search_cache
+from src.runner import (
+    active_runs,
+    cancel_workflow_run,
+    meeting_info_from_payload,
+    queued_payloads,
+    start_workflow_run,
+)
+from src.streaming import final_payload, replay_ndjson, serialize_event, to_ndjson
+from src.tavily_client import tavily_client
+from src.token_budget import token_budget_stats
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+# How often a streaming client is checked for a disconnection between two events
+CLIENT_DISCONNECT_POLL_SECONDS = float(
+    os.environ.get("CLIENT_DISCONNECT_POLL_SECONDS", "1")
+)
+
+
+async def cancel_on_disconnect(
+    request: Request, workflow_handler: WorkflowHandler, ctx: Context
+) -> None:
+    """Cancel the run as soon as its client disconnects,
+    the stream may be silent for a long time while the research is running"""
+
+    while not workflow_handler.done():
+        if await request.is_disconnected():
+            cancel_workflow_run(workflow_handler, ctx)
+            return
+
+        await asyncio.sleep(CLIENT_DISCONNECT_POLL_SECONDS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Google Calendar MCP sessions live as long as the application
+    calendar_mcp_pool = McpSessionPool()
+
+    try:
+        await calendar_mcp_pool.start()
+        app.state.calendar_mcp_pool = calendar_mcp_pool
+    except Exception as e:
+        # Without the pool every calendar request spawns its own MCP server
+        exception_text = f"Error starting Google Calendar MCP session pool\n: {e}"
+        consoleLogger.error(exception_text)
+        timeFileLogger.error(exception_text)
+        await calendar_mcp_pool.close()
+        app.state.calendar_mcp_pool = None
+
+    # Azure credential, LLM client, agents and tracing
+    # are built once and shared by all the runs
+    app.state.workflow_resources = WorkflowResources.from_env(
+        mcp_pool=app.state.calendar_mcp_pool
+    )
+
+    # Runs submitted through the job API outlive the client connection
+    app.state.job_manager = JobManager(app.state.workflow_resources)
+
+    # Briefings of the upcoming days are prepared ahead of time
+    prefetch_scheduler = PrefetchScheduler(app.state.workflow_resources)
+
+    if PREFETCH_ENABLED:
+        prefetch_scheduler.start()
+
+    yield
+
+    await prefetch_scheduler.stop()
+    await app.state.job_manager.close()
+
+    if app.state.calendar_mcp_pool is not None:
+        await app.state.calendar_mcp_pool.close()
+
+    await tavily_client.aclose()
+
+    # Checkpoints the WAL of the on-disk caches and stops their connection threads
+    await app.state.workflow_resources.research_cache.close()
+    await app.state.workflow_resources.result_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS to allow requests from Vite frontend
 app.add_middleware(
@@ -37,73 +124,89 @@ async def run_workflow_endpoint(request: Request):
         )
 
     try:
-        # Initialize the workflow timeout for 5 minutes === 300 seconds
-        # progress_workflow = ProgressWorkflow(verbose=True, timeout=300)
-        progress_workflow = ProgressWorkflow(verbose=True, timeout=None)
-
-        mock_company_name = os.environ.get("MOCK_COMPANY_NAME")
-        mock_attendees = os.environ.get("MOCK_ATTENDEES")
-        mock_exclude_emails = os.environ.get("EXCLUDE_EMAILS") or ""
-
-        company = payload.get("company", mock_company_name)
-        attendees = payload.get("attendees", mock_attendees)
-        exclude_emails = payload.get(
-            "excludeEmails", re.split(", ", mock_exclude_emails)
-        )
-        date = payload.get("date", None)
+        meeting_info = meeting_info_from_payload(payload)
+        bypass_cache = bool(payload.get("bypassCache", False))
 
         timeFileLogger.debug("current request data:")
         timeFileLogger.debug(
-            f"company: {company} | attendees: {attendees} | date: {date} | exclude_emails: {exclude_emails}"
+            f"company: {meeting_info['company']} | "
+            f"attendees: {meeting_info['attendees']} | "
+            f"date: {meeting_info['date']} | "
+            f"exclude_emails: {meeting_info['exclude_emails']}"
         )
 
-        # Context
-        ctx = Context(workflow=progress_workflow)
+        resources = request.app.state.workflow_resources
 
-        await ctx.set(
-            key=CtxKeys.MEETING_INFO.value,
-            value={
-                "company": company,
-                "attendees": attendees,
-                "exclude_emails": exclude_emails,
-            },
-        )
+        if meeting_info["date"] and not bypass_cache:
+            # Briefings prepared ahead of time by the prefetch scheduler
+            briefing = await resources.result_cache.get_briefing(
+                meeting_info, resources.mcp_pool
+            )
 
-        workflow_handler = progress_workflow.run(
-            ctx=ctx,
-            start_event=ProgressWorkflowStartEvent(
-                date=date, company=company, attendees=attendees
-            ),
-        )
+            if briefing is not None:
+                return StreamingResponse(
+                    replay_ndjson(briefing), media_type="application/json"
+                )
 
         # Async generator to yield events to the frontend
         async def event_generator():
 
-            async for event in workflow_handler.stream_events():
-
-                if isinstance(event, ProgressEvent):
-                    print(f"\n{'=' * 20}")
-                    print(f"Progress event: {event.message=}\n")
-                    yield json.dumps(
-                        {
-                            "type": "progress",
-                            "data": {
-                                "type": event.type.value,
-                                "message": event.message,
-                            },
-                        }
-                    ) + "\n"
-
-            # Yield the final result after all progress events
-            final_result = await workflow_handler
-
-            ctx.write_event_to_stream(
-                ProgressEvent(
-                    type=ProgressEventType.COMPLETED, message="sending final result"
+            streamed_payloads = []
+
+            with active_runs:
+                # Runs beyond MAX_ACTIVE_RUNS wait for a free slot
+                async with admission_controller.slot() as slot:
+                    async for queued_payload in queued_payloads(slot):
+                        yield to_ndjson(queued_payload)
+
+                    workflow_handler, ctx = await start_workflow_run(
+                        resources, meeting_info, bypass_cache=bypass_cache, verbose=True
+                    )
+
+                    disconnect_watcher = asyncio.create_task(
+                        cancel_on_disconnect(request, workflow_handler, ctx)
+                    )
+
+                    try:
+                        async for event in workflow_handler.stream_events():
+
+                            event_payload = serialize_event(event)
+
+                            if event_payload is None:
+                                continue
+
+                            if isinstance(event, ProgressEvent):
+                                timeFileLogger.debug(f"Progress event: {event.message}")
+
+                            streamed_payloads.append(event_payload)
+
+                            yield to_ndjson(event_payload)
+
+                        # Yield the final result after all progress events
+                        final_result = await workflow_handler
+
+                    except WorkflowCancelledByUser:
+                        # The client is gone, there is nobody to send the result to
+                        return
+
+                    finally:
+                        disconnect_watcher.cancel()
+
+                        # The response is closed (client disconnected)
+                        # or failed before the run ended
+                        cancel_workflow_run(workflow_handler, ctx)
+
+                ctx.write_event_to_stream(
+                    ProgressEvent(
+                        type=ProgressEventType.COMPLETED, message="sending final result"
+                    )
                 )
-            )
 
-            yield json.dumps({"type": "final", "data": final_result}) + "\n"
+                yield to_ndjson(final_payload(final_result))
+
+                await resources.result_cache.store_run(
+                    ctx, streamed_payloads, final_result
+                )
 
         return StreamingResponse(event_generator(), media_type="application/json")
 
@@ -114,6 +217,82 @@ async def run_workflow_endpoint(request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/jobs")
+async def submit_job_endpoint(request: Request):
+    """Submit a run (same body as `/api/run-workflow`),
+    identical in-flight submissions share one job"""
+
+    try:
+        payload = await request.json()
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400, detail={"message": f"Invalid JSON: {str(e)}"}
+        )
+
+    job, is_deduplicated = request.app.state.job_manager.submit(
+        meeting_info_from_payload(payload),
+        bypass_cache=bool(payload.get("bypassCache", False)),
+    )
+
+    return {**job.describe(), "deduplicated": is_deduplicated}
+
+
+@app.get("/api/jobs/{job_id}")
+async def get_job_endpoint(request: Request, job_id: str):
+    job = request.app.state.job_manager.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail={"message": "Job not found"})
+
+    return job.describe()
+
+
+@app.get("/api/jobs/{job_id}/events")
+async def stream_job_events_endpoint(request: Request, job_id: str, offset: int = 0):
+    """NDJSON event stream of the job from the offset on,
+    every line has its `offset` to re-attach from"""
+
+    job = request.app.state.job_manager.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail={"message": "Job not found"})
+
+    async def event_generator():
+        async for event_offset, event_payload in job.events(offset):
+            yield to_ndjson({**event_payload, "offset": event_offset})
+
+    return StreamingResponse(event_generator(), media_type="application/json")
+
+
+@app.delete("/api/result-cache")
+async def invalidate_result_cache_endpoint(request: Request):
+    """Invalidate the cached results of a request (same body as `/api/run-workflow`),
+    or all of them without a body"""
+
+    body = await request.body()
+    payload = json.loads(body) if body else None
+
+    meeting_info = meeting_info_from_payload(payload) if payload else None
+
+    await request.app.state.workflow_resources.result_cache.invalidate(meeting_info)
+
+    return {"invalidated": "request" if meeting_info else "all"}
+
+
+@app.get("/api/metrics")
+async def metrics_endpoint():
+    """Latency histograms (steps, LLM stages, runs), LLM call counters,
+    token and search totals and the recent run summaries"""
+
+    return {
+        "latency": latency_histograms.snapshot(),
+        "llmCalls": llm_call_metrics(),
+        "searchCache": search_cache.stats(),
+        "tokenBudget": token_budget_stats,
+        **run_metrics_registry.snapshot(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
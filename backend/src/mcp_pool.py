@@ -0,0 +1,260 @@
+import asyncio
+import os
+import shlex
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+from llama_index.core.tools import FunctionTool
+from llama_index.tools.mcp import McpToolSpec
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from src.limits import mcp_limiter
+from utils.logger import consoleLogger, timeFileLogger
+
+# project-root/google-calendar-mcp/build/index.js
+GOOGLE_CALENDAR_MCP_PATH = os.path.abspath(
+    os.path.join(
+        os.path.dirname(__file__),  # backend/src
+        os.pardir,  # → backend
+        os.pardir,  # → project-root
+        "google-calendar-mcp",
+        "build",
+        "index.js",
+    )
+)
+
+GOOGLE_CALENDAR_MCP_COMMAND = os.environ.get("GOOGLE_CALENDAR_MCP_COMMAND", "node")
+GOOGLE_CALENDAR_MCP_ARGS = shlex.split(
+    os.environ.get("GOOGLE_CALENDAR_MCP_ARGS", "")
+) or [GOOGLE_CALENDAR_MCP_PATH]
+
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", "2"))
+MCP_HEALTH_CHECK_INTERVAL_SECONDS = float(
+    os.environ.get("MCP_HEALTH_CHECK_INTERVAL_SECONDS", "30")
+)
+MCP_START_TIMEOUT_SECONDS = float(os.environ.get("MCP_START_TIMEOUT_SECONDS", "30"))
+MCP_PING_TIMEOUT_SECONDS = 5.0
+
+
+class McpSession:
+    """A long-lived MCP server subprocess with its initialized client session.
+
+    The stdio transport and the session are entered and exited
+    by a single background task,
+    as anyio requires, while the requests can be sent from any task.
+    """
+
+    def __init__(self, server_params: StdioServerParameters):
+        self.server_params = server_params
+        self.session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._stop = asyncio.Event()
+        self._error: Optional[BaseException] = None
+
+    @property
+    def is_alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+        )
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+        try:
+            await asyncio.wait_for(self._ready.wait(), MCP_START_TIMEOUT_SECONDS)
+        except BaseException:
+            # A hanging server would be orphaned, every restart attempt would leak one
+            await self._terminate()
+            raise
+
+        if not self.is_alive:
+            raise RuntimeError(f"MCP server failed to start: {self._error}")
+
+    async def _run(self) -> None:
+        try:
+            async with stdio_client(self.server_params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._stop.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def ping(self) -> bool:
+        if not self.is_alive:
+            return False
+
+        try:
+            await asyncio.wait_for(self.session.send_ping(), MCP_PING_TIMEOUT_SECONDS)
+            return True
+        except Exception:
+            return False
+
+    async def _terminate(self) -> None:
+        """Stop the background task,
+        the server subprocess is stopped when its transport exits"""
+
+        self._stop.set()
+
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            # Waits without raising the error of the task,
+            # a cancellation of the caller is raised
+            await asyncio.wait([self._task])
+
+    async def close(self) -> None:
+        self._stop.set()
+
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._task, MCP_PING_TIMEOUT_SECONDS)
+            except Exception:
+                self._task.cancel()
+
+
+class McpSessionPool:
+    """Application-scoped pool of MCP server sessions.
+
+    Sessions are started once, health-checked in the background
+    and restarted when they die.
+    The discovered tools are cached, their calls check out a session of the pool,
+    so the pool can be used as the `client` of `McpToolSpec`.
+    """
+
+    def __init__(
+        self,
+        command: str = GOOGLE_CALENDAR_MCP_COMMAND,
+        args: Optional[List[str]] = None,
+        size: int = MCP_POOL_SIZE,
+        health_check_interval_seconds: float = MCP_HEALTH_CHECK_INTERVAL_SECONDS,
+    ):
+        self.server_params = StdioServerParameters(
+            command=command, args=args or GOOGLE_CALENDAR_MCP_ARGS
+        )
+        self.size = max(1, size)
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self.tools: List[FunctionTool] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._health_check_task: Optional[asyncio.Task] = None
+
+    @property
+    def is_started(self) -> bool:
+        return self._idle is not None
+
+    async def start(self) -> None:
+        """Start the sessions and discover the tools once"""
+
+        self._idle = asyncio.Queue()
+
+        sessions = [McpSession(self.server_params) for _ in range(self.size)]
+
+        results = await asyncio.gather(
+            *[mcp_session.start() for mcp_session in sessions], return_exceptions=True
+        )
+
+        for mcp_session, result in zip(sessions, results):
+            if isinstance(result, Exception):
+                self._log_error(f"Error starting MCP session\n: {result}")
+            # Dead sessions are kept, they are restarted on checkout
+            self._idle.put_nowait(mcp_session)
+
+        self.tools = await McpToolSpec(client=self).to_tool_list_async()
+
+        self._health_check_task = asyncio.create_task(self._health_check_loop())
+
+    async def close(self) -> None:
+        if self._health_check_task is not None:
+            self._health_check_task.cancel()
+            # The session it holds is closed before the pool is drained
+            await asyncio.wait([self._health_check_task])
+            self._health_check_task = None
+
+        if self._idle is not None:
+            while not self._idle.empty():
+                await self._idle.get_nowait().close()
+            self._idle = None
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        """Check out a live session for the time of the block"""
+
+        if self._idle is None:
+            raise RuntimeError("MCP session pool is not started")
+
+        mcp_session: McpSession = await self._idle.get()
+
+        try:
+            if not mcp_session.is_alive:
+                # On failure the dead session goes back
+                # to the pool and the error is raised
+                mcp_session = await self._restart(mcp_session)
+
+            yield mcp_session.session
+        finally:
+            self._idle.put_nowait(mcp_session)
+
+    async def list_tools(self) -> Any:
+        async with self.session() as session:
+            return await session.list_tools()
+
+    async def call_tool(
+        self, tool_name: str, arguments: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        async with mcp_limiter, self.session() as session:
+            return await session.call_tool(tool_name, arguments)
+
+    async def _restart(self, mcp_session: McpSession) -> McpSession:
+        await mcp_session.close()
+
+        new_mcp_session = McpSession(self.server_params)
+        await new_mcp_session.start()
+
+        return new_mcp_session
+
+    async def _health_check_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval_seconds)
+
+            # Only the idle sessions are checked, checked out sessions are in use.
+            # One at a time, so the others stay available to the checkouts
+            for _ in range(self._idle.qsize()):
+                if self._idle.empty():
+                    break
+
+                mcp_session = self._idle.get_nowait()
+
+                try:
+                    mcp_session = await self._check(mcp_session)
+                except asyncio.CancelledError:
+                    # The pool is closing, the held session
+                    # would never be closed otherwise
+                    await mcp_session.close()
+                    raise
+
+                self._idle.put_nowait(mcp_session)
+
+    async def _check(self, mcp_session: McpSession) -> McpSession:
+        """The session if it answers the ping, a restarted one otherwise"""
+
+        if await mcp_session.ping():
+            return mcp_session
+
+        try:
+            mcp_session = await self._restart(mcp_session)
+            timeFileLogger.info("Restarted dead MCP session")
+        except Exception as e:
+            # Keep the dead session in the pool, the next checkout tries again
+            self._log_error(f"Error restarting MCP session\n: {e}")
+
+        return mcp_session
+
+    @staticmethod
+    def _log_error(exception_text: str) -> None:
+        consoleLogger.error(exception_text)
+        timeFileLogger.error(exception_text)
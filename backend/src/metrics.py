@@ -0,0 +1,83 @@
+import bisect
+import os
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+# Latency recorded per metric for the percentiles, older samples are forgotten
+LATENCY_SAMPLE_SIZE = int(os.environ.get("LATENCY_SAMPLE_SIZE", "1000"))
+
+# Upper bounds (seconds) of the histogram buckets, the last bucket has no bound
+LATENCY_BUCKETS: Tuple[float, ...] = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts of all the observations, percentiles of the recent ones"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self._samples: Deque[float] = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    def observe(self, seconds: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self._samples.append(seconds)
+
+    @property
+    def sample_count(self) -> int:
+        return len(self._samples)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._samples:
+            return None
+
+        samples = sorted(self._samples)
+
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative_count = 0
+        buckets = {}
+
+        for bound, bucket_count in zip(
+            [*map(str, self.buckets), "+Inf"], self.bucket_counts
+        ):
+            cumulative_count += bucket_count
+            buckets[bound] = cumulative_count
+
+        return {
+            "count": self.count,
+            "sum": round(self.total_seconds, 4),
+            "buckets": buckets,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class LatencyHistograms:
+    """Latency histograms of the process by metric name"""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+
+    def get(self, name: str) -> LatencyHistogram:
+        if name not in self._histograms:
+            self._histograms[name] = LatencyHistogram()
+
+        return self._histograms[name]
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.get(name).observe(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: histogram.snapshot()
+            for name, histogram in sorted(self._histograms.items())
+        }
+
+
+latency_histograms = LatencyHistograms()
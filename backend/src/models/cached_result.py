@@ -0,0 +1,16 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class CachedResult(BaseModel):
+    events: List[Dict[str, Any]] = Field(
+        default_factory=list,
+        description="Stream payloads of the run to replay, in their original order",
+    )
+    final: str = Field(
+        description="Final markdown document of the run",
+    )
+    calendar_fingerprint: Optional[str] = Field(
+        default=None,
+        description="Fingerprint of the raw calendar data of a prefetched briefing",
+    )
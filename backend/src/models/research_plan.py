@@ -0,0 +1,34 @@
+from typing import Dict, List
+from pydantic import BaseModel, Field
+from src.models.attendee import Attendee
+
+
+class CompanyResearchItem(BaseModel):
+    company: str = Field(
+        description="Company to research",
+    )
+    meetings: List[str] = Field(
+        default_factory=list,
+        description="Title and time of the meetings with the company, "
+        "to focus the research",
+    )
+
+
+class AttendeeResearchItem(BaseModel):
+    company: str = Field(
+        description="Company the attendee is meeting us from",
+    )
+    attendee: Attendee = Field(
+        description="Attendee to research",
+    )
+
+
+class ResearchPlan(BaseModel):
+    companies: Dict[str, CompanyResearchItem] = Field(
+        default_factory=dict,
+        description="Unique companies to research, keyed by normalized company name",
+    )
+    attendees: Dict[str, AttendeeResearchItem] = Field(
+        default_factory=dict,
+        description="Unique attendees to research, keyed by normalized email",
+    )
@@ -0,0 +1,9 @@
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class SearchQueryPlan(BaseModel):
+    queries: List[str] = Field(
+        default_factory=list,
+        description="Web search queries covering everything the research task asks for",
+    )
@@ -0,0 +1,126 @@
+import asyncio
+import os
+from typing import Any, List, Optional
+from llama_index.core.llms import LLM
+from llama_index.core.program import LLMTextCompletionProgram
+from llama_index.core.prompts import RichPromptTemplate
+from llama_index.core.schema import Document
+from llama_index.core.tools import BaseTool
+from src.enums import LlmStage
+from src.llm_calls import call_llm
+from src.models.search_query_plan import SearchQueryPlan
+from src.prompts import (
+    RESEARCH_QUERY_PLAN_PROMPT_TEMPLATE,
+    RESEARCH_SYNTHESIS_PROMPT_TEMPLATE,
+)
+from utils.logger import consoleLogger, timeFileLogger
+
+# Maximum number of web searches planned for a single company or attendee
+PLANNED_RESEARCH_MAX_QUERIES = int(os.environ.get("PLANNED_RESEARCH_MAX_QUERIES", "4"))
+
+SEARCH_WEB_TOOL_NAME = "search_web"
+
+
+def format_search_results(query: str, raw_output: Any) -> str:
+    """Search results of a query as text for the synthesis prompt"""
+
+    if isinstance(raw_output, list):
+        results = [
+            f"- {item.extra_info.get('url')}\n  {item.text}"
+            if isinstance(item, Document)
+            else f"- {item}"
+            for item in raw_output
+        ]
+        body = "\n".join(results) or "No results found."
+    else:
+        body = str(raw_output)
+
+    return f"### {query}\n{body}"
+
+
+class PlannedResearchEngine:
+    """Researches a company or an attendee with two LLM calls instead of a ReAct loop.
+
+    The first call plans the web searches of the research task,
+    the searches run in parallel, the second call writes the research from their results.
+    """
+
+    def __init__(
+        self,
+        model: LLM,
+        tools: List[BaseTool],
+        max_queries: int = PLANNED_RESEARCH_MAX_QUERIES,
+    ):
+        self.model = model
+        self.search_tool = self._find_search_tool(tools)
+        self.max_queries = max(1, max_queries)
+
+    @staticmethod
+    def _find_search_tool(tools: List[BaseTool]) -> Optional[BaseTool]:
+        return next(
+            (tool for tool in tools if tool.metadata.name == SEARCH_WEB_TOOL_NAME),
+            None,
+        )
+
+    async def _plan_queries(self, research_task: str) -> List[str]:
+        prompt = RichPromptTemplate(RESEARCH_QUERY_PLAN_PROMPT_TEMPLATE).format(
+            research_task=research_task, max_queries=self.max_queries
+        )
+
+        program = LLMTextCompletionProgram.from_defaults(
+            output_cls=SearchQueryPlan,
+            llm=self.model,
+            prompt_template_str=prompt,
+        )
+
+        query_plan: SearchQueryPlan = await call_llm(
+            LlmStage.RESEARCH_PLAN, program.acall
+        )
+
+        # The same query planned twice is searched once
+        queries = list(dict.fromkeys(query.strip() for query in query_plan.queries))
+
+        return [query for query in queries if query][: self.max_queries]
+
+    async def _search(self, query: str) -> Optional[str]:
+        try:
+            tool_output = await self.search_tool.acall(query=query)
+        except Exception as e:
+            # The research is written from the searches that succeeded
+            exception_text = f"Error searching the web for {query!r}\n: {e}"
+            consoleLogger.error(exception_text)
+            timeFileLogger.error(exception_text)
+            return None
+
+        return format_search_results(query, tool_output.raw_output)
+
+    async def research(self, research_task: str) -> str:
+        """Run the research task (a company or attendee research prompt)"""
+
+        if self.search_tool is None:
+            raise ValueError(
+                f"The planned research needs the {SEARCH_WEB_TOOL_NAME} tool"
+            )
+
+        queries = await self._plan_queries(research_task)
+
+        timeFileLogger.debug(f"planned research queries: {queries}")
+
+        search_results = [
+            result
+            for result in await asyncio.gather(
+                *(self._search(query) for query in queries)
+            )
+            if result is not None
+        ]
+
+        prompt = RichPromptTemplate(RESEARCH_SYNTHESIS_PROMPT_TEMPLATE).format(
+            research_task=research_task,
+            search_results="\n\n".join(search_results) or "No results found.",
+        )
+
+        response = await call_llm(
+            LlmStage.RESEARCH_SYNTHESIS, lambda: self.model.acomplete(prompt)
+        )
+
+        return response.text
@@ -0,0 +1,163 @@
+import asyncio
+import contextlib
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from src.resources import WorkflowResources
+from src.runner import (
+    ActiveRuns,
+    active_runs,
+    meeting_info_from_payload,
+    run_to_completion,
+)
+from utils.logger import consoleLogger, timeFileLogger
+
+PREFETCH_ENABLED = os.environ.get("PREFETCH_ENABLED", "false").lower() == "true"
+# Local hour of the day the briefings of the upcoming days are prepared at
+PREFETCH_HOUR = int(os.environ.get("PREFETCH_HOUR", "20"))
+PREFETCH_DAYS_AHEAD = int(os.environ.get("PREFETCH_DAYS_AHEAD", "1"))
+PREFETCH_CONCURRENCY = int(os.environ.get("PREFETCH_CONCURRENCY", "1"))
+# Minimum pause between two prefetch runs,
+# so prefetching does not burst the LLM and Tavily quotas
+PREFETCH_MIN_INTERVAL_SECONDS = float(
+    os.environ.get("PREFETCH_MIN_INTERVAL_SECONDS", "60")
+)
+# A prefetch run only starts while fewer interactive runs are in progress
+PREFETCH_MAX_ACTIVE_RUNS = int(os.environ.get("PREFETCH_MAX_ACTIVE_RUNS", "1"))
+PREFETCH_EXCLUDE_EMAILS = os.environ.get(
+    "PREFETCH_EXCLUDE_EMAILS", os.environ.get("EXCLUDE_EMAILS", "")
+)
+
+IDLE_POLL_SECONDS = 5.0
+
+
+class PrefetchScheduler:
+    """Prepares the briefings of the upcoming days ahead of time.
+
+    Every day at `hour` the date path of the workflow runs for the next `days_ahead` days.
+    The runs warm the research and result caches and store the finished briefings,
+    so interactive requests for these dates are served right away.
+    Prefetching yields to interactive runs and is paced by `min_interval_seconds`.
+    """
+
+    def __init__(
+        self,
+        resources: WorkflowResources,
+        hour: int = PREFETCH_HOUR,
+        days_ahead: int = PREFETCH_DAYS_AHEAD,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        min_interval_seconds: float = PREFETCH_MIN_INTERVAL_SECONDS,
+        max_active_runs: int = PREFETCH_MAX_ACTIVE_RUNS,
+        exclude_emails: List[str] | None = None,
+        interactive_runs: ActiveRuns = active_runs,
+    ):
+        self.resources = resources
+        self.hour = hour
+        self.days_ahead = days_ahead
+        self.min_interval_seconds = min_interval_seconds
+        self.max_active_runs = max_active_runs
+        self.exclude_emails = exclude_emails or [
+            email for email in re.split(r"[,\s]\s*", PREFETCH_EXCLUDE_EMAILS) if email
+        ]
+        self.interactive_runs = interactive_runs
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._pace_lock = asyncio.Lock()
+        self._last_run_started_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Cancel the prefetch loop and wait for its runs to stop,
+        before the resources they use are closed"""
+
+        if self._task is None:
+            return
+
+        self._task.cancel()
+
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+
+        self._task = None
+
+    def seconds_until_next_run(self, now: datetime) -> float:
+        next_run = now.replace(hour=self.hour, minute=0, second=0, microsecond=0)
+
+        if next_run <= now:
+            next_run += timedelta(days=1)
+
+        return (next_run - now).total_seconds()
+
+    def upcoming_dates(self, today: date) -> List[str]:
+        return [
+            (today + timedelta(days=offset)).isoformat()
+            for offset in range(1, self.days_ahead + 1)
+        ]
+
+    async def run_once(self) -> None:
+        """Prepare the briefings of all the upcoming dates"""
+
+        await asyncio.gather(
+            *[
+                self._prefetch_date(meeting_date)
+                for meeting_date in self.upcoming_dates(date.today())
+            ]
+        )
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.seconds_until_next_run(datetime.now()))
+
+            try:
+                await self.run_once()
+            except Exception as e:
+                self._log_error(f"Error running prefetch\n: {e}")
+
+    async def _prefetch_date(self, meeting_date: str) -> None:
+        # Same derivation as the interactive requests, so the briefing keys match
+        meeting_info = meeting_info_from_payload(
+            {"date": meeting_date, "excludeEmails": self.exclude_emails}
+        )
+
+        async with self._semaphore:
+            await self._wait_for_turn()
+
+            try:
+                # The fresh calendar is always researched, the caches make it cheap
+                payloads, final_result, fingerprint = await run_to_completion(
+                    self.resources, meeting_info, bypass_cache=True
+                )
+
+                await self.resources.result_cache.set_briefing(
+                    meeting_info, payloads, final_result, fingerprint
+                )
+
+                timeFileLogger.info(f"Prefetched briefing for {meeting_date}")
+
+            except Exception as e:
+                self._log_error(f"Error prefetching briefing for {meeting_date}\n: {e}")
+
+    async def _wait_for_turn(self) -> None:
+        """Wait until interactive runs leave room and the pace allows another run"""
+
+        async with self._pace_lock:
+            while self.interactive_runs.count >= self.max_active_runs:
+                await asyncio.sleep(IDLE_POLL_SECONDS)
+
+            loop = asyncio.get_running_loop()
+            wait_seconds = (
+                self._last_run_started_at + self.min_interval_seconds - loop.time()
+            )
+
+            if wait_seconds > 0:
+                await asyncio.sleep(wait_seconds)
+
+            self._last_run_started_at = loop.time()
+
+    @staticmethod
+    def _log_error(exception_text: str) -> None:
+        consoleLogger.error(exception_text)
+        timeFileLogger.error(exception_text)
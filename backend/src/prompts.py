@@ -85,7 +85,10 @@ RESEARCH_COMPANY_PROMPT_TEMPLATE = """Your goal is to help me prepare for an upc
 
             4. If you are unable to find information about the company, clearly state which information was not found and suggest possible reasons or alternative approaches.
 
-            Include the meeting time and date in the summary if available.
+            Use the titles of the meetings with the company
+            to focus the research on what is relevant to them.
+            Do not include the meeting times in the summary,
+            they are added to the meeting brief separately.
             Do not include anything else in the output besides the requested summaries and links.
             
             Do this for the following meeting:
@@ -113,6 +116,9 @@ RESEARCH_ATTENDEES_PROMPT_TEMPLATE = """Your goal is to help me prepare for an u
             2. Summarize your findings concisely.
             - First, make sure that you have found information about all attendees of the meeting and the number of attendees is equal to the found information. If not go to the previous step and try to find the missing profiles. If there are 5 attendees in the meeting information, you should find profiles for all 5 of them.
             - For each attendee, provide a brief summary of their profile information and include the link to their profile (e.g. LinkedIn).
+            - Start the summary of each attendee with a line containing only "Attendee: "
+              followed by their email from the meeting information
+              (their name when there is no email).
             - Ensure the summary is clear and directly relevant to the meeting preparation.
 
             4. If you are unable to find the profile of any attendee, clearly state which information was not found and suggest possible reasons or alternative approaches.
@@ -156,3 +162,71 @@ FORMAT_RESPONSE_PROMPT_TEMPLATE = """You are a meeting preparation assistant. Gi
         **Inputs:**
         - Research Results: {{research_results}}
 """
+
+
+FORMAT_MEETING_PROMPT_TEMPLATE = """You are a meeting preparation assistant.
+        Given the research results about the company and the attendees of a meeting,
+        your task is to create a well-structured markdown section
+        to prepare your colleagues for this meeting.
+        Do not include any irrelevant information.
+
+        Create the section with the following subsections:
+
+        - ## [Meeting Title or Company Name] at [Time, if available]
+
+        - ### Meeting Context
+        - **Purpose:** [brief description of the meeting's purpose, if available]
+        - **Background:** [any relevant background information about the meeting or the relationship with the company, if available]
+
+        - ### Company Information
+        - [key facts about the company, such as industry, main product, size, recent news, etc., from the research results]
+
+        - ### Attendees
+        - #### [Attendee Name]
+            - **Role:** [their role or position, from the research results]
+            - **Relevant Information:** [any other relevant details, such as their interests, previous interactions, etc., from the research results]
+        - [Repeat for each attendee]
+
+        **Formatting Instructions:**
+        - Use proper markdown formatting:
+        - Use **bold** for headings and key terms.
+        - Use *italics* for emphasis.
+        - Use bullet points for lists of facts or information.
+        - Include inline citations as Markdown hyperlinks, e.g., [source](link), for any information from the research results.
+        - If certain information is not available, omit that subsection or provide a note, e.g., 'No information available.'
+        - Output only the section of this meeting, no introduction or closing text.
+
+        **Inputs:**
+        - Research Results: {{research_results}}
+"""
+
+
+RESEARCH_QUERY_PLAN_PROMPT_TEMPLATE = """You are planning the web searches
+        of a research task.
+        The searches run in parallel and you will not see their results,
+        so plan all of them now.
+
+        Write at most {{max_queries}} web search queries
+        that together cover everything the research task asks for.
+        - Every query must be specific: include the full name of the company or person,
+          and the company the person works for.
+        - Do not write two queries that would return the same results.
+
+        **Research Task:**
+        {{research_task}}
+"""
+
+RESEARCH_SYNTHESIS_PROMPT_TEMPLATE = """You are a research assistant.
+        Complete the research task using only the web search results below.
+
+        - Follow the output instructions of the research task.
+        - Include the links of the sources as Markdown hyperlinks, e.g., [source](link).
+        - If the search results do not contain some of the requested information,
+          clearly state which information was not found.
+
+        **Research Task:**
+        {{research_task}}
+
+        **Web Search Results:**
+        {{search_results}}
+"""
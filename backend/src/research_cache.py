@@ -0,0 +1,98 @@
+import os
+from typing import Optional
+from src.cache_store import SqliteCacheStore, cache_dir
+from src.research_planner import normalize_company
+from src.run_metrics import record_research_cache_lookup
+from utils.logger import consoleLogger, timeFileLogger
+
+RESEARCH_CACHE_ENABLED = (
+    os.environ.get("RESEARCH_CACHE_ENABLED", "true").lower() == "true"
+)
+RESEARCH_CACHE_PATH = os.environ.get(
+    "RESEARCH_CACHE_PATH", os.path.join(cache_dir, "research_cache.db")
+)
+RESEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("RESEARCH_CACHE_MAX_ENTRIES", "2000"))
+# Companies change slower than people's roles, but news about them gets stale sooner
+RESEARCH_CACHE_COMPANY_TTL_SECONDS = float(
+    os.environ.get("RESEARCH_CACHE_COMPANY_TTL_SECONDS", str(3 * 24 * 60 * 60))
+)
+RESEARCH_CACHE_ATTENDEE_TTL_SECONDS = float(
+    os.environ.get("RESEARCH_CACHE_ATTENDEE_TTL_SECONDS", str(14 * 24 * 60 * 60))
+)
+
+
+class ResearchCache:
+    """Research results of companies and attendees, shared between workflow runs.
+
+    Cache failures are logged and treated as misses, they never fail the research.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SqliteCacheStore] = None,
+        company_ttl_seconds: float = RESEARCH_CACHE_COMPANY_TTL_SECONDS,
+        attendee_ttl_seconds: float = RESEARCH_CACHE_ATTENDEE_TTL_SECONDS,
+        enabled: bool = RESEARCH_CACHE_ENABLED,
+    ):
+        self.store = store or SqliteCacheStore(
+            path=RESEARCH_CACHE_PATH,
+            table="research",
+            max_entries=RESEARCH_CACHE_MAX_ENTRIES,
+        )
+        self.company_ttl_seconds = company_ttl_seconds
+        self.attendee_ttl_seconds = attendee_ttl_seconds
+        self.enabled = enabled
+
+    @staticmethod
+    def company_key(company: str) -> str:
+        return f"company:{normalize_company(company)}"
+
+    @staticmethod
+    def attendee_key(email: str) -> str:
+        return f"attendee:{email.strip().casefold()}"
+
+    async def get_company(self, company: str) -> Optional[str]:
+        return await self._get(self.company_key(company))
+
+    async def set_company(self, company: str, research: str) -> None:
+        await self._set(self.company_key(company), research, self.company_ttl_seconds)
+
+    async def get_attendee(self, email: str) -> Optional[str]:
+        return await self._get(self.attendee_key(email))
+
+    async def set_attendee(self, email: str, research: str) -> None:
+        await self._set(self.attendee_key(email), research, self.attendee_ttl_seconds)
+
+    async def close(self) -> None:
+        await self.store.close()
+
+    async def _get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+
+        try:
+            research = await self.store.get(key)
+        except Exception as e:
+            exception_text = f"Error reading research cache for {key}\n: {e}"
+            consoleLogger.error(exception_text)
+            timeFileLogger.error(exception_text)
+            research = None
+
+        record_research_cache_lookup(research is not None)
+
+        return research
+
+    async def _set(self, key: str, research: str, ttl_seconds: float) -> None:
+        if not self.enabled or not research:
+            return
+
+        try:
+            await self.store.set(key, research, ttl_seconds)
+        except Exception as e:
+            exception_text = f"Error writing research cache for {key}\n: {e}"
+            consoleLogger.error(exception_text)
+            timeFileLogger.error(exception_text)
+
+
+# Shared by all the workflow runs of the process
+research_cache = ResearchCache()
@@ -0,0 +1,126 @@
+import re
+from typing import Dict, List, Optional
+from src.models.attendee import Attendee
+from src.models.meeting import Meeting
+from src.models.research_plan import (
+    AttendeeResearchItem,
+    CompanyResearchItem,
+    ResearchPlan,
+)
+
+
+def normalize_company(company: str) -> str:
+    """Normalize a company name, so "ACME  Corp" and "acme corp" are the same entity"""
+    return " ".join((company or "").casefold().split())
+
+
+def attendee_key(attendee: Attendee) -> str:
+    """Identify an attendee by email, or by name when the email is missing"""
+    return (attendee.email or attendee.name or "").strip().casefold()
+
+
+def meeting_from_request(company: Optional[str], attendees: List[str]) -> Meeting:
+    """The meeting of a request with a company and attendee emails instead of a date"""
+
+    translates = str.maketrans({"_": " ", "-": " "})
+
+    attendees_list = [
+        {
+            "name": re.split(r"@", item)[0].translate(translates),
+            "email": item,
+        }
+        for item in attendees or []
+    ]
+
+    return Meeting(
+        title=f"Meeting with ${company}",
+        meeting_time="UNKNOWN",
+        attendees=attendees_list,
+        company=company or "",
+    )
+
+
+def build_research_plan(meetings: List[Meeting]) -> ResearchPlan:
+    """Collect the unique companies and attendees across all the meetings"""
+
+    plan = ResearchPlan()
+
+    for meeting in meetings:
+        company_item = plan.companies.setdefault(
+            normalize_company(meeting.company),
+            CompanyResearchItem(company=meeting.company),
+        )
+        company_item.meetings.append(f"{meeting.title} at {meeting.meeting_time}")
+
+        for attendee in meeting.attendees:
+            plan.attendees.setdefault(
+                attendee_key(attendee),
+                AttendeeResearchItem(company=meeting.company, attendee=attendee),
+            )
+
+    return plan
+
+
+def assemble_meeting_brief(
+    meeting: Meeting,
+    companies_research: Dict[str, str],
+    attendees_research: Dict[str, str],
+) -> str:
+    """Put the research of a meeting back together from the shared entity results"""
+
+    attendees_briefs = [
+        attendees_research[attendee_key(attendee)]
+        for attendee in meeting.attendees
+        if attendee_key(attendee) in attendees_research
+    ]
+
+    return "\n".join(
+        [
+            f"Meeting: {meeting.title} at {meeting.meeting_time}",
+            f"Company: {meeting.company}",
+            companies_research.get(normalize_company(meeting.company), ""),
+            "Attendees:",
+            *attendees_briefs,
+        ]
+    )
+
+
+def attendee_marker(attendee: Attendee) -> str:
+    """What starts the research of the attendee in a research of several attendees"""
+    return f"Attendee: {attendee.email or attendee.name}"
+
+
+def split_attendees_research(
+    response: str, research_items: Dict[str, AttendeeResearchItem]
+) -> Dict[str, str]:
+    """Split the research of several attendees by their markers, see `attendee_marker`.
+
+    Only the attendees whose marker is found are returned.
+    """
+
+    if len(research_items) == 1:
+        return {key: response for key in research_items}
+
+    starts = {}
+
+    for key, research_item in research_items.items():
+        # The agent may turn the marker into a heading or put it in bold,
+        # the marker of "a@x.co" must not match "a@x.com" or "a@x.co.uk"
+        marker = re.search(
+            r"^[#*\s]*"
+            + re.escape(attendee_marker(research_item.attendee))
+            + r"(?![\w@-]|\.[\w-])",
+            response,
+            re.MULTILINE | re.IGNORECASE,
+        )
+
+        if marker:
+            starts[key] = marker.start()
+
+    ordered_keys = sorted(starts, key=starts.get)
+    ends = [starts[key] for key in ordered_keys[1:]] + [len(response)]
+
+    return {
+        key: response[starts[key] : end].strip()
+        for key, end in zip(ordered_keys, ends)
+    }
@@ -0,0 +1,89 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, List
+
+
+class ResearchSession:
+    """Company and attendee research tasks of a single run, by entity key.
+
+    The speculative research (started before the calendar is loaded)
+    and the planned research share it,
+    so an entity is researched at most once per run.
+    """
+
+    def __init__(self):
+        self.company_tasks: Dict[str, asyncio.Task] = {}
+        self.attendee_tasks: Dict[str, asyncio.Task] = {}
+
+    def company_task(
+        self, key: str, research: Callable[[], Awaitable[str]]
+    ) -> asyncio.Task:
+        if key not in self.company_tasks:
+            self.company_tasks[key] = asyncio.create_task(research())
+
+        return self.company_tasks[key]
+
+    def attendee_tasks_batch(
+        self,
+        keys: Iterable[str],
+        research: Callable[[List[str]], Awaitable[Dict[str, str]]],
+    ) -> None:
+        """Research the attendees not researched yet with a single research,
+        every attendee still gets its own task,
+        the research is cancelled once all of them are"""
+
+        pending_keys = [
+            key for key in dict.fromkeys(keys) if key not in self.attendee_tasks
+        ]
+
+        if not pending_keys:
+            return
+
+        batch_task = asyncio.create_task(research(pending_keys))
+        running_keys = set(pending_keys)
+
+        async def attendee_research(key: str) -> str:
+            # Shielded, one cancelled attendee does not cancel the research of the others
+            return (await asyncio.shield(batch_task))[key]
+
+        def release(key: str) -> None:
+            running_keys.discard(key)
+
+            if not running_keys and not batch_task.done():
+                batch_task.cancel()
+
+        for key in pending_keys:
+            task = asyncio.create_task(attendee_research(key))
+            task.add_done_callback(lambda _, key=key: release(key))
+
+            self.attendee_tasks[key] = task
+
+    def cancel_unneeded(
+        self, company_keys: Iterable[str], attendee_keys: Iterable[str]
+    ) -> int:
+        """Cancel and forget the research of the entities that are not needed,
+        returns their number"""
+
+        cancelled = 0
+
+        for tasks, needed_keys in (
+            (self.company_tasks, set(company_keys)),
+            (self.attendee_tasks, set(attendee_keys)),
+        ):
+            for key in [key for key in tasks if key not in needed_keys]:
+                tasks.pop(key).cancel()
+                cancelled += 1
+
+        return cancelled
+
+    def cancel_all(self) -> int:
+        """Cancel and forget all the research,
+        returns the number of tasks that were still running"""
+
+        running = sum(
+            not task.done()
+            for task in [*self.company_tasks.values(), *self.attendee_tasks.values()]
+        )
+
+        self.cancel_unneeded([], [])
+
+        return running
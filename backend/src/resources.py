@@ -0,0 +1,115 @@
+import os
+from typing import List, Optional
+from dotenv import load_dotenv
+from azure.identity import DefaultAzureCredential, get_bearer_token_provider
+from llama_index.core import set_global_handler
+from llama_index.core.agent.workflow import ReActAgent
+from llama_index.core.llms import LLM
+from llama_index.core.tools import BaseTool
+from src.llm import LimitedAzureOpenAI
+from src.mcp_pool import McpSessionPool
+from src.research_cache import ResearchCache, research_cache
+from src.result_cache import ResultCache, result_cache
+from src.tools import search_web_tool
+
+# Load environment variables
+load_dotenv()
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "true").lower() == "true"
+
+_is_tracing_configured = False
+
+
+def configure_tracing() -> None:
+    """Set the Phoenix tracing handler once per process,
+    every call would add another handler"""
+
+    global _is_tracing_configured
+
+    if _is_tracing_configured or not TRACING_ENABLED:
+        return
+
+    phoenix_api_key = os.environ.get("PHOENIX_API_KEY", "")
+    os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"api_key={phoenix_api_key}"
+    set_global_handler("arize_phoenix", endpoint="https://llamatrace.com/v1/traces")
+
+    _is_tracing_configured = True
+
+
+def create_model() -> LimitedAzureOpenAI:
+    """Azure OpenAI client authenticated with Azure AD,
+    its token is cached and refreshed by the credential"""
+
+    credential = DefaultAzureCredential()
+
+    token_provider = get_bearer_token_provider(
+        credential, "https://cognitiveservices.azure.com/.default"
+    )
+
+    azure_endpoint = os.environ.get("AZURE_ENDPOINT", "")
+    azure_open_ai_api_version = os.environ.get("AZURE_OPEN_AI_API_VERSION", "")
+    open_ai_model = os.environ.get("OPEN_AI_MODEL", "")
+
+    return LimitedAzureOpenAI(
+        azure_endpoint=azure_endpoint,
+        engine=open_ai_model,
+        api_version=azure_open_ai_api_version,
+        model=open_ai_model,
+        azure_ad_token_provider=token_provider,
+        use_azure_ad=True,
+        # Every request is retried by `LimitedLLM` within the deadline of its stage
+        max_retries=0,
+    )
+
+
+def create_mcp_agent(tools: List[BaseTool], model: LLM) -> ReActAgent:
+    return ReActAgent(
+        name="MCP Agent",
+        description="Agent using MCP tools.",
+        tools=tools,
+        llm=model,
+        system_prompt="You are an AI assistant with access to MCP tools.",
+    )
+
+
+class WorkflowResources:
+    """Heavy resources shared by all the `ProgressWorkflow` runs of the process.
+
+    They hold no per-run state (it lives in the workflow `Context`),
+    every agent `run()` gets its own context,
+    so they are safe to share between concurrent runs.
+    """
+
+    def __init__(
+        self,
+        model: LLM,
+        tools: Optional[List[BaseTool]] = None,
+        mcp_pool: Optional[McpSessionPool] = None,
+        research_cache: ResearchCache = research_cache,
+        result_cache: ResultCache = result_cache,
+    ):
+        self.model = model
+        self.tools = tools or [search_web_tool]
+        self.research_cache = research_cache
+        self.result_cache = result_cache
+
+        self.agent = ReActAgent(
+            name="searchAgent",
+            description="Searches the web for the given query and returns the result.",
+            tools=self.tools,
+            llm=self.model,
+        )
+
+        # Application-scoped Google Calendar MCP sessions,
+        # without them a new MCP server is spawned for every calendar request
+        self.mcp_pool = mcp_pool
+        self.mcp_agent: Optional[ReActAgent] = None
+
+        if mcp_pool is not None and mcp_pool.tools:
+            self.mcp_agent = create_mcp_agent(mcp_pool.tools, self.model)
+
+    @classmethod
+    def from_env(cls, mcp_pool: Optional[McpSessionPool] = None) -> "WorkflowResources":
+        configure_tracing()
+
+        return cls(model=create_model(), mcp_pool=mcp_pool)
@@ -0,0 +1,256 @@
+import hashlib
+import json
+import os
+import re
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from llama_index.core.workflow import Context
+from src.cache_store import SqliteCacheStore, cache_dir
+from src.enums import CtxKeys, ProgressEventType, StreamEventType
+from src.mcp_pool import McpSessionPool
+from src.models.cached_result import CachedResult
+from src.calendar_fetch import list_calendar_events, parse_calendar_events
+from src.research_planner import normalize_company
+from utils.logger import consoleLogger, timeFileLogger
+
+RESULT_CACHE_ENABLED = os.environ.get("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_PATH = os.environ.get(
+    "RESULT_CACHE_PATH", os.path.join(cache_dir, "result_cache.db")
+)
+RESULT_CACHE_MAX_ENTRIES = int(os.environ.get("RESULT_CACHE_MAX_ENTRIES", "500"))
+RESULT_CACHE_TTL_SECONDS = float(
+    os.environ.get("RESULT_CACHE_TTL_SECONDS", str(12 * 60 * 60))
+)
+
+# Progress of the steps before the research is streamed live on a cache hit as well
+REPLAYED_PROGRESS_TYPES = {
+    ProgressEventType.RESEARCH.value,
+    ProgressEventType.PROCESSING.value,
+    ProgressEventType.FORMATTING.value,
+}
+REPLAYED_STREAM_TYPES = {StreamEventType.DELTA.value, StreamEventType.SECTION.value}
+
+
+def _normalize_emails(emails: Any) -> List[str]:
+    if isinstance(emails, str):
+        emails = re.split(r"[,\s]\s*", emails)
+
+    return sorted({email.strip().casefold() for email in emails or [] if email})
+
+
+def request_key(meeting_info: Dict[str, Any]) -> str:
+    """Hash of the normalized request, the same for every equivalent request"""
+
+    normalized_request = {
+        "date": meeting_info.get("date") or None,
+        "company": normalize_company(meeting_info.get("company") or ""),
+        "attendees": _normalize_emails(meeting_info.get("attendees")),
+        "exclude_emails": _normalize_emails(meeting_info.get("exclude_emails")),
+    }
+
+    return hashlib.sha256(
+        json.dumps(normalized_request, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def _event_fingerprint(event: Dict[str, Any]) -> str:
+    version = event.get("updated") or event.get("etag")
+
+    # Every edit of a Google Calendar event bumps its `updated` timestamp and `etag`
+    if event.get("id") and version:
+        return json.dumps([event["id"], version])
+
+    return json.dumps(event, sort_keys=True)
+
+
+def calendar_fingerprint(calendar_data: Optional[str]) -> str:
+    """Hash of the raw calendar data (the list events tool result).
+
+    An edited calendar changes it.
+    Structured events are identified by their id and last update, whatever their order,
+    an unstructured result by its text.
+    """
+
+    events = parse_calendar_events(calendar_data) if calendar_data else None
+
+    if events is None:
+        material = " ".join((calendar_data or "").split())
+    else:
+        material = json.dumps(sorted(_event_fingerprint(event) for event in events))
+
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+def seconds_until_end_of_date(meeting_date: str, now: datetime) -> float:
+    """Time left until the local midnight ending the date"""
+
+    end_of_date = datetime.combine(
+        date.fromisoformat(meeting_date) + timedelta(days=1), datetime.min.time()
+    )
+
+    return (end_of_date - now).total_seconds()
+
+
+def result_key(meeting_info: Dict[str, Any], fingerprint: str) -> str:
+    return f"{request_key(meeting_info)}:{fingerprint}"
+
+
+def briefing_key(meeting_info: Dict[str, Any]) -> str:
+    return f"briefing:{request_key(meeting_info)}"
+
+
+def is_replayed(payload: Dict[str, Any]) -> bool:
+    if payload.get("type") == StreamEventType.PROGRESS.value:
+        return payload.get("data", {}).get("type") in REPLAYED_PROGRESS_TYPES
+
+    return payload.get("type") in REPLAYED_STREAM_TYPES
+
+
+class ResultCache:
+    """Complete workflow results, content-addressed by the request and the calendar data.
+
+    Cache failures are logged and treated as misses, they never fail the run.
+    """
+
+    def __init__(
+        self,
+        store: Optional[SqliteCacheStore] = None,
+        ttl_seconds: float = RESULT_CACHE_TTL_SECONDS,
+        enabled: bool = RESULT_CACHE_ENABLED,
+    ):
+        self.store = store or SqliteCacheStore(
+            path=RESULT_CACHE_PATH,
+            table="results",
+            max_entries=RESULT_CACHE_MAX_ENTRIES,
+        )
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+
+    async def get(self, key: str) -> Optional[CachedResult]:
+        if not self.enabled:
+            return None
+
+        try:
+            value = await self.store.get(key)
+            return CachedResult.model_validate_json(value) if value else None
+        except Exception as e:
+            self._log_error(f"Error reading result cache for {key}\n: {e}")
+            return None
+
+    async def set(self, key: str, payloads: List[Dict[str, Any]], final: str) -> None:
+        """Store the final document with the stream payloads worth replaying"""
+        await self._set(key, payloads, final, self.ttl_seconds)
+
+    async def get_briefing(
+        self, meeting_info: Dict[str, Any], mcp_pool: Optional[McpSessionPool] = None
+    ) -> Optional[CachedResult]:
+        """Briefing prepared ahead of time for the request, see `PrefetchScheduler`.
+
+        The calendar events are listed directly (no LLM),
+        a briefing of an edited calendar is dropped.
+        """
+
+        key = briefing_key(meeting_info)
+        briefing = await self.get(key)
+
+        if briefing is None:
+            return None
+
+        try:
+            fingerprint = calendar_fingerprint(
+                await list_calendar_events(meeting_info["date"], mcp_pool)
+            )
+        except Exception as e:
+            self._log_error(f"Error checking the calendar of briefing {key}\n: {e}")
+            return None
+
+        if fingerprint != briefing.calendar_fingerprint:
+            timeFileLogger.info(f"Calendar changed since briefing {key} was prepared")
+            await self.store.delete(key)
+            return None
+
+        return briefing
+
+    async def set_briefing(
+        self,
+        meeting_info: Dict[str, Any],
+        payloads: List[Dict[str, Any]],
+        final: str,
+        fingerprint: Optional[str],
+    ) -> None:
+        # Without the fingerprint the briefing could not be checked against the calendar
+        if fingerprint is None:
+            return
+
+        # Served until the end of its date, every request checks it against the calendar
+        ttl_seconds = seconds_until_end_of_date(meeting_info["date"], datetime.now())
+
+        if ttl_seconds <= 0:
+            return
+
+        await self._set(
+            briefing_key(meeting_info), payloads, final, ttl_seconds, fingerprint
+        )
+
+    async def store_run(
+        self, ctx: Context, payloads: List[Dict[str, Any]], final: str
+    ) -> None:
+        """Store the result of a finished run, unless it was replayed from the cache"""
+
+        if await ctx.get(CtxKeys.RESULT_CACHE_HIT.value, False):
+            return
+
+        key = await ctx.get(CtxKeys.RESULT_CACHE_KEY.value, None)
+
+        if key:
+            # The summary describes the run itself, a replay gets its own
+            payloads = [
+                payload
+                for payload in payloads
+                if payload["type"] != StreamEventType.SUMMARY.value
+            ]
+
+            await self.set(key, payloads, final)
+
+    async def invalidate(self, meeting_info: Optional[Dict[str, Any]] = None) -> None:
+        """Drop the results of the request, or all the results without a request"""
+
+        if meeting_info is None:
+            await self.store.clear()
+        else:
+            await self.store.delete_prefix(f"{request_key(meeting_info)}:")
+            await self.store.delete(briefing_key(meeting_info))
+
+    async def close(self) -> None:
+        await self.store.close()
+
+    async def _set(
+        self,
+        key: str,
+        payloads: List[Dict[str, Any]],
+        final: str,
+        ttl_seconds: float,
+        fingerprint: Optional[str] = None,
+    ) -> None:
+        if not self.enabled or not final:
+            return
+
+        cached_result = CachedResult(
+            events=[payload for payload in payloads if is_replayed(payload)],
+            final=final,
+            calendar_fingerprint=fingerprint,
+        )
+
+        try:
+            await self.store.set(key, cached_result.model_dump_json(), ttl_seconds)
+        except Exception as e:
+            self._log_error(f"Error writing result cache for {key}\n: {e}")
+
+    @staticmethod
+    def _log_error(exception_text: str) -> None:
+        consoleLogger.error(exception_text)
+        timeFileLogger.error(exception_text)
+
+
+# Shared by all the workflow runs of the process
+result_cache = ResultCache()
@@ -0,0 +1,259 @@
+import functools
+import os
+import time
+import uuid
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Deque, Dict, Optional
+from src.enums import LlmStage
+from src.metrics import latency_histograms
+
+# Number of finished runs whose summary is kept for the metrics endpoint
+RUN_METRICS_HISTORY = int(os.environ.get("RUN_METRICS_HISTORY", "100"))
+
+
+class RunMetrics:
+    """Wall time per step, LLM calls and tokens,
+    searches and cache lookups of a single workflow run"""
+
+    def __init__(self):
+        self.run_id = uuid.uuid4().hex
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.wall_seconds: Optional[float] = None
+        self.step_seconds: Dict[str, float] = {}
+        self.llm: Dict[str, Dict[str, int]] = {}
+        self.search = {"calls": 0, "cacheHits": 0, "cacheMisses": 0, "coalesced": 0}
+        self.research_cache = {"hits": 0, "misses": 0}
+        self.result_cache_hit = False
+        self.cancelled = False
+        self.observations = {"compacted": 0, "tokensBefore": 0, "tokensAfter": 0}
+        self.token_budget = {"tokensBefore": 0, "tokensAfter": 0, "tokensSaved": 0}
+
+    def record_step(self, name: str, seconds: float) -> None:
+        self.step_seconds[name] = self.step_seconds.get(name, 0.0) + seconds
+
+    def record_llm_call(
+        self, stage: str, prompt_tokens: int, completion_tokens: int
+    ) -> None:
+        stage_metrics = self.llm.setdefault(
+            stage, {"calls": 0, "promptTokens": 0, "completionTokens": 0}
+        )
+        stage_metrics["calls"] += 1
+        stage_metrics["promptTokens"] += prompt_tokens
+        stage_metrics["completionTokens"] += completion_tokens
+
+    def finish(self) -> None:
+        self.wall_seconds = time.perf_counter() - self._started
+
+    def summary(self) -> Dict[str, Any]:
+        search_lookups = (
+            self.search["cacheHits"]
+            + self.search["cacheMisses"]
+            + self.search["coalesced"]
+        )
+        research_lookups = self.research_cache["hits"] + self.research_cache["misses"]
+
+        return {
+            "runId": self.run_id,
+            "startedAt": self.started_at,
+            "wallSeconds": self.wall_seconds,
+            "steps": {
+                name: round(seconds, 4) for name, seconds in self.step_seconds.items()
+            },
+            "llm": {
+                "calls": sum(stage["calls"] for stage in self.llm.values()),
+                "promptTokens": sum(
+                    stage["promptTokens"] for stage in self.llm.values()
+                ),
+                "completionTokens": sum(
+                    stage["completionTokens"] for stage in self.llm.values()
+                ),
+                "stages": self.llm,
+            },
+            "search": {
+                **self.search,
+                "cacheHitRate": (
+                    (self.search["cacheHits"] + self.search["coalesced"])
+                    / search_lookups
+                    if search_lookups
+                    else 0.0
+                ),
+            },
+            "researchCache": {
+                **self.research_cache,
+                "hitRate": (
+                    self.research_cache["hits"] / research_lookups
+                    if research_lookups
+                    else 0.0
+                ),
+            },
+            "resultCacheHit": self.result_cache_hit,
+            "cancelled": self.cancelled,
+            "tokenBudget": self.token_budget,
+            "observations": {
+                **self.observations,
+                "tokensRemoved": self.observations["tokensBefore"]
+                - self.observations["tokensAfter"],
+            },
+        }
+
+
+class RunMetricsRegistry:
+    """Totals of the process and the summaries of the last finished runs"""
+
+    def __init__(self, history_size: int = RUN_METRICS_HISTORY):
+        self.runs = 0
+        self.llm_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.search_calls = 0
+        self.observation_tokens_removed = 0
+        self.cancelled_runs = 0
+        self.cancelled_research_tasks = 0
+        self.cancelled_run_tokens = 0
+        self._recent: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+
+    def record_run(self, metrics: RunMetrics) -> Dict[str, Any]:
+        metrics.finish()
+        summary = metrics.summary()
+
+        self.runs += 1
+        self._recent.append(summary)
+
+        # The run latency is of the completed runs only
+        if not metrics.cancelled:
+            latency_histograms.observe("run", metrics.wall_seconds)
+
+        return summary
+
+    def record_cancelled_run(
+        self, metrics: RunMetrics, research_tasks: int
+    ) -> Dict[str, Any]:
+        """Record a run cancelled before its end, with the work it had already done"""
+
+        metrics.cancelled = True
+        summary = self.record_run(metrics)
+
+        self.cancelled_runs += 1
+        self.cancelled_research_tasks += research_tasks
+        self.cancelled_run_tokens += (
+            summary["llm"]["promptTokens"] + summary["llm"]["completionTokens"]
+        )
+
+        return summary
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "totals": {
+                "runs": self.runs,
+                "llmCalls": self.llm_calls,
+                "promptTokens": self.prompt_tokens,
+                "completionTokens": self.completion_tokens,
+                "searchCalls": self.search_calls,
+                "observationTokensRemoved": self.observation_tokens_removed,
+                "cancelledRuns": self.cancelled_runs,
+                "cancelledResearchTasks": self.cancelled_research_tasks,
+                "cancelledRunTokens": self.cancelled_run_tokens,
+            },
+            "recentRuns": list(self._recent),
+        }
+
+
+run_metrics_registry = RunMetricsRegistry()
+
+# Set for the tasks of a workflow run (see `ProgressWorkflow.run`), `None` outside a run
+current_run_metrics: ContextVar[Optional[RunMetrics]] = ContextVar(
+    "current_run_metrics", default=None
+)
+# Stage of the LLM calls made by the current task, set by `llm_calls`
+current_llm_stage: ContextVar[Optional[LlmStage]] = ContextVar(
+    "current_llm_stage", default=None
+)
+
+
+def llm_call_recorder() -> Callable[[int, int], None]:
+    """Records the tokens of an LLM call for the run and the stage of the calling task.
+
+    Bound when the call starts, a stream may be consumed by another task.
+    """
+
+    metrics = current_run_metrics.get()
+    stage = current_llm_stage.get()
+
+    def record(prompt_tokens: int, completion_tokens: int) -> None:
+        run_metrics_registry.llm_calls += 1
+        run_metrics_registry.prompt_tokens += prompt_tokens
+        run_metrics_registry.completion_tokens += completion_tokens
+
+        if metrics is not None:
+            metrics.record_llm_call(
+                stage.value if stage else "other", prompt_tokens, completion_tokens
+            )
+
+    return record
+
+
+def record_search_call() -> None:
+    run_metrics_registry.search_calls += 1
+
+    metrics = current_run_metrics.get()
+
+    if metrics is not None:
+        metrics.search["calls"] += 1
+
+
+def record_observation_compaction(tokens_before: int, tokens_after: int) -> None:
+    run_metrics_registry.observation_tokens_removed += tokens_before - tokens_after
+
+    metrics = current_run_metrics.get()
+
+    if metrics is not None:
+        metrics.observations["compacted"] += 1
+        metrics.observations["tokensBefore"] += tokens_before
+        metrics.observations["tokensAfter"] += tokens_after
+
+
+def record_search_lookup(outcome: str) -> None:
+    """`outcome` is `cacheHits`, `cacheMisses` or `coalesced`"""
+
+    metrics = current_run_metrics.get()
+
+    if metrics is not None:
+        metrics.search[outcome] += 1
+
+
+def record_research_cache_lookup(is_hit: bool) -> None:
+    metrics = current_run_metrics.get()
+
+    if metrics is not None:
+        metrics.research_cache["hits" if is_hit else "misses"] += 1
+
+
+def record_result_cache_lookup(is_hit: bool) -> None:
+    metrics = current_run_metrics.get()
+
+    if metrics is not None:
+        metrics.result_cache_hit = is_hit
+
+
+def timed_step(func):
+    """Record the wall time of a workflow step, put it under `@step`"""
+
+    @functools.wraps(func)
+    async def timed(*args, **kwargs):
+        started_at = time.perf_counter()
+
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - started_at
+
+            latency_histograms.observe(f"step.{func.__name__}", seconds)
+
+            metrics = current_run_metrics.get()
+
+            if metrics is not None:
+                metrics.record_step(func.__name__, seconds)
+
+    return timed
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from llama_index.core.workflow import Context
+from llama_index.core.workflow.handler import WorkflowHandler
+from src.enums import CtxKeys, ProgressEventType
+from src.events import ProgressEvent, ProgressWorkflowStartEvent
+from src.limits import AdmissionSlot, admission_controller
+from src.resources import WorkflowResources
+from src.run_metrics import run_metrics_registry
+from src.streaming import serialize_event
+from src.workflow import ProgressWorkflow
+from utils.logger import consoleLogger, timeFileLogger
+
+# Whole time of a run, whatever its stages are doing, `0` lets it run without a timeout
+WORKFLOW_TIMEOUT_SECONDS = float(os.environ.get("WORKFLOW_TIMEOUT_SECONDS", "900"))
+
+
+def meeting_info_from_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Meeting information of a `/api/run-workflow` request,
+    missing fields fall back to the mock data"""
+
+    mock_company_name = os.environ.get("MOCK_COMPANY_NAME")
+    mock_attendees = os.environ.get("MOCK_ATTENDEES")
+    mock_exclude_emails = os.environ.get("EXCLUDE_EMAILS") or ""
+
+    return {
+        "date": payload.get("date", None),
+        "company": payload.get("company", mock_company_name),
+        "attendees": payload.get("attendees", mock_attendees),
+        "exclude_emails": payload.get(
+            "excludeEmails", re.split(", ", mock_exclude_emails)
+        ),
+    }
+
+
+async def start_workflow_run(
+    resources: WorkflowResources,
+    meeting_info: Dict[str, Any],
+    bypass_cache: bool = False,
+    **workflow_kwargs,
+) -> Tuple[WorkflowHandler, Context]:
+    """Start a `ProgressWorkflow` run for the meeting information"""
+
+    progress_workflow = ProgressWorkflow(
+        timeout=WORKFLOW_TIMEOUT_SECONDS or None, resources=resources, **workflow_kwargs
+    )
+
+    # Context
+    ctx = Context(workflow=progress_workflow)
+
+    await ctx.set(key=CtxKeys.MEETING_INFO.value, value=meeting_info)
+
+    # Skip the result cache lookup, the fresh result still refreshes the cache
+    await ctx.set(key=CtxKeys.BYPASS_RESULT_CACHE.value, value=bypass_cache)
+
+    workflow_handler = progress_workflow.run(
+        ctx=ctx,
+        start_event=ProgressWorkflowStartEvent(
+            date=meeting_info["date"],
+            company=meeting_info["company"],
+            attendees=meeting_info["attendees"],
+        ),
+    )
+
+    # Read back when the run is cancelled, see `cancel_workflow_run`
+    await ctx.set(key=CtxKeys.RUN_METRICS.value, value=progress_workflow.run_metrics)
+
+    return workflow_handler, ctx
+
+
+# Cancellations in progress, by run
+_cancelling_runs: Dict[WorkflowHandler, asyncio.Task] = {}
+
+
+async def _cancel_workflow_run(workflow_handler: WorkflowHandler, ctx: Context) -> None:
+    # Cancels the step tasks, their agent runs, LLM,
+    # search and MCP calls are cancelled with them
+    await workflow_handler.cancel_run()
+
+    # The research tasks are not step tasks, they would run to their end otherwise
+    research_session = await ctx.get(CtxKeys.RESEARCH_SESSION.value, None)
+    research_tasks = research_session.cancel_all() if research_session else 0
+
+    metrics = await ctx.get(CtxKeys.RUN_METRICS.value, None)
+
+    # A run cancelled right after its `finish_step` is already recorded
+    if metrics is not None and metrics.wall_seconds is None:
+        summary = run_metrics_registry.record_cancelled_run(metrics, research_tasks)
+
+        cancellation_text = (
+            f"Run {summary['runId']} cancelled after {summary['wallSeconds']:.1f}s, "
+            f"{research_tasks} research tasks were still running"
+        )
+        consoleLogger.info(cancellation_text)
+        timeFileLogger.info(cancellation_text)
+
+
+def cancel_workflow_run(
+    workflow_handler: WorkflowHandler, ctx: Context
+) -> Optional[asyncio.Task]:
+    """Cancel an unfinished run and all the work it started,
+    returns the cancellation task (`None` for a finished run).
+
+    The cancellation runs in its own task, the caller may itself be being cancelled
+    (e.g. the response generator of a client that disconnected).
+    """
+
+    if workflow_handler in _cancelling_runs:
+        return _cancelling_runs[workflow_handler]
+
+    if workflow_handler.done():
+        return None
+
+    task = asyncio.create_task(_cancel_workflow_run(workflow_handler, ctx))
+    _cancelling_runs[workflow_handler] = task
+    task.add_done_callback(lambda _: _cancelling_runs.pop(workflow_handler, None))
+
+    return task
+
+
+async def queued_payloads(slot: AdmissionSlot) -> AsyncIterator[Dict[str, Any]]:
+    """Progress payloads with the queue position of the run, until it is admitted"""
+
+    async for position in slot.queue_positions():
+        yield serialize_event(
+            ProgressEvent(
+                type=ProgressEventType.QUEUED,
+                message=f"waiting for a free slot, position {position} in the queue",
+            )
+        )
+
+
+async def run_to_completion(
+    resources: WorkflowResources,
+    meeting_info: Dict[str, Any],
+    bypass_cache: bool = False,
+) -> Tuple[List[Dict[str, Any]], str, Optional[str]]:
+    """Run the workflow without a client and store its result,
+    returns the stream payloads, the final document
+    and the fingerprint of the calendar data"""
+
+    async with admission_controller.slot() as slot:
+        async for _ in slot.queue_positions():
+            pass
+
+        workflow_handler, ctx = await start_workflow_run(
+            resources, meeting_info, bypass_cache=bypass_cache
+        )
+
+        payloads = []
+
+        try:
+            async for event in workflow_handler.stream_events():
+                event_payload = serialize_event(event)
+
+                if event_payload is not None:
+                    payloads.append(event_payload)
+
+            final_result = await workflow_handler
+
+        finally:
+            # A cancelled caller (e.g. the shutdown) waits until the run has stopped
+            cancellation = cancel_workflow_run(workflow_handler, ctx)
+
+            if cancellation is not None:
+                await asyncio.wait([cancellation])
+
+    await resources.result_cache.store_run(ctx, payloads, final_result)
+
+    return (
+        payloads,
+        final_result,
+        await ctx.get(CtxKeys.CALENDAR_FINGERPRINT.value, None),
+    )
+
+
+class ActiveRuns:
+    """Number of interactive runs in progress, background work yields to them"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __enter__(self):
+        self.count += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.count -= 1
+
+
+active_runs = ActiveRuns()
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+from src.run_metrics import record_search_lookup
+
+SEARCH_CACHE_ENABLED = os.environ.get("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_TTL_SECONDS = float(os.environ.get("SEARCH_CACHE_TTL_SECONDS", "3600"))
+SEARCH_CACHE_MAX_BYTES = int(
+    os.environ.get("SEARCH_CACHE_MAX_BYTES", str(32 * 1024 * 1024))
+)
+
+SearchResults = List[Dict[str, Any]]
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query, so near-identical queries share the same cache entry.
+
+    Case, whitespace and punctuation are ignored, the word order is kept:
+    "ACME Corp: recent news" and "acme corp recent news" are the same query,
+    "X acquires Y" and "Y acquires X" are not.
+    """
+    words = re.findall(r"[\w@.\-]+", query.casefold())
+    return " ".join(word for word in (word.strip(".-") for word in words) if word)
+
+
+def _results_size(results: SearchResults) -> int:
+    """Approximate memory footprint of the results"""
+    return sum(len(str(value)) for result in results for value in result.values())
+
+
+class SearchCache:
+    """In-memory search results cache with TTL, memory-bounded LRU eviction
+    and coalescing of concurrent identical queries ("single-flight")"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS,
+        max_bytes: int = SEARCH_CACHE_MAX_BYTES,
+        enabled: bool = SEARCH_CACHE_ENABLED,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        # key -> (expires_at, size, results), ordered from least to most recently used
+        self._entries: "OrderedDict[str, Tuple[float, int, SearchResults]]" = (
+            OrderedDict()
+        )
+        self._size = 0
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_fetch(
+        self, query: str, fetch: Callable[[], Awaitable[SearchResults]]
+    ) -> SearchResults:
+        """Return the cached results of the query or fetch them once for all callers"""
+
+        if not self.enabled:
+            record_search_lookup("cacheMisses")
+            return await fetch()
+
+        key = normalize_query(query)
+
+        cached_results = self._get(key)
+
+        if cached_results is not None:
+            self.hits += 1
+            record_search_lookup("cacheHits")
+            return cached_results
+
+        task = self._in_flight.get(key)
+
+        if task is not None:
+            self.coalesced += 1
+            record_search_lookup("coalesced")
+        else:
+            self.misses += 1
+            record_search_lookup("cacheMisses")
+            task = asyncio.ensure_future(fetch())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done_task: self._on_fetched(key, done_task))
+
+        # Shielded, so a cancelled caller does not cancel the fetch for the other callers
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._size = 0
+
+    def _get(self, key: str) -> SearchResults | None:
+        entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        expires_at, size, results = entry
+
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+
+        return results
+
+    def _on_fetched(self, key: str, task: asyncio.Task) -> None:
+        self._in_flight.pop(key, None)
+
+        # Failures are not cached, the next call tries again
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        results = task.result()
+        size = _results_size(results)
+
+        if size > self.max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, results)
+        self._size += size
+
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+
+        if entry is not None:
+            self._size -= entry[1]
+
+
+# Shared by all the searches of the process
+search_cache = SearchCache()
@@ -0,0 +1,74 @@
+import json
+from typing import Any, AsyncIterator, Dict, Optional
+from llama_index.core.workflow import Event
+from src.enums import ProgressEventType, StreamEventType
+from src.models.cached_result import CachedResult
+from src.events import (
+    FormatDeltaEvent,
+    MeetingSectionEvent,
+    ProgressEvent,
+    ReplayEvent,
+    RunSummaryEvent,
+)
+
+
+def serialize_event(event: Event) -> Optional[Dict[str, Any]]:
+    """Map a workflow stream event to the payload sent to the client,
+    `None` for internal events"""
+
+    if isinstance(event, ProgressEvent):
+        return {
+            "type": StreamEventType.PROGRESS.value,
+            "data": {
+                "type": event.type.value,
+                "message": event.message,
+            },
+        }
+
+    if isinstance(event, FormatDeltaEvent):
+        return {"type": StreamEventType.DELTA.value, "data": event.delta}
+
+    if isinstance(event, MeetingSectionEvent):
+        return {
+            "type": StreamEventType.SECTION.value,
+            "data": {
+                "index": event.index,
+                "title": event.title,
+                "section": event.section,
+            },
+        }
+
+    if isinstance(event, ReplayEvent):
+        return event.payload
+
+    if isinstance(event, RunSummaryEvent):
+        return {"type": StreamEventType.SUMMARY.value, "data": event.summary}
+
+    return None
+
+
+def final_payload(final_result: Any) -> Dict[str, Any]:
+    return {"type": StreamEventType.FINAL.value, "data": final_result}
+
+
+def to_ndjson(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload) + "\n"
+
+
+async def replay_ndjson(cached_result: CachedResult) -> AsyncIterator[str]:
+    """Stream a stored result to the client like a live run"""
+
+    yield to_ndjson(
+        {
+            "type": StreamEventType.PROGRESS.value,
+            "data": {
+                "type": ProgressEventType.COMPLETED.value,
+                "message": "Briefing was prepared ahead of time",
+            },
+        }
+    )
+
+    for payload in cached_result.events:
+        yield to_ndjson(payload)
+
+    yield to_ndjson(final_payload(cached_result.final))
@@ -0,0 +1,119 @@
+import asyncio
+import os
+import random
+from typing import Any, Dict, List, Optional
+import httpx
+from src.limits import SEARCH_MAX_CONCURRENCY, search_limiter
+from src.run_metrics import record_search_call
+from utils.logger import consoleLogger, timeFileLogger
+
+TAVILY_SEARCH_URL = "https://api.tavily.com/search"
+
+TAVILY_TIMEOUT_SECONDS = float(os.environ.get("TAVILY_TIMEOUT_SECONDS", "20"))
+TAVILY_MAX_RETRIES = int(os.environ.get("TAVILY_MAX_RETRIES", "2"))
+TAVILY_SEARCH_DEPTH = os.environ.get("TAVILY_SEARCH_DEPTH", "advanced")
+
+# Responses worth another attempt, everything else is returned as is
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class TavilySearchError(Exception):
+    pass
+
+
+class AsyncTavilyClient:
+    """Non-blocking Tavily search client.
+
+    A single keep-alive connection pool is shared by all the searches of the process,
+    the number of in-flight requests is bounded by `search_limiter`
+    and failed requests are retried with backoff.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        max_concurrency: int = SEARCH_MAX_CONCURRENCY,
+        timeout_seconds: float = TAVILY_TIMEOUT_SECONDS,
+        max_retries: int = TAVILY_MAX_RETRIES,
+    ):
+        self._api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.max_retries = max_retries
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def api_key(self) -> str:
+        # Read lazily, so the key loaded by `load_dotenv()` after the import is picked up
+        return self._api_key or os.environ.get("TAVILY_API_KEY", "")
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout_seconds, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+
+        return self._client
+
+    async def search(
+        self,
+        query: str,
+        max_results: int = 5,
+        search_depth: str = TAVILY_SEARCH_DEPTH,
+    ) -> List[Dict[str, Any]]:
+        """Search Tavily and return the raw `results` list"""
+
+        record_search_call()
+
+        client = self._get_client()
+        payload = {
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Exponential backoff with jitter: ~0.5s, ~1s, ~2s, ...
+                await asyncio.sleep(0.5 * 2 ** (attempt - 1) * (0.5 + random.random()))
+
+            try:
+                # In-flight searches are bounded across all the workflows of the process
+                async with search_limiter:
+                    response = await client.post(
+                        TAVILY_SEARCH_URL, json=payload, headers=headers
+                    )
+
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    last_error = TavilySearchError(
+                        f"Tavily responded with {response.status_code}"
+                    )
+                    continue
+
+                response.raise_for_status()
+
+                return response.json().get("results", [])
+
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                last_error = e
+
+        exception_text = f"Tavily search failed for query {query!r}\n: {last_error}"
+        consoleLogger.error(exception_text)
+        timeFileLogger.error(exception_text)
+        raise TavilySearchError(exception_text)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Shared by all the searches of the process
+tavily_client = AsyncTavilyClient()
@@ -0,0 +1,173 @@
+import os
+import re
+from typing import List, Optional, Set
+import tiktoken
+from src.run_metrics import current_run_metrics
+
+TOKEN_BUDGET_ENABLED = os.environ.get("TOKEN_BUDGET_ENABLED", "true").lower() == "true"
+# Budget of a single company or attendee research
+ENTITY_TOKEN_BUDGET = int(os.environ.get("ENTITY_TOKEN_BUDGET", "1500"))
+# Budget of a whole meeting brief sent to the formatting prompt
+MEETING_TOKEN_BUDGET = int(os.environ.get("MEETING_TOKEN_BUDGET", "5000"))
+
+TRUNCATION_MARKER = "[...]"
+# Shorter snippets are structure ("Role: Not found", headings),
+# they are never deduplicated
+MIN_DEDUPLICATED_WORDS = 6
+
+_encoding: Optional[tiktoken.Encoding] = None
+
+
+def get_encoding() -> tiktoken.Encoding:
+    global _encoding
+
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(os.environ.get("OPEN_AI_MODEL", ""))
+        except KeyError:
+            # Azure deployment names are not always model names
+            _encoding = tiktoken.get_encoding("cl100k_base")
+
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text or "", disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    tokens = get_encoding().encode(text, disallowed_special=())
+
+    if len(tokens) <= max_tokens:
+        return text
+
+    return get_encoding().decode(tokens[:max_tokens]) + TRUNCATION_MARKER
+
+
+def _snippet_key(snippet: str) -> str:
+    return " ".join(re.findall(r"\w+", snippet.casefold()))
+
+
+def _is_structural(snippet: str) -> bool:
+    return (
+        snippet.startswith("#")
+        or snippet.endswith(":")
+        or len(snippet.split()) < MIN_DEDUPLICATED_WORDS
+    )
+
+
+def compact_text(text: str, max_tokens: int, seen_snippets: Set[str]) -> str:
+    """Drop the snippets already seen and keep the leading snippets that fit the budget.
+
+    Snippets are the paragraphs (or lines) of the text,
+    `seen_snippets` is updated with the kept ones,
+    the short structural snippets are always kept.
+    """
+
+    snippets: List[str] = []
+    used_tokens = 0
+
+    for snippet in re.split(r"\n\s*\n|\n", text or ""):
+        snippet = snippet.strip()
+        key = _snippet_key(snippet)
+
+        if not key:
+            continue
+
+        if not _is_structural(snippet):
+            if key in seen_snippets:
+                continue
+
+            seen_snippets.add(key)
+
+        snippet_tokens = count_tokens(snippet) + 1
+
+        if used_tokens + snippet_tokens > max_tokens:
+            remaining_tokens = max_tokens - used_tokens
+
+            if remaining_tokens > 0:
+                snippets.append(truncate_to_tokens(snippet, remaining_tokens))
+
+            break
+
+        snippets.append(snippet)
+        used_tokens += snippet_tokens
+
+    return "\n".join(snippets)
+
+
+class TokenBudget:
+    """Keeps the research of a run within the token budgets and counts the saved tokens"""
+
+    def __init__(
+        self,
+        entity_budget: int = ENTITY_TOKEN_BUDGET,
+        meeting_budget: int = MEETING_TOKEN_BUDGET,
+        enabled: bool = TOKEN_BUDGET_ENABLED,
+    ):
+        self.entity_budget = entity_budget
+        self.meeting_budget = meeting_budget
+        self.enabled = enabled
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+    def compact_meeting_research(
+        self, company_research: str, attendees_research: List[str]
+    ) -> tuple[str, List[str]]:
+        """Compact each entity research of a meeting,
+        the snippets repeated within an entity are dropped.
+
+        Snippets are not deduplicated between the entities,
+        the remaining one would be attributed to the wrong company or attendee.
+        """
+
+        if not self.enabled:
+            return company_research, attendees_research
+
+        return (
+            compact_text(company_research, self.entity_budget, set()),
+            [
+                compact_text(research, self.entity_budget, set())
+                for research in attendees_research
+            ],
+        )
+
+    def fit_meeting_brief(self, raw_brief: str, brief: str) -> str:
+        """Fit the whole meeting brief to the meeting budget and count the saved tokens"""
+
+        # Disabled, nothing is counted, so `tiktoken` is not needed
+        if not self.enabled:
+            return brief
+
+        brief = truncate_to_tokens(brief, self.meeting_budget)
+
+        self.tokens_before += count_tokens(raw_brief)
+        self.tokens_after += count_tokens(brief)
+
+        return brief
+
+
+# Totals of the process, see `TokenBudget` for the counts of a single run
+token_budget_stats = {"tokensBefore": 0, "tokensAfter": 0, "tokensSaved": 0}
+
+
+def record_token_budget(token_budget: TokenBudget) -> None:
+    """Add the counts of the run to the process totals and to the run metrics"""
+
+    counts = {
+        "tokensBefore": token_budget.tokens_before,
+        "tokensAfter": token_budget.tokens_after,
+        "tokensSaved": token_budget.tokens_saved,
+    }
+
+    metrics = current_run_metrics.get()
+
+    for name, count in counts.items():
+        token_budget_stats[name] += count
+
+        if metrics is not None:
+            metrics.token_budget[name] += count
@@ -1,13 +1,185 @@
 import os
+import re
+from contextvars import ContextVar
 from llama_index.core.tools import FunctionTool
-from llama_index.tools.tavily_research import TavilyToolSpec
 from llama_index.core.schema import Document
-from typing import List
+from typing import Any, Dict, FrozenSet, List, Optional, Set
 from llama_index.core.tools.tool_spec.load_and_search import LoadAndSearchToolSpec
+from src.run_metrics import record_observation_compaction
+from src.search_cache import search_cache
+from src.tavily_client import tavily_client
+from src.token_budget import count_tokens, truncate_to_tokens
 
-tavily_api_key = os.environ.get("TAVILY_API_KEY", "")
+OBSERVATION_COMPACTION_ENABLED = (
+    os.environ.get("OBSERVATION_COMPACTION_ENABLED", "true").lower() == "true"
+)
+# Token cap of a single `search_web` observation
+OBSERVATION_MAX_TOKENS = int(os.environ.get("OBSERVATION_MAX_TOKENS", "800"))
+# Passages kept from every search result, the most relevant to the query first
+OBSERVATION_PASSAGES_PER_RESULT = int(
+    os.environ.get("OBSERVATION_PASSAGES_PER_RESULT", "3")
+)
+# Share of common words from which two passages are the same passage
+OBSERVATION_DUPLICATE_SIMILARITY = float(
+    os.environ.get("OBSERVATION_DUPLICATE_SIMILARITY", "0.8")
+)
+
+# Navigation, cookie banners, sign-up forms and the like,
+# scraped along with the page content
+BOILERPLATE_PATTERN = re.compile(
+    r"\b(cookie (policy|settings|preferences)|(we|this (site|website)) uses? cookies|"
+    r"privacy policy|terms of (use|service)|all rights reserved|sign (in|up)|log ?in|"
+    r"subscribe|newsletter|skip to (main )?content|enable javascript|"
+    r"accept( all)? cookies|"
+    r"advertisement|share on (facebook|twitter|linkedin))\b",
+    re.IGNORECASE,
+)
+# Longer passages are page content even when they mention one of the boilerplate phrases
+BOILERPLATE_MAX_WORDS = 12
+MIN_PASSAGE_WORDS = 4
+QUERY_STOP_WORDS = {"the", "and", "for", "with", "from", "about", "what", "who", "news"}
+
+
+class ObservationMemory:
+    """URLs and passages already returned to the agent of a research"""
+
+    def __init__(self):
+        self.urls: Set[str] = set()
+        self.passages: List[FrozenSet[str]] = []
+
+    def is_near_duplicate(self, words: FrozenSet[str]) -> bool:
+        for seen_words in self.passages:
+            common_words = len(words & seen_words)
+
+            if common_words / max(len(words), len(seen_words), 1) >= (
+                OBSERVATION_DUPLICATE_SIMILARITY
+            ):
+                return True
+
+        return False
+
+
+# Set for every research (see `ProgressWorkflow._research_with_memory`),
+# without it an observation is only deduplicated against itself
+current_observation_memory: ContextVar[Optional[ObservationMemory]] = ContextVar(
+    "current_observation_memory", default=None
+)
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r"\w+", text.casefold())
+
+
+def _passages(content: str) -> List[str]:
+    """Sentences of the content, without the boilerplate and the fragments"""
+
+    passages = []
+
+    for passage in re.split(r"\n+|(?<=[.!?])\s+", content or ""):
+        passage = " ".join(passage.split())
+        # Table rules and separators have no words at all
+        words = _words(passage)
+
+        if len(words) < MIN_PASSAGE_WORDS:
+            continue
+
+        if len(words) <= BOILERPLATE_MAX_WORDS and BOILERPLATE_PATTERN.search(passage):
+            continue
+
+        passages.append(passage)
+
+    return passages
+
+
+def _relevant_passages(passages: List[str], query: str) -> List[str]:
+    """The passages sharing the most words with the query, in their original order,
+    the leading passages when none of them mentions the query"""
+
+    query_words = {
+        word for word in _words(query) if len(word) > 2 and word not in QUERY_STOP_WORDS
+    }
+
+    scored = [
+        (index, passage, len(query_words.intersection(_words(passage))))
+        for index, passage in enumerate(passages)
+    ]
+    relevant = [item for item in scored if item[2]] or scored
+
+    ranked = sorted(relevant, key=lambda item: -item[2])
 
-tavily_tool = TavilyToolSpec(api_key=tavily_api_key)
+    kept = sorted(ranked[:OBSERVATION_PASSAGES_PER_RESULT], key=lambda item: item[0])
+
+    return [passage for _, passage, _ in kept]
+
+
+def compact_observation(query: str, results: List[Dict[str, Any]]) -> str:
+    """Observation of the search results for the agent transcript.
+
+    Keeps the passages of every result relevant to the query,
+    drops the URLs and the near-duplicate passages already returned during the research
+    and cuts the observation to `OBSERVATION_MAX_TOKENS`.
+    """
+
+    memory = current_observation_memory.get() or ObservationMemory()
+
+    sections = []
+
+    for result in results:
+        url = result.get("url") or ""
+
+        if url and url in memory.urls:
+            continue
+
+        passages = []
+
+        for passage in _relevant_passages(_passages(result.get("content", "")), query):
+            words = frozenset(_words(passage))
+
+            if memory.is_near_duplicate(words):
+                continue
+
+            memory.passages.append(words)
+            passages.append(passage)
+
+        if url:
+            memory.urls.add(url)
+
+        if passages:
+            sections.append(f"Source: {url}\n" + "\n".join(passages))
+
+    observation = "\n\n".join(sections)
+
+    return truncate_to_tokens(observation, OBSERVATION_MAX_TOKENS)
+
+
+def search_results_observation(
+    query: str, results: List[Dict[str, Any]]
+) -> List[Document] | str:
+    """What `search_web` returns to the agent for the search results"""
+
+    if not results:
+        return "No results found."
+
+    if not OBSERVATION_COMPACTION_ENABLED:
+        return [
+            Document(
+                text=result.get("content", ""), extra_info={"url": result.get("url")}
+            )
+            for result in results
+        ]
+
+    observation = compact_observation(query, results)
+
+    raw_observation = "\n\n".join(
+        f"{result.get('url')}\n{result.get('content', '')}" for result in results
+    )
+
+    record_observation_compaction(
+        count_tokens(raw_observation), count_tokens(observation)
+    )
+
+    # Everything was already returned earlier in the research
+    return observation or "No new results found."
 
 
 async def search_web(query: str) -> List[Document] | str:
@@ -16,17 +188,16 @@ async def search_web(query: str) -> List[Document] | str:
         query (str): The query to search for.
 
         Returns:
-            results: A list of dictionaries containing the results:
-                url: The url of the result.
-                content: The content of the result.
+            results: The source url and the relevant passages of every result,
+                see `search_results_observation`.
 
                 If no results are found, it returns "No results found.
     """
-    results = tavily_tool.search(query=query, max_results=5)
-    if results:
-        return results
-    else:
-        return "No results found."
+    response_results = await search_cache.get_or_fetch(
+        query, lambda: tavily_client.search(query=query, max_results=5)
+    )
+
+    return search_results_observation(query, response_results)
 
 
 # search_web_function_tool = FunctionTool.from_defaults(
@@ -1,11 +1,16 @@
 import os
 import sys
+import json
+import queue
+import random
+import atexit
 import logging.handlers
 import logging
 
 # For more options see: 
 # https://www.geeksforgeeks.org/logging-in-python/ 
 # https://docs.python.org/3/library/logging.handlers.html#timedrotatingfilehandler
+# https://docs.python.org/3/howto/logging-cookbook.html#dealing-with-handlers-that-block
 
 
 #-- General setup --#
@@ -14,6 +19,15 @@ logs_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'logs')
 # Create `logs` folder if it doesn't exist
 os.makedirs(logs_dir, exist_ok=True)
 
+# `text` or `json` (one JSON object per line)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text').lower()
+# Longer messages (research transcripts, documents) are truncated, `0` keeps them whole
+LOG_MAX_MESSAGE_CHARS = int(os.environ.get('LOG_MAX_MESSAGE_CHARS', '20000'))
+# Share of the debug records that are kept
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', '1'))
+# Records waiting for the writer thread, new records are dropped while it is full
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
 
 #-- Loggers --#
 
@@ -36,20 +50,91 @@ console_handler.setLevel(logging.DEBUG)
 time_file_handler = logging.handlers.TimedRotatingFileHandler(f"{logs_dir}/timed_rotating.log", when='midnight', interval=1, backupCount=10)
 
 
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Hands the records over to a writer thread,
+    the caller (the event loop) never waits for I/O"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = super().prepare(record)
+
+        if LOG_MAX_MESSAGE_CHARS and len(record.msg) > LOG_MAX_MESSAGE_CHARS:
+            truncated_chars = len(record.msg) - LOG_MAX_MESSAGE_CHARS
+            record.msg = (
+                f"{record.msg[:LOG_MAX_MESSAGE_CHARS]} "
+                f"[... {truncated_chars} chars truncated]"
+            )
+
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Keeps a share of the debug records, the other levels are always kept"""
+
+    def __init__(self, sample_rate):
+        super().__init__()
+        self.sample_rate = sample_rate
+
+    def filter(self, record):
+        return record.levelno != logging.DEBUG or random.random() < self.sample_rate
+
+
 #-- Formatters --#
 
+class JsonLinesFormatter(logging.Formatter):
+    # The queue handler has already merged the traceback into the message
+    def format(self, record):
+        return json.dumps({
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }, ensure_ascii=False)
+
+
 # Console formatter
 consoleFormatter = logging.Formatter('\n\n %(name)s \n\n %(levelname)s: \n\n %(asctime)s \n\n %(message)s \n\n')
 
 # Timed Rotating File formatter
 timeFileFormatter = logging.Formatter('\n %(name)s \n\n %(levelname)s: \n %(asctime)s \n %(message)s \n\n-----')
 
+if LOG_FORMAT == 'json':
+    consoleFormatter = timeFileFormatter = JsonLinesFormatter()
+
 
 
 #-- Set a formatter on a handler --#
 console_handler.setFormatter(consoleFormatter)
 time_file_handler.setFormatter(timeFileFormatter)
 
+
+#-- Queue the records of a logger to a writer thread of its handler --#
+def add_queued_handler(logger, handler):
+    queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    queue_handler.addFilter(DebugSamplingFilter(LOG_DEBUG_SAMPLE_RATE))
+
+    listener = logging.handlers.QueueListener(
+        queue_handler.queue, handler, respect_handler_level=True
+    )
+    listener.start()
+
+    # Flush the queued records when the process exits
+    atexit.register(listener.stop)
+
+    logger.addHandler(queue_handler)
+
+    return listener
+
+
 #-- Add a handler to a logger --#
-consoleLogger.addHandler(console_handler)
-timeFileLogger.addHandler(time_file_handler)
+console_listener = add_queued_handler(consoleLogger, console_handler)
+time_file_listener = add_queued_handler(timeFileLogger, time_file_handler)
@@ -1,10 +1,9 @@
+import asyncio
 import json
 import os
-from datetime import datetime
-from typing import List
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
-from llama_index.core import set_global_handler
-import re
 
 from llama_index.core.agent.workflow import ReActAgent
 from llama_index.core.workflow import StopEvent, Workflow, step, Context
@@ -15,102 +14,655 @@ from llama_index.core.agent.workflow import (
 )
 from llama_index.core.workflow.errors import WorkflowRuntimeError
 from llama_index.core.prompts import RichPromptTemplate
-from azure.identity import DefaultAzureCredential, get_bearer_token_provider
 from llama_index.core.workflow.handler import WorkflowHandler
-from src.enums import CtxKeys, ProgressEventType
+from src.calendar_fetch import (
+    format_meeting_time,
+    list_calendar_events,
+    meetings_from_events,
+    parse_calendar_events,
+)
+from src.calendar_stream import MeetingsStreamParser
+from src.enums import (
+    BriefingMode,
+    CalendarFetchMode,
+    CtxKeys,
+    LlmStage,
+    ProgressEventType,
+    ResearchEngine,
+)
 from src.events import (
+    AssembleEvent,
     CalendarDataParserEvent,
     CalendarDataRetrievalEvent,
+    CalendarParsedEvent,
     FinalEvent,
+    FormatDeltaEvent,
     FormatEvent,
+    MeetingExtractedEvent,
+    MeetingResearchStartedEvent,
+    MeetingSectionEvent,
     ProgressEvent,
     ProgressWorkflowStartEvent,
+    ReplayEvent,
     ResearchEvent,
+    RunSummaryEvent,
 )
+from src.models.cached_result import CachedResult
 from src.models.calendar_data import CalendarData
 from src.models.meeting import Meeting
+from src.models.research_plan import (
+    AttendeeResearchItem,
+    CompanyResearchItem,
+    ResearchPlan,
+)
 from src.prompts import (
     EXTRACT_CALENDAR_DATA_PROMPT_TEMPLATE,
+    FORMAT_MEETING_PROMPT_TEMPLATE,
     FORMAT_RESPONSE_PROMPT_TEMPLATE,
     GET_CALENDAR_EVENTS_PROMPT_TEMPLATE,
     RESEARCH_ATTENDEES_PROMPT_TEMPLATE,
     RESEARCH_COMPANY_PROMPT_TEMPLATE,
 )
-from src.tools import search_web_tool
+from src.limits import mcp_limiter
+from src.llm_calls import call_llm, stream_llm
+from src.mcp_pool import GOOGLE_CALENDAR_MCP_ARGS, GOOGLE_CALENDAR_MCP_COMMAND
+from src.resources import WorkflowResources, create_mcp_agent
+from src.planned_research import PlannedResearchEngine
+from src.research_planner import (
+    assemble_meeting_brief,
+    attendee_key,
+    build_research_plan,
+    meeting_from_request,
+    normalize_company,
+    split_attendees_research,
+)
+from src.research_session import ResearchSession
+from src.result_cache import calendar_fingerprint, result_key
+from src.run_metrics import (
+    RunMetrics,
+    current_run_metrics,
+    record_result_cache_lookup,
+    run_metrics_registry,
+    timed_step,
+)
+from src.search_cache import search_cache
+from src.token_budget import TokenBudget, record_token_budget
+from src.tools import ObservationMemory, current_observation_memory
 from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
 from utils.logger import consoleLogger, timeFileLogger
-from llama_index.llms.azure_openai import AzureOpenAI
+from llama_index.core.output_parsers import PydanticOutputParser
 from llama_index.core.program import LLMTextCompletionProgram
 
 # Load environment variables
 load_dotenv()
 
+# How the calendar events are fetched, see `CalendarFetchMode`
+DEFAULT_CALENDAR_FETCH_MODE = CalendarFetchMode(
+    os.environ.get("CALENDAR_FETCH_MODE", CalendarFetchMode.AGENT.value)
+)
+
+# Stream the formatted document to the client token by token
+DEFAULT_FORMAT_STREAMING = os.environ.get("FORMAT_STREAMING", "true").lower() == "true"
+
+# How the research results become the final document, see `BriefingMode`
+DEFAULT_BRIEFING_MODE = BriefingMode(
+    os.environ.get("BRIEFING_MODE", BriefingMode.MONOLITHIC.value)
+)
+
+# Extract the meetings from the streamed calendar parsing completion one by one
+DEFAULT_CALENDAR_PARSE_STREAMING = (
+    os.environ.get("CALENDAR_PARSE_STREAMING", "true").lower() == "true"
+)
+
+# How a company or an attendee is researched, see `ResearchEngine`
+DEFAULT_RESEARCH_ENGINE = ResearchEngine(
+    os.environ.get("RESEARCH_ENGINE", ResearchEngine.REACT.value)
+)
+
+# Research the company and attendees of a request
+# with a date while its calendar is loading
+DEFAULT_SPECULATIVE_RESEARCH = (
+    os.environ.get("SPECULATIVE_RESEARCH", "false").lower() == "true"
+)
+
+# Maximum number of research agent loops that may run at the same time
+DEFAULT_RESEARCH_CONCURRENCY = int(os.environ.get("RESEARCH_CONCURRENCY", "4"))
+
 
 # UTILITIES
 async def stream_events(handler: WorkflowHandler):
+    """Log the outputs and tool calls of an agent run"""
+
     async for handler_event in handler.stream_events():
         if isinstance(handler_event, AgentOutput):
             if handler_event.response.content:
-                print(f"{'='*20}\n")
-                print("📤 Agent Output:", handler_event.response.content)
-                print(f"{'='*20}\n")
+                timeFileLogger.debug(
+                    f"📤 Agent Output: {handler_event.response.content}"
+                )
             if handler_event.tool_calls:
-                print(f"{'='*20}\n")
-                print(
-                    "🛠️  Planning to use tools:",
-                    [call.tool_name for call in handler_event.tool_calls],
+                timeFileLogger.debug(
+                    "🛠️  Planning to use tools: "
+                    f"{[call.tool_name for call in handler_event.tool_calls]}"
                 )
-                print(f"{'='*20}\n")
 
         elif isinstance(handler_event, ToolCall):
-            print(f"{'='*20}\n")
-            print(f"🔨 Calling Tool: {handler_event.tool_name}\n")
-            print(f"  With arguments: {handler_event.tool_kwargs}\n")
-            print(f"{'='*20}\n")
+            timeFileLogger.debug(
+                f"🔨 Calling Tool: {handler_event.tool_name}\n"
+                f"  With arguments: {handler_event.tool_kwargs}"
+            )
 
         elif isinstance(handler_event, ToolCallResult):
-            print(f"🔧 Tool Call Result: ({handler_event.tool_name})\n")
-            print(f"  Arguments: {handler_event.tool_kwargs}\n")
-            print(f"  Output: {handler_event.tool_output}\n")
-            print(f"{'='*20}\n")
+            timeFileLogger.debug(
+                f"🔧 Tool Call Result: ({handler_event.tool_name})\n"
+                f"  Arguments: {handler_event.tool_kwargs}\n"
+                f"  Output: {handler_event.tool_output}"
+            )
+
+
+async def run_agent(agent: ReActAgent, user_msg: str, log_events: bool = False):
+    """Run the agent to completion, the agent run
+    is cancelled along with the awaiting task"""
+
+    handler: WorkflowHandler = agent.run(user_msg=user_msg)
+
+    try:
+        if log_events:
+            await stream_events(handler)
+
+        return await handler
+
+    except asyncio.CancelledError:
+        await handler.cancel_run()
+        raise
 
 
 class ProgressWorkflow(Workflow):
 
-    def __init__(self, *args, **kwargs):
+    def __init__(
+        self,
+        *args,
+        resources: Optional[WorkflowResources] = None,
+        research_concurrency: Optional[int] = None,
+        calendar_fetch_mode: CalendarFetchMode = DEFAULT_CALENDAR_FETCH_MODE,
+        format_streaming: bool = DEFAULT_FORMAT_STREAMING,
+        briefing_mode: BriefingMode = DEFAULT_BRIEFING_MODE,
+        calendar_parse_streaming: bool = DEFAULT_CALENDAR_PARSE_STREAMING,
+        research_engine: ResearchEngine = DEFAULT_RESEARCH_ENGINE,
+        speculative_research: bool = DEFAULT_SPECULATIVE_RESEARCH,
+        **kwargs,
+    ):
         super().__init__(*args, **kwargs)
 
-        credential = DefaultAzureCredential()
+        # Shared by the runs of the application, see `main.lifespan`,
+        # a standalone workflow builds its own
+        self.resources = resources or WorkflowResources.from_env()
+
+        self.model = self.resources.model
+        self.agent = self.resources.agent
+        self.mcp_pool = self.resources.mcp_pool
+        self.research_cache = self.resources.research_cache
+        self.result_cache = self.resources.result_cache
+
+        self.calendar_fetch_mode = calendar_fetch_mode
+        self.format_streaming = format_streaming
+        self.briefing_mode = briefing_mode
+        self.speculative_research = speculative_research
+        self.calendar_parse_streaming = calendar_parse_streaming
+        self.research_engine = research_engine
+
+        self.planned_research = PlannedResearchEngine(self.model, self.resources.tools)
+
+        # Bounds the research fan-out, so a busy day does not flood the LLM and Tavily
+        self.research_semaphore = asyncio.Semaphore(
+            max(1, research_concurrency or DEFAULT_RESEARCH_CONCURRENCY)
+        )
+
+    def run(self, *args, **kwargs) -> WorkflowHandler:
+        """Start a run, the tasks it creates record into its own `RunMetrics`"""
+
+        self.run_metrics = RunMetrics()
+
+        metrics_token = current_run_metrics.set(self.run_metrics)
+
+        try:
+            return super().run(*args, **kwargs)
+        finally:
+            current_run_metrics.reset(metrics_token)
+
+    async def _run_research_agent(self, prompt: str) -> str:
+        """Run the research engine for the prompt, waiting for a free research slot"""
+
+        async with self.research_semaphore:
+            if self.research_engine == ResearchEngine.PLANNED:
+                return await self._research_with_memory(
+                    self.planned_research.research(prompt)
+                )
+
+            response = await call_llm(
+                LlmStage.RESEARCH_AGENT,
+                lambda: self._research_with_memory(
+                    run_agent(self.agent, prompt, log_events=True)
+                ),
+            )
+
+        return str(response)
+
+    @staticmethod
+    async def _research_with_memory(research: Awaitable[Any]) -> Any:
+        """Run the research with its own memory of the search observations,
+        a repeated research doesn't see the observations of the previous one
+        as duplicates"""
+
+        memory_token = current_observation_memory.set(ObservationMemory())
+
+        try:
+            return await research
+        finally:
+            current_observation_memory.reset(memory_token)
+
+    async def _research_company(self, research_item: CompanyResearchItem) -> str:
+        """Research the company in the context of its meetings,
+        unless a fresh research is already cached"""
+
+        company = research_item.company
+
+        cached_response = await self.research_cache.get_company(company)
+
+        if cached_response is not None:
+            timeFileLogger.debug(f"company research cache hit: {company}")
+            return cached_response
+
+        company_search_prompt_raw = RichPromptTemplate(RESEARCH_COMPANY_PROMPT_TEMPLATE)
+
+        company_search_prompt = company_search_prompt_raw.format(
+            meeting_info=json.dumps(
+                {"company": company, "meetings": research_item.meetings}
+            ),
+            tools=[tool.metadata.name for tool in self.resources.tools],
+        )
+
+        company_response = await self._run_research_agent(company_search_prompt)
+
+        timeFileLogger.debug("\n===\ncompany_response:")
+        timeFileLogger.debug(company_response)
+
+        await self.research_cache.set_company(company, company_response)
+
+        return company_response
+
+    async def _research_attendees(
+        self, research_items: Dict[str, AttendeeResearchItem]
+    ) -> Dict[str, str]:
+        """Research the attendees of a meeting with a single research, by attendee key,
+        the attendees with a fresh cached research are not researched again"""
+
+        attendees_responses: Dict[str, str] = {}
+
+        for key, research_item in research_items.items():
+            email = research_item.attendee.email
+
+            if email:
+                cached_response = await self.research_cache.get_attendee(email)
+
+                if cached_response is not None:
+                    timeFileLogger.debug(f"attendee research cache hit: {email}")
+                    attendees_responses[key] = cached_response
+
+        uncached_items = {
+            key: research_item
+            for key, research_item in research_items.items()
+            if key not in attendees_responses
+        }
+
+        if not uncached_items:
+            return attendees_responses
+
+        attendees_search_prompt_raw = RichPromptTemplate(
+            RESEARCH_ATTENDEES_PROMPT_TEMPLATE
+        )
+
+        meeting_info = {
+            "company": next(iter(uncached_items.values())).company,
+            "attendees": [
+                research_item.attendee.model_dump()
+                for research_item in uncached_items.values()
+            ],
+        }
+
+        attendees_search_prompt = attendees_search_prompt_raw.format(
+            meeting_info=json.dumps(meeting_info),
+            tools=[tool.metadata.name for tool in self.resources.tools],
+        )
+
+        attendees_response = await self._run_research_agent(attendees_search_prompt)
+
+        timeFileLogger.debug("\n===\nattendees_response:")
+        timeFileLogger.debug(attendees_response)
+
+        split_responses = split_attendees_research(attendees_response, uncached_items)
+
+        for key, research_item in uncached_items.items():
+            if key not in split_responses:
+                # Without its marker the research of the attendee can not be told apart,
+                # the whole research is used and not cached
+                attendees_responses[key] = attendees_response
+                continue
+
+            attendees_responses[key] = split_responses[key]
+
+            if research_item.attendee.email:
+                await self.research_cache.set_attendee(
+                    research_item.attendee.email, split_responses[key]
+                )
+
+        return attendees_responses
+
+    async def _get_cached_result(self, ctx: Context) -> Optional[CachedResult]:
+        """Look the run up in the result cache and keep its key,
+        so the result can be stored"""
+
+        # Already looked up (and missed) in `get_calendar_data_step`
+        if await ctx.get(CtxKeys.RESULT_CACHE_KEY.value, None):
+            return None
+
+        meeting_info = await ctx.get(CtxKeys.MEETING_INFO.value, None) or {}
+
+        if meeting_info.get("date"):
+            fingerprint = await ctx.get(CtxKeys.CALENDAR_FINGERPRINT.value, None)
+
+            # Without the raw calendar data an edited calendar can not be told apart
+            if fingerprint is None:
+                return None
+        else:
+            # The meeting comes from the request itself
+            fingerprint = calendar_fingerprint(None)
+
+        key = result_key(meeting_info, fingerprint)
+
+        await ctx.set(CtxKeys.RESULT_CACHE_KEY.value, key)
+
+        if await ctx.get(CtxKeys.BYPASS_RESULT_CACHE.value, False):
+            return None
+
+        cached_result = await self.result_cache.get(key)
+
+        await ctx.set(CtxKeys.RESULT_CACHE_HIT.value, cached_result is not None)
 
-        token_provider = get_bearer_token_provider(
-            credential, "https://cognitiveservices.azure.com/.default"
+        record_result_cache_lookup(cached_result is not None)
+
+        return cached_result
+
+    async def _replay_cached_result(
+        self, ctx: Context, cached_result: CachedResult
+    ) -> FinalEvent:
+        """Same request on the same calendar data, replay the stored run"""
+
+        await self._cancel_research(ctx)
+
+        for payload in cached_result.events:
+            ctx.write_event_to_stream(ReplayEvent(payload=payload))
+
+        return FinalEvent(
+            message="result is replayed from the cache",
+            response=cached_result.final,
         )
 
-        azure_endpoint = os.environ.get("AZURE_ENDPOINT", "")
-        azure_open_ai_api_version = os.environ.get("AZURE_OPEN_AI_API_VERSION", "")
-        open_ai_model = os.environ.get("OPEN_AI_MODEL", "")
-
-        self.model = AzureOpenAI(
-            azure_endpoint=azure_endpoint,
-            engine=open_ai_model,
-            api_version=azure_open_ai_api_version,
-            model=open_ai_model,
-            azure_ad_token_provider=token_provider,
-            use_azure_ad=True,
+    async def _get_research_session(self, ctx: Context) -> ResearchSession:
+        research_session = await ctx.get(CtxKeys.RESEARCH_SESSION.value, None)
+
+        if research_session is None:
+            research_session = ResearchSession()
+            await ctx.set(CtxKeys.RESEARCH_SESSION.value, research_session)
+
+        return research_session
+
+    async def _cancel_research(self, ctx: Context) -> None:
+        """Nothing keeps researching in the background once the run has failed"""
+
+        research_session = await ctx.get(CtxKeys.RESEARCH_SESSION.value, None)
+
+        if research_session is not None:
+            research_session.cancel_all()
+
+    async def _start_speculative_research(
+        self, ctx: Context, company: Optional[str], attendees: List[str]
+    ) -> None:
+        """Research the company and attendees of the request
+        while the calendar is loading,
+        `research_step` reuses what the calendar meetings need and cancels the rest"""
+
+        research_plan = build_research_plan([meeting_from_request(company, attendees)])
+
+        research_session = await self._get_research_session(ctx)
+
+        if company:
+            company_key = normalize_company(company)
+
+            research_session.company_task(
+                company_key,
+                lambda: self._research_company(research_plan.companies[company_key]),
+            )
+
+        research_session.attendee_tasks_batch(
+            research_plan.attendees,
+            lambda keys: self._research_attendees(
+                {key: research_plan.attendees[key] for key in keys}
+            ),
+        )
+
+        ctx.write_event_to_stream(
+            ProgressEvent(
+                type=ProgressEventType.RESEARCH,
+                message=f"Researching {company or 'no company'} and "
+                f"{len(research_plan.attendees)} attendees of the request "
+                "while the calendar is loading",
+            )
+        )
+
+    def _start_entity_research(
+        self,
+        research_plan: ResearchPlan,
+        calendar_events: List[Meeting],
+        research_session: ResearchSession,
+    ) -> Tuple[Dict[str, asyncio.Task], Dict[str, asyncio.Task]]:
+        """Start the research of every planned company and attendee,
+        in the meetings order, so the first meetings are ready first.
+        The attendees of a meeting are researched together"""
+
+        for calendar_event in calendar_events:
+            company_key = normalize_company(calendar_event.company)
+
+            research_session.company_task(
+                company_key,
+                lambda: self._research_company(research_plan.companies[company_key]),
+            )
+
+            research_session.attendee_tasks_batch(
+                [attendee_key(attendee) for attendee in calendar_event.attendees],
+                lambda keys: self._research_attendees(
+                    {key: research_plan.attendees[key] for key in keys}
+                ),
+            )
+
+        return research_session.company_tasks, research_session.attendee_tasks
+
+    async def _gather_meeting_brief(
+        self,
+        calendar_event: Meeting,
+        company_tasks: Dict[str, asyncio.Task],
+        attendee_tasks: Dict[str, asyncio.Task],
+        token_budget: TokenBudget,
+    ) -> str:
+        """Wait for the research of the meeting entities
+        and put the meeting brief together within the token budget"""
+
+        company_key = normalize_company(calendar_event.company)
+        attendee_keys = [attendee_key(attendee) for attendee in calendar_event.attendees]
+
+        company_response, *attendee_responses = await asyncio.gather(
+            company_tasks[company_key], *[attendee_tasks[key] for key in attendee_keys]
+        )
+
+        raw_brief = assemble_meeting_brief(
+            calendar_event,
+            {company_key: company_response},
+            dict(zip(attendee_keys, attendee_responses)),
+        )
+
+        company_response, attendee_responses = token_budget.compact_meeting_research(
+            company_response, attendee_responses
+        )
+
+        brief = assemble_meeting_brief(
+            calendar_event,
+            {company_key: company_response},
+            dict(zip(attendee_keys, attendee_responses)),
+        )
+
+        return token_budget.fit_meeting_brief(raw_brief, brief)
+
+    async def _format_meeting_section(
+        self,
+        ctx: Context,
+        index: int,
+        calendar_event: Meeting,
+        company_tasks: Dict[str, asyncio.Task],
+        attendee_tasks: Dict[str, asyncio.Task],
+        token_budget: TokenBudget,
+    ) -> str:
+        """Format the meeting brief as soon as its research is complete and stream it"""
+
+        meeting_brief = await self._gather_meeting_brief(
+            calendar_event, company_tasks, attendee_tasks, token_budget
+        )
+
+        format_prompt_raw = RichPromptTemplate(FORMAT_MEETING_PROMPT_TEMPLATE)
+
+        format_prompt = format_prompt_raw.format(research_results=meeting_brief)
+
+        formatted_response = await call_llm(
+            LlmStage.FORMAT,
+            lambda: self.model.acomplete(prompt=format_prompt),
+            hedge=True,
+        )
+
+        section = str(formatted_response.text)
+
+        ctx.write_event_to_stream(
+            MeetingSectionEvent(index=index, title=calendar_event.title, section=section)
+        )
+
+        timeFileLogger.debug(f"formatted section {index} from research_step:")
+        timeFileLogger.debug(section)
+
+        return section
+
+    async def _get_mcp_agent(self) -> ReActAgent:
+        """Get the calendar agent, reusing the pooled
+        MCP sessions and their tools when available"""
+
+        if self.resources.mcp_agent is not None:
+            return self.resources.mcp_agent
+
+        local_client = BasicMCPClient(
+            GOOGLE_CALENDAR_MCP_COMMAND, args=GOOGLE_CALENDAR_MCP_ARGS
+        )  # stdio
+
+        mcp_tool_spec = McpToolSpec(client=local_client)
+        tools = await mcp_tool_spec.to_tool_list_async()
+
+        return create_mcp_agent(tools, self.model)
+
+    async def _list_calendar_events(self, meeting_date: str) -> Optional[str]:
+        """Raw calendar data listed directly (no LLM), in the `agent` mode `None`
+        if the calendar could not be listed and the calendar agent has to fetch it"""
+
+        if self.calendar_fetch_mode == CalendarFetchMode.DIRECT:
+            return await list_calendar_events(meeting_date, self.mcp_pool)
+
+        try:
+            return await list_calendar_events(meeting_date, self.mcp_pool)
+        except Exception as e:
+            exception_text = f"Error listing the calendar events directly\n: {e}"
+            consoleLogger.error(exception_text)
+            timeFileLogger.error(exception_text)
+            return None
+
+    async def _calendar_data_event(
+        self, ctx: Context, calendar_data: str
+    ) -> CalendarDataParserEvent | ResearchEvent:
+        """Meetings of the structured calendar data are mapped in code,
+        an unstructured result is parsed by the LLM instead"""
+
+        calendar_events = parse_calendar_events(calendar_data)
+
+        if calendar_events is None:
+            return CalendarDataParserEvent(calendar_data=calendar_data)
+
+        meeting_info = await ctx.get(CtxKeys.MEETING_INFO.value, None) or {}
+
+        meetings = meetings_from_events(
+            calendar_events, meeting_info.get("exclude_emails") or []
         )
 
-        self.agent = ReActAgent(
-            name="searchAgent",
-            description="Searches the web for the given query and returns the result.",
-            tools=[search_web_tool],
-            llm=self.model,
+        for meeting in meetings:
+            self._report_calendar_event(ctx, meeting)
+
+        timeFileLogger.debug("calendar_events from get_calendar_data_step:")
+        timeFileLogger.debug(meetings)
+
+        return ResearchEvent(calendar_events=meetings)
+
+    async def _extract_meetings(self, prompt: str) -> AsyncIterator[Meeting]:
+        """Meetings of the calendar data extraction completion, in the calendar order"""
+
+        if not self.calendar_parse_streaming:
+            program = LLMTextCompletionProgram.from_defaults(
+                output_cls=CalendarData,
+                llm=self.model,
+                prompt_template_str=prompt,
+                verbose=True,
+            )
+
+            # Async call, the completion must not hold the event loop of the server
+            calendar_data_item: CalendarData = await call_llm(
+                LlmStage.CALENDAR_PARSER, program.acall
+            )
+
+            for meeting in calendar_data_item.meetings:
+                yield meeting
+
+            return
+
+        output_format = PydanticOutputParser(output_cls=CalendarData).get_format_string(
+            escape_json=False
         )
+        streamed_prompt = f"{prompt}\n\n{output_format}"
+
+        meetings_parser = MeetingsStreamParser()
 
-        phoenix_api_key = os.environ.get("PHOENIX_API_KEY", "")
-        os.environ["OTEL_EXPORTER_OTLP_HEADERS"] = f"api_key={phoenix_api_key}"
-        set_global_handler("arize_phoenix", endpoint="https://llamatrace.com/v1/traces")
+        async for chunk in await stream_llm(
+            LlmStage.CALENDAR_PARSER,
+            lambda: self.model.astream_complete(prompt=streamed_prompt),
+        ):
+            for meeting in meetings_parser.feed(chunk.delta or ""):
+                yield meeting
+
+        for meeting in meetings_parser.finish():
+            yield meeting
+
+    def _report_calendar_event(self, ctx: Context, meeting: Meeting) -> None:
+        ctx.write_event_to_stream(
+            ProgressEvent(
+                type=ProgressEventType.CALENDAR_EVENT,
+                message="Processing calendar event: "
+                f"{meeting.title} at {meeting.meeting_time} "
+                f"with {len(meeting.attendees)} attendees",
+            )
+        )
 
     @step
+    @timed_step
     async def init_step(
         self, ctx: Context, event: ProgressWorkflowStartEvent
     ) -> CalendarDataRetrievalEvent | ResearchEvent:
@@ -132,6 +684,11 @@ class ProgressWorkflow(Workflow):
                     )
                 )
 
+                if self.speculative_research and (event.company or event.attendees):
+                    await self._start_speculative_research(
+                        ctx, event.company, event.attendees
+                    )
+
                 return CalendarDataRetrievalEvent(date=meeting_date)
 
             elif event.attendees and event.company:
@@ -158,9 +715,10 @@ class ProgressWorkflow(Workflow):
             raise WorkflowRuntimeError(exception_text)
 
     @step
+    @timed_step
     async def get_calendar_data_step(
         self, ctx: Context, event: CalendarDataRetrievalEvent
-    ) -> CalendarDataParserEvent:
+    ) -> CalendarDataParserEvent | ResearchEvent | FinalEvent:
         """Get calendar data and store it in the context"""
 
         try:
@@ -171,35 +729,6 @@ class ProgressWorkflow(Workflow):
                 )
             )
 
-            # 1. Get the project root directory
-            project_root = os.path.abspath(
-                os.path.join(
-                    os.path.dirname(__file__),  # backend/src
-                    os.pardir,  # → backend
-                    os.pardir,  # → project-root
-                )
-            )
-
-            # 2. join to google-calendar-mcp/build/index.js
-            google_calendar_mcp_path = os.path.join(
-                project_root, "google-calendar-mcp", "build", "index.js"
-            )
-
-            local_client = BasicMCPClient(
-                "node", args=[google_calendar_mcp_path]
-            )  # stdio
-
-            mcp_tool_spec = McpToolSpec(client=local_client)
-            tools = await mcp_tool_spec.to_tool_list_async()
-
-            mcp_agent = ReActAgent(
-                name="MCP Agent",
-                description="Agent using MCP tools.",
-                tools=tools,
-                llm=self.model,
-                system_prompt="You are an AI assistant with access to MCP tools.",
-            )
-
             meeting_date = event.date
 
             if not meeting_date:
@@ -207,6 +736,30 @@ class ProgressWorkflow(Workflow):
                     "Meeting date is required for calendar data retrieval."
                 )
 
+            # Listed directly when the mode or the
+            # result cache needs the raw calendar data
+            if (
+                self.calendar_fetch_mode == CalendarFetchMode.DIRECT
+                or self.result_cache.enabled
+            ):
+                calendar_data = await self._list_calendar_events(meeting_date)
+
+                if calendar_data is not None:
+                    await ctx.set(
+                        CtxKeys.CALENDAR_FINGERPRINT.value,
+                        calendar_fingerprint(calendar_data),
+                    )
+
+                    # Checked before any LLM work, a hit skips the calendar parsing too
+                    cached_result = await self._get_cached_result(ctx)
+
+                    if cached_result is not None:
+                        return await self._replay_cached_result(ctx, cached_result)
+
+                    return await self._calendar_data_event(ctx, calendar_data)
+
+            mcp_agent = await self._get_mcp_agent()
+
             # Run the query to get the meeting information
             mcp_agent_prompt_raw = RichPromptTemplate(
                 template_str=GET_CALENDAR_EVENTS_PROMPT_TEMPLATE
@@ -217,9 +770,20 @@ class ProgressWorkflow(Workflow):
                 output_schema=Meeting.model_json_schema(),
             )
 
-            calendar_data = await mcp_agent.run(mcp_agent_prompt)
+            # Without the pool the tool calls of the agent spawn their own MCP servers
+            mcp_limit = (
+                mcp_limiter if self.resources.mcp_agent is None else nullcontext()
+            )
+
+            async with mcp_limit:
+                calendar_data = await call_llm(
+                    LlmStage.CALENDAR_AGENT,
+                    lambda: run_agent(mcp_agent, mcp_agent_prompt),
+                )
 
         except Exception as e:
+            await self._cancel_research(ctx)
+
             exception_text = (
                 f"Error running {self.get_calendar_data_step.__name__}\n: {e}"
             )
@@ -230,10 +794,12 @@ class ProgressWorkflow(Workflow):
         return CalendarDataParserEvent(calendar_data=calendar_data.response.content)
 
     @step
+    @timed_step
     async def calendar_data_parser_step(
         self, ctx: Context, event: CalendarDataParserEvent
-    ) -> ResearchEvent:
-        """Parse the calendar data and extract meeting information"""
+    ) -> CalendarParsedEvent | MeetingExtractedEvent:
+        """Parse the calendar data and extract meeting information,
+        every meeting is sent to research as soon as it is extracted"""
 
         try:
             ctx.write_event_to_stream(
@@ -267,41 +833,24 @@ class ProgressWorkflow(Workflow):
                 exclude_emails=exclude_emails,
             )
 
-            program = LLMTextCompletionProgram.from_defaults(
-                output_cls=CalendarData,
-                llm=self.model,
-                prompt_template_str=extract_calendar_data_prompt,
-                verbose=True,
-            )
-
-            response_as_pydantic_obj = program()
-
-            calendar_data_item: CalendarData = response_as_pydantic_obj
-
             calendar_events: List[Meeting] = []
 
-            for meeting in calendar_data_item.meetings:
-                # Convert datetime ISO 8601 to "Hour:Minute AM/PM" format
+            async for meeting in self._extract_meetings(extract_calendar_data_prompt):
                 if meeting.meeting_time:
-                    # Parse the ISO formatted string into a datetime object
-                    dt_object = datetime.fromisoformat(meeting.meeting_time)
+                    meeting.meeting_time = format_meeting_time(meeting.meeting_time)
 
-                    # Format the datetime object to "Hour:Minute AM/PM"
-                    # %I for hour on a 12-hour clock, %M for minute, %p for locale's equivalent of either AM or PM.
-                    formatted_time = dt_object.strftime("%I:%M %p")
-                    meeting.meeting_time = formatted_time
+                self._report_calendar_event(ctx, meeting)
 
-                ctx.write_event_to_stream(
-                    ProgressEvent(
-                        type=ProgressEventType.CALENDAR_EVENT,
-                        message="Processing calendar event: "
-                        f"{meeting.title} at {meeting.meeting_time} with {len(meeting.attendees)} attendees",
-                    )
+                # Its research starts while the next meetings are being extracted
+                ctx.send_event(
+                    MeetingExtractedEvent(index=len(calendar_events), meeting=meeting)
                 )
 
                 calendar_events.append(meeting)
 
         except Exception as e:
+            await self._cancel_research(ctx)
+
             exception_text = (
                 f"Error running {self.calendar_data_parser_step.__name__}\n: {e}"
             )
@@ -311,10 +860,59 @@ class ProgressWorkflow(Workflow):
 
         timeFileLogger.debug("calendar_events from calendar_data_parser_step:")
         timeFileLogger.debug(calendar_events)
-        return ResearchEvent(calendar_events=calendar_events)
+        return CalendarParsedEvent(meeting_count=len(calendar_events))
+
+    @step
+    @timed_step
+    async def meeting_research_step(
+        self, ctx: Context, event: MeetingExtractedEvent
+    ) -> MeetingResearchStartedEvent:
+        """Start the research of a meeting as soon
+        as it is extracted from the calendar data"""
+
+        research_session = await self._get_research_session(ctx)
+
+        self._start_entity_research(
+            build_research_plan([event.meeting]), [event.meeting], research_session
+        )
+
+        return MeetingResearchStartedEvent(index=event.index, meeting=event.meeting)
+
+    @step
+    @timed_step
+    async def collect_meetings_step(
+        self, ctx: Context, event: MeetingResearchStartedEvent | CalendarParsedEvent
+    ) -> ResearchEvent | None:
+        """Gather the extracted meetings, in the calendar order,
+        once the research of all of them has started"""
+
+        if isinstance(event, CalendarParsedEvent):
+            await ctx.set(CtxKeys.CALENDAR_MEETING_COUNT.value, event.meeting_count)
+        else:
+            collected_meetings = await ctx.get(CtxKeys.COLLECTED_MEETINGS.value, [])
+            await ctx.set(
+                CtxKeys.COLLECTED_MEETINGS.value,
+                [*collected_meetings, (event.index, event.meeting)],
+            )
+
+        meeting_count = await ctx.get(CtxKeys.CALENDAR_MEETING_COUNT.value, None)
+        collected_meetings = await ctx.get(CtxKeys.COLLECTED_MEETINGS.value, [])
+
+        if meeting_count is None or len(collected_meetings) < meeting_count:
+            return None
+
+        return ResearchEvent(
+            calendar_events=[
+                meeting
+                for _, meeting in sorted(collected_meetings, key=lambda item: item[0])
+            ]
+        )
 
     @step
-    async def research_step(self, ctx: Context, event: ResearchEvent) -> FormatEvent:
+    @timed_step
+    async def research_step(
+        self, ctx: Context, event: ResearchEvent
+    ) -> FormatEvent | AssembleEvent | FinalEvent:
         """Use ReAct agent to search for information about the company and meeting attendees"""
 
         try:
@@ -326,28 +924,7 @@ class ProgressWorkflow(Workflow):
             )
 
             if not event.calendar_events and event.attendees and event.company:
-                translates = str.maketrans({"_": " ", "-": " "})
-
-                attendees_list = [
-                    {
-                        "name": re.split(r"@", item)[0].translate(translates),
-                        "email": item,
-                    }
-                    for item in event.attendees
-                ]
-
-                calendar_event = {
-                    "attendees": attendees_list,
-                    "company": event.company,
-                }
-
-                calendar_events = [
-                    Meeting(
-                        title=f"Meeting with ${event.company}",
-                        meeting_time="UNKNOWN",
-                        **calendar_event,
-                    )
-                ]
+                calendar_events = [meeting_from_request(event.company, event.attendees)]
 
             elif event.calendar_events:
                 calendar_events = event.calendar_events
@@ -357,88 +934,118 @@ class ProgressWorkflow(Workflow):
                     "either attendees and company name or calendar events must be provided."
                 )
 
-            all_responses = []
+            cached_result = await self._get_cached_result(ctx)
 
-            companies_dict = {}
+            if cached_result is not None:
+                return await self._replay_cached_result(ctx, cached_result)
 
-            for calendar_event in calendar_events:
-                company_search_prompt_raw = RichPromptTemplate(
-                    RESEARCH_COMPANY_PROMPT_TEMPLATE
-                )
+            research_session = await self._get_research_session(ctx)
 
-                calendar_event_json = calendar_event.model_dump_json()
+            # Research every unique company and attendee exactly once,
+            # even if they show up in several meetings
+            research_plan = build_research_plan(calendar_events)
 
-                company_search_prompt = company_search_prompt_raw.format(
-                    meeting_info=calendar_event_json,
-                    tools=[search_web_tool.metadata.name],
-                )
-
-                company_handler: WorkflowHandler = self.agent.run(
-                    user_msg=company_search_prompt
+            ctx.write_event_to_stream(
+                ProgressEvent(
+                    type=ProgressEventType.RESEARCH,
+                    message=f"Researching {len(research_plan.companies)} companies and "
+                    f"{len(research_plan.attendees)} attendees "
+                    f"for {len(calendar_events)} meetings",
                 )
+            )
 
-                # COMPANY STREAM EVENTS
-                await stream_events(company_handler)
-
-                # Get the final response for company
-                company_response = await company_handler
-
-                companies_dict[calendar_event.company] = str(company_response)
-
-                print(f"\n===\ncompany_response: {str(company_response)}\n===\n")
-                timeFileLogger.debug("\n===\ncompany_response:")
-                timeFileLogger.debug(str(company_response))
-
-            for calendar_event in calendar_events:
-                # ----- ATTENDEES -----#
-                calendar_event_json = calendar_event.model_dump_json()
+            # The research started early (speculatively or per extracted meeting)
+            # is reused, if still needed
+            started_count = len(research_session.company_tasks) + len(
+                research_session.attendee_tasks
+            )
 
-                attendees_search_prompt_raw = RichPromptTemplate(
-                    RESEARCH_ATTENDEES_PROMPT_TEMPLATE
+            if started_count:
+                cancelled_count = research_session.cancel_unneeded(
+                    research_plan.companies, research_plan.attendees
                 )
 
-                attendees_search_prompt = attendees_search_prompt_raw.format(
-                    meeting_info=calendar_event_json,
-                    tools=[search_web_tool.metadata.name],
+                ctx.write_event_to_stream(
+                    ProgressEvent(
+                        type=ProgressEventType.RESEARCH,
+                        message=f"Reusing {started_count - cancelled_count} "
+                        "researches started early, "
+                        f"{cancelled_count} unneeded ones are cancelled",
+                    )
                 )
 
-                attendees_handler: WorkflowHandler = self.agent.run(
-                    user_msg=attendees_search_prompt,
-                )
+            company_tasks, attendee_tasks = self._start_entity_research(
+                research_plan, calendar_events, research_session
+            )
 
-                # ATTENDEES STREAM EVENTS
-                await stream_events(attendees_handler)
+            token_budget = TokenBudget()
+
+            try:
+                if self.briefing_mode == BriefingMode.PIPELINED:
+                    # Every meeting is formatted and streamed
+                    # as soon as its research is complete
+                    sections = await asyncio.gather(
+                        *[
+                            self._format_meeting_section(
+                                ctx,
+                                index,
+                                calendar_event,
+                                company_tasks,
+                                attendee_tasks,
+                                token_budget,
+                            )
+                            for index, calendar_event in enumerate(calendar_events)
+                        ]
+                    )
 
-                # Get the final response for attendees
-                attendees_response = await attendees_handler
+                else:
+                    # `asyncio.gather` keeps the briefs in the original events order
+                    all_responses = await asyncio.gather(
+                        *[
+                            self._gather_meeting_brief(
+                                calendar_event,
+                                company_tasks,
+                                attendee_tasks,
+                                token_budget,
+                            )
+                            for calendar_event in calendar_events
+                        ]
+                    )
 
-                calendar_event_response_entry = "\n".join(
-                    [
-                        str(companies_dict[calendar_event.company]),
-                        str(attendees_response),
-                    ]
-                )
+            finally:
+                # Nothing keeps running in the background if the research failed
+                for task in [*company_tasks.values(), *attendee_tasks.values()]:
+                    task.cancel()
+
+            record_token_budget(token_budget)
 
-                all_responses.append(str(calendar_event_response_entry))
+            if token_budget.enabled:
+                ctx.write_event_to_stream(
+                    ProgressEvent(
+                        type=ProgressEventType.RESEARCH,
+                        message=f"Research compacted from {token_budget.tokens_before} "
+                        f"to {token_budget.tokens_after} tokens",
+                    )
+                )
 
-                print(f"\n\n===\n\nattendees_response: {attendees_response}\n===\n\n")
-                timeFileLogger.debug("\n===\nattendees_response.response.content:")
-                timeFileLogger.debug(str(attendees_response.response.content))
+            if self.briefing_mode == BriefingMode.PIPELINED:
+                timeFileLogger.debug(f"search cache stats: {search_cache.stats()}")
 
-                print("\n--------------------\n")
-                timeFileLogger.debug("\n===\nattendees_response:")
-                timeFileLogger.debug(str(attendees_response))
-                print("\n--------------------\n")
+                return AssembleEvent(sections=sections)
 
             combined_response = "\n\n".join(all_responses)
-            print(f"\n===\nCombined Response:\n{combined_response}\n===\n")
+            timeFileLogger.debug("\n===\nCombined Response:")
+            timeFileLogger.debug(combined_response)
 
         except Exception as e:
+            await self._cancel_research(ctx)
+
             exception_text = f"Error running {self.research_step.__name__}\n: {e}"
             consoleLogger.error(exception_text)
             timeFileLogger.error(exception_text)
             raise WorkflowRuntimeError(exception_text)
 
+        timeFileLogger.debug(f"search cache stats: {search_cache.stats()}")
         timeFileLogger.debug(
             "combined_response for a company and attendees from research_step:"
         )
@@ -450,6 +1057,7 @@ class ProgressWorkflow(Workflow):
         )
 
     @step
+    @timed_step
     async def format_step(self, ctx: Context, event: FormatEvent) -> FinalEvent:
         """Format the response"""
 
@@ -465,7 +1073,28 @@ class ProgressWorkflow(Workflow):
 
             format_prompt = format_prompt_raw.format(research_results=event.response)
 
-            formatted_response = await self.model.acomplete(prompt=format_prompt)
+            if self.format_streaming:
+                formatted_response_text = ""
+
+                # Forward every delta, so the document shows up while it is being written
+                async for chunk in await stream_llm(
+                    LlmStage.FORMAT,
+                    lambda: self.model.astream_complete(prompt=format_prompt),
+                    hedge=True,
+                ):
+                    if chunk.delta:
+                        ctx.write_event_to_stream(FormatDeltaEvent(delta=chunk.delta))
+
+                    formatted_response_text = chunk.text
+
+            else:
+                formatted_response = await call_llm(
+                    LlmStage.FORMAT,
+                    lambda: self.model.acomplete(prompt=format_prompt),
+                    hedge=True,
+                )
+
+                formatted_response_text = formatted_response.text
 
         except Exception as e:
             exception_text = f"Error running {self.format_step.__name__}\n: {e}"
@@ -473,26 +1102,47 @@ class ProgressWorkflow(Workflow):
             timeFileLogger.error(exception_text)
             raise WorkflowRuntimeError(exception_text)
 
-        timeFileLogger.debug(
-            "formatted_response for a company and attendees from format_step:"
-        )
-        timeFileLogger.debug(formatted_response)
-
         timeFileLogger.debug(
             "formatted_response.text for a company and attendees from format_step:"
         )
-        timeFileLogger.debug(formatted_response.text)
+        timeFileLogger.debug(formatted_response_text)
 
         return FinalEvent(
             message="format step is complete",
-            response=str(formatted_response.text),
+            response=str(formatted_response_text),
         )
 
     @step
+    @timed_step
+    async def assemble_step(self, ctx: Context, event: AssembleEvent) -> FinalEvent:
+        """Put the formatted meeting sections together into the final document"""
+
+        ctx.write_event_to_stream(
+            ProgressEvent(
+                type=ProgressEventType.FORMATTING,
+                message="the meeting sections are being assembled",
+            )
+        )
+
+        return FinalEvent(
+            message="assemble step is complete",
+            response="\n\n---\n\n".join(event.sections),
+        )
+
+    @step
+    @timed_step
     async def finish_step(self, ctx: Context, event: FinalEvent) -> StopEvent:
         ctx.write_event_to_stream(
             ProgressEvent(
                 type=ProgressEventType.COMPLETED, message="finish_step is happening"
             )
         )
+
+        metrics = current_run_metrics.get()
+
+        if metrics is not None:
+            ctx.write_event_to_stream(
+                RunSummaryEvent(summary=run_metrics_registry.record_run(metrics))
+            )
+
         return StopEvent(message="Finish Step -> Stop", result=event.response)
@@ -0,0 +1,16 @@
+"""Unit tests of the backend, see `python -m pytest tests`"""
+
+import os
+import sys
+
+# The application imports `src.*` and `utils.*` (from `backend/src`),
+# see `.vscode/launch.json`
+backend_dir = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir)
+)
+
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+if os.path.join(backend_dir, "src") not in sys.path:
+    sys.path.append(os.path.join(backend_dir, "src"))
@@ -0,0 +1,99 @@
+import json
+import pytest
+from src.calendar_stream import MeetingsStreamParser
+
+CHUNK_SIZES = [1, 2, 3, 7, 10_000]
+
+
+def meeting(title):
+    return {
+        "title": title,
+        "company": "Acme",
+        "attendees": [{"email": "jane@acme.com", "name": "Jane"}],
+        "meeting_time": "2025-06-02T10:00:00",
+    }
+
+
+def completion(*titles):
+    return json.dumps({"meetings": [meeting(title) for title in titles]}, indent=2)
+
+
+def feed_in_chunks(text, chunk_size):
+    """Titles of the meetings returned by `feed`, by chunk, and by `finish`"""
+
+    parser = MeetingsStreamParser()
+    titles = []
+
+    for start in range(0, len(text), chunk_size):
+        titles.append(
+            [meeting.title for meeting in parser.feed(text[start : start + chunk_size])]
+        )
+
+    return parser, [title for chunk in titles for title in chunk], parser.finish()
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_meetings_split_inside_strings(chunk_size):
+    text = completion("Quarterly review", "Pricing: next steps")
+
+    parser, titles, finished = feed_in_chunks(text, chunk_size)
+
+    assert titles == ["Quarterly review", "Pricing: next steps"]
+    assert finished == [] and parser.meeting_count == 2
+
+
+def test_meeting_returned_as_soon_as_its_object_is_complete():
+    text = completion("Quarterly review", "Pricing")
+    end_of_first = text.index("}\n", text.index('"meeting_time"')) + 1
+
+    parser = MeetingsStreamParser()
+
+    assert [meeting.title for meeting in parser.feed(text[:end_of_first])] == [
+        "Quarterly review"
+    ]
+    assert [meeting.title for meeting in parser.feed(text[end_of_first:])] == ["Pricing"]
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_escaped_quotes_and_braces_in_strings(chunk_size):
+    tricky_titles = [
+        'Review of the "Phoenix" project',
+        "Roadmap {2025} ] [ }{",
+        "Ends with a backslash \\",
+        'Mixed \\" and "} quotes',
+    ]
+
+    _, titles, finished = feed_in_chunks(completion(*tricky_titles), chunk_size)
+
+    assert titles == tricky_titles and finished == []
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_no_meetings(chunk_size):
+    parser, titles, finished = feed_in_chunks('{"meetings": []}', chunk_size)
+
+    assert titles == [] and finished == [] and parser.meeting_count == 0
+
+
+@pytest.mark.parametrize("chunk_size", CHUNK_SIZES)
+def test_trailing_text_after_the_array(chunk_size):
+    text = (
+        "```json\n"
+        + completion("Quarterly review")
+        + '\n```\nThe other meeting {"title": "Lunch"} was excluded.'
+    )
+
+    parser, titles, finished = feed_in_chunks(text, chunk_size)
+
+    assert titles == ["Quarterly review"]
+    assert finished == [] and parser.meeting_count == 1
+
+
+def test_completion_ending_inside_the_array():
+    text = completion("Quarterly review", "Pricing")
+
+    parser = MeetingsStreamParser()
+    parser.feed(text[: text.rindex("]")])
+
+    with pytest.raises(ValueError):
+        parser.finish()
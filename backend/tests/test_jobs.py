@@ -0,0 +1,119 @@
+import asyncio
+from src import jobs
+from src.enums import JobStatus
+from src.jobs import Job, JobManager
+
+
+def meeting_info(company="Acme"):
+    return {
+        "date": None,
+        "company": company,
+        "attendees": ["jane@acme.com"],
+        "exclude_emails": ["me@example.com"],
+    }
+
+
+async def collect(job, offset=0):
+    return [event_offset async for event_offset, _ in job.events(offset)]
+
+
+class BlockedJobManager(JobManager):
+    """Jobs emit one event, then wait for `release` instead of running the workflow"""
+
+    def __init__(self):
+        super().__init__(resources=None)
+        self.release = asyncio.Event()
+        self.runs = 0
+
+    async def _run_workflow(self, job, bypass_cache):
+        self.runs += 1
+        await job.append({"type": "progress", "data": {"message": "started"}})
+        await self.release.wait()
+
+
+def test_events_resume_after_old_events_dropped(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_EVENT_LOG_SIZE", 3)
+
+    async def main():
+        job = Job(job_id="job", key="key", meeting_info=meeting_info())
+
+        for index in range(5):
+            await job.append({"type": "delta", "data": str(index)})
+
+        await job.finish(JobStatus.COMPLETED)
+
+        assert job.describe()["firstOffset"] == 2
+        assert job.describe()["nextOffset"] == 5
+
+        # Dropped events are skipped, the stream starts from the oldest kept one
+        assert await collect(job, 0) == [2, 3, 4]
+        assert await collect(job, 3) == [3, 4]
+        assert await collect(job, 5) == []
+
+    asyncio.run(main())
+
+
+def test_attached_client_waits_for_new_events():
+    async def main():
+        job = Job(job_id="job", key="key", meeting_info=meeting_info())
+        await job.append({"type": "delta", "data": "0"})
+
+        attached = asyncio.create_task(collect(job, 1))
+        await asyncio.sleep(0)
+
+        await job.append({"type": "delta", "data": "1"})
+        await job.append({"type": "delta", "data": "2"})
+        await job.finish(JobStatus.COMPLETED)
+
+        assert await attached == [1, 2]
+
+    asyncio.run(main())
+
+
+def test_identical_submissions_share_a_job():
+    async def main():
+        manager = BlockedJobManager()
+
+        job, reused = manager.submit(meeting_info())
+        same_job, same_reused = manager.submit(meeting_info())
+        bypass_job, bypass_reused = manager.submit(meeting_info(), bypass_cache=True)
+        other_job, other_reused = manager.submit(meeting_info("Globex"))
+
+        assert not reused and same_reused and same_job is job
+        assert not bypass_reused and bypass_job is not job
+        assert not other_reused and other_job is not job
+
+        manager.release.set()
+        await asyncio.gather(job.task, bypass_job.task, other_job.task)
+
+        assert job.status == JobStatus.COMPLETED and manager.runs == 3
+
+        # A finished job is not reused, the request runs again
+        next_job, next_reused = manager.submit(meeting_info())
+
+        assert not next_reused and next_job is not job
+
+        await manager.close()
+
+    asyncio.run(main())
+
+
+def test_closing_cancels_the_running_jobs():
+    async def main():
+        manager = BlockedJobManager()
+
+        job, _ = manager.submit(meeting_info())
+        attached = asyncio.create_task(collect(job))
+        await asyncio.sleep(0.01)
+
+        await manager.close()
+
+        assert job.task.done() and job.status == JobStatus.CANCELLED
+        assert job.describe()["status"] == JobStatus.CANCELLED.value
+        # The attached client is released
+        assert await asyncio.wait_for(attached, 1) == [0]
+        assert manager.submit(meeting_info())[1] is False
+
+        await manager.close()
+
+    asyncio.run(main())
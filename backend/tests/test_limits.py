@@ -0,0 +1,130 @@
+import asyncio
+from src.limits import AdmissionController, StageLimiter, TokenBucket
+
+
+async def settle():
+    """Let every ready task run until it blocks"""
+    for _ in range(20):
+        await asyncio.sleep(0)
+
+
+class Run:
+    """A run going through the admission queue, held once admitted until released"""
+
+    def __init__(self, controller: AdmissionController):
+        self.controller = controller
+        self.positions = []
+        self.admitted = asyncio.Event()
+        self.release = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        async with self.controller.slot() as slot:
+            async for position in slot.queue_positions():
+                self.positions.append(position)
+
+            self.admitted.set()
+            await self.release.wait()
+
+
+def test_queue_positions_update_while_waiting():
+    async def main():
+        controller = AdmissionController(max_active_runs=1)
+
+        first = Run(controller)
+        await settle()
+        second = Run(controller)
+        third = Run(controller)
+        await settle()
+
+        # Both waiters reported their position, the first one yielded without the lock
+        assert first.admitted.is_set() and first.positions == []
+        assert second.positions == [1] and third.positions == [2]
+        assert controller.active == 1 and controller.queued == 2
+
+        first.release.set()
+        await settle()
+
+        assert second.admitted.is_set() and not third.admitted.is_set()
+        assert third.positions == [2, 1]
+
+        second.release.set()
+        await settle()
+
+        assert third.admitted.is_set()
+
+        third.release.set()
+        await asyncio.gather(first.task, second.task, third.task)
+
+        assert controller.active == 0 and controller.queued == 0
+
+    asyncio.run(main())
+
+
+def test_cancelled_runs_release_their_place():
+    async def main():
+        controller = AdmissionController(max_active_runs=1)
+
+        first = Run(controller)
+        await settle()
+        second = Run(controller)
+        third = Run(controller)
+        await settle()
+
+        # A queued run leaves the queue
+        second.task.cancel()
+        await settle()
+
+        assert second.task.cancelled()
+        assert controller.queued == 1 and third.positions == [2, 1]
+
+        # An admitted run frees its slot for the next one
+        first.task.cancel()
+        await settle()
+
+        assert third.admitted.is_set()
+        assert controller.active == 1 and controller.queued == 0
+
+        third.release.set()
+        await third.task
+
+        assert controller.active == 0
+
+    asyncio.run(main())
+
+
+def test_stage_limiter_releases_the_slot_when_cancelled_waiting_for_the_rate():
+    async def main():
+        limiter = StageLimiter("test", max_concurrency=1, rate_per_second=0.1)
+
+        # The first call takes the only token of the bucket
+        async with limiter:
+            assert limiter.in_flight == 1
+
+        waiting = asyncio.create_task(limiter.acquire())
+        await settle()
+
+        assert limiter.in_flight == 1
+
+        waiting.cancel()
+        await settle()
+
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
+
+
+def test_token_bucket_paces_the_calls():
+    async def main():
+        loop = asyncio.get_running_loop()
+        bucket = TokenBucket(rate_per_second=20, burst=1)
+
+        started_at = loop.time()
+
+        for _ in range(3):
+            await bucket.take()
+
+        # One call right away from the bucket, the next ones every 1/20s
+        assert loop.time() - started_at >= 0.09
+
+    asyncio.run(main())
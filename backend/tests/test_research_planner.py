@@ -0,0 +1,55 @@
+from src.models.attendee import Attendee
+from src.models.research_plan import AttendeeResearchItem
+from src.research_planner import split_attendees_research
+
+
+def research_items(*emails):
+    return {
+        email: AttendeeResearchItem(
+            company="Acme", attendee=Attendee(email=email, name=None)
+        )
+        for email in emails
+    }
+
+
+def test_split_attendees_research():
+    response = (
+        "**Attendee: jane@acme.com**\n"
+        "Jane leads the sales team.\n\n"
+        "### Attendee: john@acme.com\n"
+        "John is the CTO."
+    )
+
+    assert split_attendees_research(
+        response, research_items("jane@acme.com", "john@acme.com")
+    ) == {
+        "jane@acme.com": "**Attendee: jane@acme.com**\nJane leads the sales team.",
+        "john@acme.com": "### Attendee: john@acme.com\nJohn is the CTO.",
+    }
+
+
+def test_split_attendees_research_with_colliding_emails():
+    response = (
+        "Attendee: a@x.com\n"
+        "A works at X.\n\n"
+        "Attendee: a@x.co.uk\n"
+        "A works at X UK.\n\n"
+        "Attendee: a@x.co.\n"
+        "A works at X Colombia."
+    )
+
+    assert split_attendees_research(
+        response, research_items("a@x.co", "a@x.com", "a@x.co.uk")
+    ) == {
+        "a@x.com": "Attendee: a@x.com\nA works at X.",
+        "a@x.co.uk": "Attendee: a@x.co.uk\nA works at X UK.",
+        "a@x.co": "Attendee: a@x.co.\nA works at X Colombia.",
+    }
+
+
+def test_split_attendees_research_without_marker():
+    response = "Attendee: a@x.com\nA works at X."
+
+    assert split_attendees_research(response, research_items("a@x.co", "a@x.com")) == {
+        "a@x.com": "Attendee: a@x.com\nA works at X."
+    }
@@ -0,0 +1,127 @@
+import asyncio
+import pytest
+from src.search_cache import SearchCache, normalize_query
+
+
+def results(text):
+    return [{"url": "https://example.com", "content": text}]
+
+
+class Fetcher:
+    """Search stand-in counting its calls, blocked until `done` is set"""
+
+    def __init__(self, outcome):
+        self.outcome = outcome
+        self.calls = 0
+        self.done = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        await self.done.wait()
+
+        if isinstance(self.outcome, Exception):
+            raise self.outcome
+
+        return self.outcome
+
+
+def test_normalize_query_keeps_the_word_order():
+    assert normalize_query("ACME Corp: recent news") == "acme corp recent news"
+    assert normalize_query("X acquires Y") != normalize_query("Y acquires X")
+
+
+def test_concurrent_queries_are_fetched_once():
+    async def main():
+        cache = SearchCache(enabled=True)
+        fetch = Fetcher(results("news"))
+
+        callers = [
+            asyncio.create_task(cache.get_or_fetch(query, fetch))
+            for query in ["Acme news", "acme  NEWS", "Acme news!"]
+        ]
+        await asyncio.sleep(0)
+        fetch.done.set()
+
+        assert await asyncio.gather(*callers) == [results("news")] * 3
+        assert fetch.calls == 1 and cache.coalesced == 2
+
+        # Cached from now on
+        assert await cache.get_or_fetch("acme news", fetch) == results("news")
+        assert fetch.calls == 1 and cache.hits == 1
+
+    asyncio.run(main())
+
+
+def test_coalesced_callers_get_the_error_of_the_leader():
+    async def main():
+        cache = SearchCache(enabled=True)
+        fetch = Fetcher(RuntimeError("search failed"))
+
+        callers = [
+            asyncio.create_task(cache.get_or_fetch("acme news", fetch))
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0)
+        fetch.done.set()
+
+        for caller in callers:
+            with pytest.raises(RuntimeError, match="search failed"):
+                await caller
+
+        # The failure is not cached, the next call fetches again
+        retry = Fetcher(results("news"))
+        retry.done.set()
+
+        assert await cache.get_or_fetch("acme news", retry) == results("news")
+        assert retry.calls == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_leader_does_not_cancel_the_fetch():
+    async def main():
+        cache = SearchCache(enabled=True)
+        fetch = Fetcher(results("news"))
+
+        leader = asyncio.create_task(cache.get_or_fetch("acme news", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("acme news", fetch))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        fetch.done.set()
+
+        assert await follower == results("news")
+        assert leader.cancelled()
+        assert fetch.calls == 1
+        assert cache.stats()["entries"] == 1
+
+    asyncio.run(main())
+
+
+def test_eviction_is_bounded_by_bytes():
+    async def main():
+        # Every entry below takes 100 bytes (url and content), two of them fit
+        cache = SearchCache(enabled=True, max_bytes=250)
+
+        async def fetch(text):
+            return [{"url": "u" * 50, "content": text * 50}]
+
+        for text in ["a", "b"]:
+            await cache.get_or_fetch(text, lambda: fetch(text))
+
+        # "a" is used again, so "b" is the least recently used
+        await cache.get_or_fetch("a", lambda: fetch("x"))
+        await cache.get_or_fetch("c", lambda: fetch("c"))
+
+        assert cache.stats()["entries"] == 2 and cache.stats()["bytes"] == 200
+        assert cache._get("a") is not None and cache._get("c") is not None
+        assert cache._get("b") is None
+
+        # Results larger than the whole cache are not cached
+        await cache.get_or_fetch("d", lambda: fetch("d" * 10))
+
+        assert cache._get("d") is None and cache.stats()["bytes"] == 200
+
+    asyncio.run(main())
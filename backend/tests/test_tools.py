@@ -0,0 +1,134 @@
+import pytest
+from src import tools
+from src.token_budget import TRUNCATION_MARKER
+from src.tools import (
+    ObservationMemory,
+    _passages,
+    compact_observation,
+    current_observation_memory,
+)
+
+FUNDING = "Acme Corp announced a $50 million Series C round led by Sequoia."
+LAB = "The funding will expand its design innovation lab in Berlin."
+HIRING = "The company plans to hire two hundred engineers next year."
+OFFICE = "Its headquarters moved to a larger office in Munich last spring."
+
+
+@pytest.fixture
+def memory():
+    memory = ObservationMemory()
+    memory_token = current_observation_memory.set(memory)
+
+    yield memory
+
+    current_observation_memory.reset(memory_token)
+
+
+@pytest.mark.parametrize(
+    "passage",
+    [
+        "The channel passed 10 million subscribers in March, according to the company.",
+        "Acme is known for its design innovation in consumer electronics.",
+        "The new catalog in Europe lists over 300 products this year.",
+        "Cookie maker Crumbl opened 200 new stores across the United States.",
+        "Jane Doe joined the board after ten years leading "
+        "the login and identity team at Okta.",
+        "The regulator fined the company after it changed its privacy policy "
+        "without notifying the users of its messaging app.",
+    ],
+)
+def test_passages_keep_page_content(passage):
+    assert _passages(passage) == [passage]
+
+
+@pytest.mark.parametrize(
+    "passage",
+    [
+        "Skip to main content",
+        "Sign in to your account",
+        "Subscribe to our weekly newsletter",
+        "We use cookies to improve your experience.",
+        "Accept all cookies and continue browsing",
+        "© 2024 Acme Inc, all rights reserved",
+        "Share on LinkedIn or copy the link",
+        "Please enable JavaScript to view this page.",
+    ],
+)
+def test_passages_drop_navigation(passage):
+    assert _passages(passage) == []
+
+
+def test_passages_drop_boilerplate_lines_of_a_page():
+    content = (
+        "Skip to main content\n"
+        "Log in | Sign up\n"
+        "Acme Corp announced a $50 million Series C round led by Sequoia. "
+        "The funding will expand its design innovation lab in Berlin.\n"
+        "We use cookies to improve your experience. Accept all cookies\n"
+        "© 2024 Acme Corp, all rights reserved."
+    )
+
+    assert _passages(content) == [
+        "Acme Corp announced a $50 million Series C round led by Sequoia.",
+        "The funding will expand its design innovation lab in Berlin.",
+    ]
+
+
+def test_passages_drop_table_rules():
+    assert _passages("| --- | --- | --- |\n| --- | --- | --- | --- |") == []
+
+
+def test_compact_observation_without_words(memory):
+    results = [{"url": "u1", "content": "| --- | --- | --- |\n| --- | --- | --- | --- |"}]
+
+    assert compact_observation("zzqq", results) == ""
+
+
+def test_compact_observation_drops_returned_urls(memory):
+    results = [{"url": "https://acme.com/news", "content": FUNDING}]
+
+    assert compact_observation("acme funding", results) == (
+        f"Source: https://acme.com/news\n{FUNDING}"
+    )
+    assert compact_observation("acme funding", results) == ""
+
+
+def test_compact_observation_drops_near_duplicates(memory):
+    results = [
+        {"url": "https://acme.com/news", "content": FUNDING},
+        {
+            "url": "https://news.example.com/acme",
+            "content": FUNDING.replace("announced", "has announced") + " " + LAB,
+        },
+    ]
+
+    assert compact_observation("acme funding", results) == (
+        f"Source: https://acme.com/news\n{FUNDING}\n\n"
+        f"Source: https://news.example.com/acme\n{LAB}"
+    )
+
+
+def test_compact_observation_keeps_relevant_passages(memory, monkeypatch):
+    monkeypatch.setattr(tools, "OBSERVATION_PASSAGES_PER_RESULT", 2)
+    results = [{"url": "u1", "content": " ".join([FUNDING, LAB, HIRING, OFFICE])}]
+
+    assert compact_observation("Munich office and engineers", results) == (
+        f"Source: u1\n{HIRING}\n{OFFICE}"
+    )
+
+
+def test_compact_observation_falls_back_to_leading_passages(memory, monkeypatch):
+    monkeypatch.setattr(tools, "OBSERVATION_PASSAGES_PER_RESULT", 2)
+    results = [{"url": "u1", "content": " ".join([FUNDING, LAB, HIRING, OFFICE])}]
+
+    assert compact_observation("zzqq", results) == f"Source: u1\n{FUNDING}\n{LAB}"
+
+
+def test_compact_observation_truncates(memory, monkeypatch):
+    monkeypatch.setattr(tools, "OBSERVATION_MAX_TOKENS", 10)
+    results = [{"url": "u1", "content": " ".join([FUNDING, LAB, HIRING, OFFICE])}]
+
+    observation = compact_observation("zzqq", results)
+
+    assert observation.startswith("Source: u1")
+    assert observation.endswith(TRUNCATION_MARKER)
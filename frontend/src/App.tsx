@@ -12,6 +12,11 @@ function App() {
   const [statusType, setStatusType] = useState<string>("");
   const [streamContent, setStreamContent] = useState<string[]>([]);
   const [finalResponse, setFinalResponse] = useState<string>("");
+  const [sections, setSections] = useState<string[]>([]);
+
+  // Meeting sections are shown, in the meetings order, until the final document arrives
+  const displayedResponse =
+    finalResponse || sections.filter(Boolean).join("\n\n---\n\n");
 
   useEffect(() => {
     if (streamContent.length > 0) {
@@ -22,6 +27,8 @@ function App() {
   const handleClick = async (e: FormEvent<HTMLFormElement>) => {
     e.preventDefault();
     setLoading(true);
+    setFinalResponse("");
+    setSections([]);
     const formData = new FormData(e.currentTarget);
 
     const dataToSend: {
@@ -82,10 +89,22 @@ function App() {
               console.log(
                 `Progress: ${event.data.type} - ${event.data.message}`
               );
+            } else if (event.type === EventType.DELTA) {
+              // The formatted document is streamed piece by piece
+              setFinalResponse((prev) => prev + event.data);
+            } else if (event.type === EventType.SECTION) {
+              const { index, section } = event.data;
+              setSections((prev) => {
+                const next = [...prev];
+                next[index] = section;
+                return next;
+              });
             } else if (event.type === EventType.FINAL) {
               setStatusType(event.type);
               setFinalResponse(event.data.toString());
               console.log(`Final Result: ${event.data}`);
+            } else if (event.type === EventType.SUMMARY) {
+              console.log("Run summary:", event.data);
             }
           } catch (e) {
             console.error("Error parsing event:", e);
@@ -238,11 +257,11 @@ function App() {
         </div>
       )}
 
-      {streamContent?.length > 0 && !loading && finalResponse && (
+      {streamContent?.length > 0 && !loading && displayedResponse && (
         <div className="l-final-response">
           <h2>Final Response</h2>
           <div className="l-final-response__content">
-            <ReactMarkdown>{finalResponse}</ReactMarkdown>
+            <ReactMarkdown>{displayedResponse}</ReactMarkdown>
           </div>
         </div>
       )}
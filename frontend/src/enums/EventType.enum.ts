@@ -1,6 +1,9 @@
 export const EventType = {
   PROGRESS: "progress",
+  DELTA: "delta",
+  SECTION: "section",
   FINAL: "final",
+  SUMMARY: "summary",
 } as const;
 
 export type EventType = (typeof EventType)[keyof typeof EventType];
@@ -1,9 +1,40 @@
 import type { EventType } from "../enums/EventType.enum";
 
-export interface IStreamingResponse {
-  type: EventType;
+export interface IProgressStreamingResponse {
+  type: typeof EventType.PROGRESS;
   data: {
     type: string;
     message: string;
   };
 }
+
+export interface IDeltaStreamingResponse {
+  type: typeof EventType.DELTA;
+  data: string;
+}
+
+export interface ISectionStreamingResponse {
+  type: typeof EventType.SECTION;
+  data: {
+    index: number;
+    title: string;
+    section: string;
+  };
+}
+
+export interface IFinalStreamingResponse {
+  type: typeof EventType.FINAL;
+  data: string;
+}
+
+export interface ISummaryStreamingResponse {
+  type: typeof EventType.SUMMARY;
+  data: Record<string, unknown>;
+}
+
+export type IStreamingResponse =
+  | IProgressStreamingResponse
+  | IDeltaStreamingResponse
+  | ISectionStreamingResponse
+  | IFinalStreamingResponse
+  | ISummaryStreamingResponse;